@@ -0,0 +1,32 @@
+-- Running downgrade 32d13110aee4 -> 6c54801bec54
+
+DROP INDEX ft_dataset_development_stage ON dataset;
+
+DROP INDEX ft_dataset_organ ON dataset;
+
+DROP INDEX ft_dataset_species ON dataset;
+
+DROP INDEX ft_dataset_project ON dataset;
+
+DROP INDEX ft_dataset_experiment_platform ON dataset;
+
+DROP INDEX ft_dataset_data_publisher ON dataset;
+
+DROP INDEX ft_atlas_name ON atlas;
+
+DROP INDEX ft_device_name ON device;
+
+DROP INDEX ft_device_brand ON device;
+
+DROP INDEX ft_virtual_file_name ON virtual_file;
+
+DROP INDEX ft_experiment_name ON experiment;
+
+DROP INDEX ft_experiment_tag_tag ON experiment_tag;
+
+DROP INDEX ft_user_staff_id ON user;
+
+DROP INDEX ft_user_username ON user;
+
+UPDATE alembic_version SET version_num='6c54801bec54' WHERE alembic_version.version_num = '32d13110aee4';
+
@@ -0,0 +1,28 @@
+-- Running downgrade e5b7d4a2c9f1 -> 32d13110aee4
+
+DROP INDEX ix_atlas_region_paradigm_class_atlas_id_region_id ON atlas_region_paradigm_class;
+
+DROP INDEX ix_atlas_paradigm_class_atlas_id_is_deleted ON atlas_paradigm_class;
+
+DROP INDEX ix_atlas_region_behavioral_domain_atlas_id_region_id ON atlas_region_behavioral_domain;
+
+DROP INDEX ix_atlas_behavioral_domain_atlas_id_is_deleted ON atlas_behavioral_domain;
+
+DROP INDEX ix_atlas_region_link_atlas_id_link_id ON atlas_region_link;
+
+DROP INDEX ix_atlas_region_atlas_id_is_deleted ON atlas_region;
+
+CREATE INDEX task_id ON task_step (task_id);
+
+DROP INDEX ix_task_step_task_id_is_deleted_index ON task_step;
+
+CREATE INDEX ix_virtual_file_experiment_id ON virtual_file (experiment_id);
+
+DROP INDEX ix_virtual_file_experiment_id_paradigm_id_is_deleted_file_type ON virtual_file;
+
+CREATE INDEX ix_notification_receiver ON notification (receiver);
+
+DROP INDEX ix_notification_receiver_status_is_deleted_gmt_create ON notification;
+
+UPDATE alembic_version SET version_num='32d13110aee4' WHERE alembic_version.version_num = 'e5b7d4a2c9f1';
+
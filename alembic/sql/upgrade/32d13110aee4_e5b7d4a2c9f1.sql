@@ -0,0 +1,26 @@
+-- Running upgrade 32d13110aee4 -> e5b7d4a2c9f1
+
+CREATE INDEX ix_notification_receiver_status_is_deleted_gmt_create ON notification (receiver, status, is_deleted, gmt_create);
+
+DROP INDEX ix_notification_receiver ON notification;
+
+CREATE INDEX ix_virtual_file_experiment_id_paradigm_id_is_deleted_file_type ON virtual_file (experiment_id, paradigm_id, is_deleted, file_type);
+
+DROP INDEX ix_virtual_file_experiment_id ON virtual_file;
+
+CREATE INDEX ix_task_step_task_id_is_deleted_index ON task_step (task_id, is_deleted, `index`);
+
+CREATE INDEX ix_atlas_region_atlas_id_is_deleted ON atlas_region (atlas_id, is_deleted);
+
+CREATE INDEX ix_atlas_region_link_atlas_id_link_id ON atlas_region_link (atlas_id, link_id);
+
+CREATE INDEX ix_atlas_behavioral_domain_atlas_id_is_deleted ON atlas_behavioral_domain (atlas_id, is_deleted);
+
+CREATE INDEX ix_atlas_region_behavioral_domain_atlas_id_region_id ON atlas_region_behavioral_domain (atlas_id, region_id);
+
+CREATE INDEX ix_atlas_paradigm_class_atlas_id_is_deleted ON atlas_paradigm_class (atlas_id, is_deleted);
+
+CREATE INDEX ix_atlas_region_paradigm_class_atlas_id_region_id ON atlas_region_paradigm_class (atlas_id, region_id);
+
+UPDATE alembic_version SET version_num='e5b7d4a2c9f1' WHERE alembic_version.version_num = '32d13110aee4';
+
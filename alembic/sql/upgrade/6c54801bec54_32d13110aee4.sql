@@ -0,0 +1,36 @@
+-- Running upgrade 6c54801bec54 -> 32d13110aee4
+
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+CREATE FULLTEXT INDEX ft_user_username ON user (username) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_user_staff_id ON user (staff_id) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_experiment_tag_tag ON experiment_tag (tag) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_experiment_name ON experiment (name) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_virtual_file_name ON virtual_file (name) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_device_brand ON device (brand) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_device_name ON device (name) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_atlas_name ON atlas (name) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_dataset_data_publisher ON dataset (data_publisher) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_dataset_experiment_platform ON dataset (experiment_platform) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_dataset_project ON dataset (project) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_dataset_species ON dataset (species) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_dataset_organ ON dataset (organ) WITH PARSER ngram;
+
+CREATE FULLTEXT INDEX ft_dataset_development_stage ON dataset (development_stage) WITH PARSER ngram;
+
+SET SESSION innodb_ft_enable_stopword = ON;
+
+UPDATE alembic_version SET version_num='32d13110aee4' WHERE alembic_version.version_num = '6c54801bec54';
+
@@ -1,21 +1,26 @@
 import asyncio
 import base64
 import functools
-import json
+import hashlib
+from contextvars import ContextVar
 from datetime import date, datetime
-from json import JSONEncoder
 from typing import Any, Callable
 
+import orjson
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.roles import WhereHavingRole
 from starlette.responses import JSONResponse
+from starlette.responses import Response as StarletteResponse
+from starlette.status import HTTP_304_NOT_MODIFIED
 
 from app.common.exception import ServiceError
 from app.common.localization import Entity, translate_message
 from app.db import OrmModel, common_crud
 from app.db.crud import human_subject as crud_human_subject
+from app.db.memo import get_request_memo
 from app.db.orm import (
     Atlas,
     AtlasBehavioralDomain,
@@ -32,39 +37,138 @@ from app.db.orm import (
 )
 from app.model.response import Response
 
+# datetime和date交给default处理，保持原有的格式；非str的键与标准库json一致转为str
+API_JSON_OPTIONS: int = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
 
-class ApiJsonEncoder(JSONEncoder):
-    def default(self, o: Any) -> Any:
-        match o:
-            case datetime():
-                return o.strftime("%Y-%m-%d %H:%M:%S")
-            case date():
-                return o.strftime("%Y-%m-%d")
-            case _:
-                return super().default(o)
+
+def api_json_default(o: Any) -> Any:
+    match o:
+        case datetime():
+            # 与strftime("%Y-%m-%d %H:%M:%S")相同，去掉微秒和时区
+            return o.isoformat(" ", "seconds")[:19]
+        case date():
+            return o.isoformat()
+        case BaseModel():
+            # 只取出第一层字段，嵌套的模型继续交给default，不复制整个模型树
+            return dict(o)
+        case tuple():
+            return list(o)
+        case _:
+            raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dump_json_bytes(content: Any) -> bytes:
+    return orjson.dumps(content, default=api_json_default, option=API_JSON_OPTIONS)
+
+
+def dump_json(content: Any) -> str:
+    return dump_json_bytes(content).decode("UTF-8")
 
 
 class ApiJsonResponse(JSONResponse):
     def render(self, content: Any) -> bytes:
-        return json.dumps(
-            content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), cls=ApiJsonEncoder
-        ).encode("UTF-8")
+        return dump_json_bytes(content)
+
+
+class RawJson(str):
+    """已序列化的JSON，作为接口返回值时直接拼接到响应中，不再重复序列化"""
+
+
+class RawDataApiJsonResponse(ApiJsonResponse):
+    def __init__(self, content: dict[str, Any], raw_data: RawJson, **kwargs) -> None:
+        self.raw_data = raw_data
+        super().__init__(content, **kwargs)
+
+    def render(self, content: dict[str, Any]) -> bytes:
+        envelope = dump_json_bytes(content)
+        return envelope[:-1] + b',"data":' + self.raw_data.encode("UTF-8") + b"}"
+
+
+# GET请求的If-None-Match中的ETag，其他请求为None，不生成ETag
+if_none_match_ctxvar: ContextVar[frozenset[str] | None] = ContextVar("if-none-match", default=None)
+# 接口根据数据版本生成的ETag，为None时使用响应数据的哈希
+response_etag_ctxvar: ContextVar[str | None] = ContextVar("response-etag", default=None)
+
+
+class NotModified(Exception):
+    def __init__(self, etag: str) -> None:
+        self.etag = etag
+
+
+def parse_if_none_match(header: str | None) -> frozenset[str]:
+    if not header:
+        return frozenset()
+    # 弱比较，忽略W/前缀
+    return frozenset(etag.strip().removeprefix("W/") for etag in header.split(","))
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode("UTF-8"), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def check_not_modified(*version_parts: Any) -> None:
+    """
+    根据数据版本生成ETag，与请求的If-None-Match一致时直接返回304，跳过后续查询和序列化
+    版本在Redis清空或淘汰后不能重复，否则清空前的ETag会与修改后的数据匹配，递增计数不能直接作为版本
+    """
+    if_none_match = if_none_match_ctxvar.get()
+    if if_none_match is None:
+        return
+    etag = make_etag(*version_parts)
+    response_etag_ctxvar.set(etag)
+    if is_etag_matched(etag, if_none_match):
+        raise NotModified(etag)
+
+
+def is_etag_matched(etag: str, if_none_match: frozenset[str]) -> bool:
+    return "*" in if_none_match or etag.removeprefix("W/") in if_none_match
+
+
+def not_modified_response(etag: str) -> StarletteResponse:
+    return StarletteResponse(status_code=HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def success_envelope() -> dict[str, Any]:
+    """成功响应中除data外的字段"""
+    envelope = dict(Response(data=None, message=translate_message("success")))
+    del envelope["data"]
+    return envelope
 
 
 def wrap_api_response(func: Callable[..., Any]):
-    def response_2_json(response: Response) -> ApiJsonResponse:
-        success_message = translate_message("success")
-        response = Response(data=response, message=success_message)
-        json_response = ApiJsonResponse(response.dict())
-        return json_response
+    def response_2_json(response: Any) -> StarletteResponse:
+        if isinstance(response, StarletteResponse):
+            # 接口已按Accept等自行编码响应
+            return response
+        if_none_match = if_none_match_ctxvar.get()
+        if if_none_match is None and not isinstance(response, RawJson):
+            # 直接序列化Response模型，不再经过.dict()复制
+            return ApiJsonResponse(Response(data=response, message=translate_message("success")))
+
+        # 单独序列化data，用于计算ETag，请求ID每次不同，不参与计算
+        envelope = success_envelope()
+        raw_data = response if isinstance(response, RawJson) else RawJson(dump_json(response))
+        if if_none_match is None:
+            return RawDataApiJsonResponse(envelope, raw_data)
+        etag = response_etag_ctxvar.get() or make_etag(raw_data)
+        if is_etag_matched(etag, if_none_match):
+            return not_modified_response(etag)
+        return RawDataApiJsonResponse(envelope, raw_data, headers={"ETag": etag})
 
     @functools.wraps(func)
-    async def async_wrapper(*args, **kwargs) -> ApiJsonResponse:
-        return response_2_json(await func(*args, **kwargs))
+    async def async_wrapper(*args, **kwargs) -> StarletteResponse:
+        try:
+            return response_2_json(await func(*args, **kwargs))
+        except NotModified as e:
+            return not_modified_response(e.etag)
 
     @functools.wraps(func)
-    def sync_wrapper(*args, **kwargs) -> ApiJsonResponse:
-        return response_2_json(func(*args, **kwargs))
+    def sync_wrapper(*args, **kwargs) -> StarletteResponse:
+        try:
+            return response_2_json(func(*args, **kwargs))
+        except NotModified as e:
+            return not_modified_response(e.etag)
 
     if asyncio.iscoroutinefunction(func):
         return async_wrapper
@@ -151,6 +255,12 @@ def _check_exists(
     id_: int | None = None,
     where: list[WhereHavingRole] | None = None,
 ) -> None:
+    # 同一个请求中多次检查同一行时只查询一次
+    memo = get_request_memo(db)
+    if id_ is not None and (table.__tablename__, id_) in memo.existing_rows:
+        return
     exists = common_crud.exists_row(db, table, id_=id_, where=where)
     if not exists:
         raise ServiceError.not_found(entity)
+    if id_ is not None:
+        memo.existing_rows.add((table.__tablename__, id_))
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
 from sqlalchemy.orm import Session
+from starlette.responses import Response as StarletteResponse
 
 import app.db.crud.file as file_crud
 import app.external.model as rpc_model
-from app.api import wrap_api_response
+from app.api import success_envelope, wrap_api_response
 from app.common.config import config
 from app.common.context import ResearcherContext
 from app.common.exception import ServiceError
 from app.common.localization import Entity
-from app.external import rpc
+from app.external import edf_reader, rpc
+from app.external.display_cache import display_data_cache
+from app.external.downsample import downsample_display_data
+from app.model import columnar
 from app.model.field import ID
 from app.model.request import DisplayEEGRequest, DisplayNeuralSpikeRequest
 from app.model.response import Response
@@ -18,10 +22,14 @@ router = APIRouter(tags=["algorithm"])
 
 @router.post("/api/displayEEG", description="查看EEG数据", response_model=Response[rpc_model.DisplayDataResponse])
 @wrap_api_response
-def display_eeg(request: DisplayEEGRequest, ctx: ResearcherContext = Depends()) -> rpc_model.DisplayDataResponse:
+def display_eeg(
+    request: DisplayEEGRequest, accept: str | None = Header(None), ctx: ResearcherContext = Depends()
+) -> rpc_model.DisplayDataResponse | StarletteResponse:
     file_info = get_file_info(ctx.db, request.file_id)
-    rpc_request = rpc_model.DisplayEEGRequest(file_info=file_info, **request.dict(exclude={"file_id"}))
-    return rpc.display_eeg(rpc_request)
+    rpc_request = rpc_model.DisplayEEGRequest(file_info=file_info, **request.dict(exclude={"file_id", "max_points"}))
+    display = edf_reader.read_eeg_display_data if use_local_eeg_reader(file_info) else rpc.display_eeg
+    display_data = display_data_cache.load_page(display, rpc_request)
+    return display_data_response(downsample_display_data(display_data, request.max_points), accept)
 
 
 @router.post(
@@ -29,22 +37,41 @@ def display_eeg(request: DisplayEEGRequest, ctx: ResearcherContext = Depends())
 )
 @wrap_api_response
 def neural_neural_spike(
-    request: DisplayNeuralSpikeRequest, ctx: ResearcherContext = Depends()
-) -> rpc_model.DisplayDataResponse:
+    request: DisplayNeuralSpikeRequest, accept: str | None = Header(None), ctx: ResearcherContext = Depends()
+) -> rpc_model.DisplayDataResponse | StarletteResponse:
     file_info = get_file_info(ctx.db, request.file_id)
-    rpc_request = rpc_model.DisplayNeuralSpikeRequest(file_info=file_info, **request.dict(exclude={"file_id"}))
-    return rpc.display_neural_spike(rpc_request)
+    rpc_request = rpc_model.DisplayNeuralSpikeRequest(
+        file_info=file_info, **request.dict(exclude={"file_id", "max_points"})
+    )
+    display_data = display_data_cache.load_page(rpc.display_neural_spike, rpc_request)
+    return display_data_response(downsample_display_data(display_data, request.max_points), accept)
+
+
+def display_data_response(
+    display_data: rpc_model.DisplayDataResponse, accept: str | None
+) -> rpc_model.DisplayDataResponse | StarletteResponse:
+    # 默认返回JSON，Accept中声明列式编码时返回二进制
+    if not columnar.accepts_columnar(accept):
+        return display_data
+    content = columnar.encode_display_data(display_data, success_envelope())
+    return StarletteResponse(content, media_type=columnar.COLUMNAR_MEDIA_TYPE)
 
 
 @router.get("/api/getEEGChannels", description="获取EEG文件的channel列表", response_model=Response[list[str]])
 @wrap_api_response
 def get_eeg_channels(file_id: ID, ctx: ResearcherContext = Depends()) -> list[str]:
     file_info = get_file_info(ctx.db, file_id)
+    if use_local_eeg_reader(file_info):
+        return edf_reader.read_eeg_channels(file_info)
     rpc_request = rpc_model.GetFileInfoRequest(file_info=file_info)
     rpc_response = rpc.get_eeg_channels(rpc_request)
     return rpc_response.channels
 
 
+def use_local_eeg_reader(file_info: rpc_model.FileInfo) -> bool:
+    return config.EEG_READER_BACKEND == "local" and edf_reader.is_local_readable(file_info)
+
+
 @router.get(
     "/api/getNeuralSpikeInfo", description="获取NeuralSpike文件信息", response_model=Response[rpc_model.NeuralSpikeFileInfo]
 )
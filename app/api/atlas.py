@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from app.api import (
+    RawJson,
     check_atlas_behavioral_domain_exists,
     check_atlas_exists,
     check_atlas_paradigm_class_exists,
     check_atlas_region_exists,
+    check_not_modified,
+    dump_json,
     wrap_api_response,
 )
-from app.common.context import AllUserContext
+from app.common.context import AllUserContext, AsyncAllUserContext, Context
 from app.common.localization import Entity
-from app.db import common_crud
+from app.db import cache, common_crud
 from app.db.crud import atlas as crud
 from app.db.orm import (
     Atlas,
@@ -52,17 +57,25 @@ from app.model.schema import (
 
 router = APIRouter(tags=["atlas"])
 
+# 缓存的脑图谱树类型
+REGION_TREE = "region"
+BEHAVIORAL_DOMAIN_TREE = "behavioral_domain"
+PARADIGM_CLASS_TREE = "paradigm_class"
+
 
 @router.post("/api/createAtlas", description="创建脑图谱", response_model=Response[int])
 @wrap_api_response
 def create_atlas(create: AtlasCreate, ctx: AllUserContext = Depends()) -> int:
-    return common_crud.insert_row(ctx.db, Atlas, create.dict(), commit=True, raise_on_fail=True)
+    atlas_id = common_crud.insert_row(ctx.db, Atlas, create.dict(), commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, atlas_id)
+    return atlas_id
 
 
 @router.delete("/api/deleteAtlas", description="删除脑图谱", response_model=NoneResponse)
 @wrap_api_response
 def delete_atlas(request: DeleteModelRequest, ctx: AllUserContext = Depends()) -> None:
     common_crud.update_row_as_deleted(ctx.db, Atlas, id_=request.id, commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, request.id)
 
 
 @router.post("/api/updateAtlas", description="更新脑图谱", response_model=NoneResponse)
@@ -70,6 +83,7 @@ def delete_atlas(request: DeleteModelRequest, ctx: AllUserContext = Depends()) -
 def update_atlas(request: AtlasUpdate, ctx: AllUserContext = Depends()) -> None:
     check_atlas_exists(ctx.db, request.id)
     common_crud.update_row(ctx.db, Atlas, request.dict(exclude={"id"}), id_=request.id, commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, request.id)
 
 
 @router.get("/api/getAtlasInfo", description="获取脑图谱详情", response_model=Response[AtlasInfo])
@@ -83,31 +97,37 @@ def get_atlas_info(atlas_id: ID = Query(description="脑图谱ID"), ctx: AllUser
 @router.get("/api/getAtlasesByPage", description="分页获取脑图谱详情", response_model=Response[Page[AtlasInfo]])
 @wrap_api_response
 def get_atlases_by_page(search: AtlasSearch = Depends(), ctx: AllUserContext = Depends()) -> Page[AtlasInfo]:
-    total, atlas_orm = crud.search_atlases(ctx.db, search)
+    total, atlas_orm, next_cursor = crud.search_atlases(ctx.db, search)
     atlas_infos = convert.map_list(convert.atlas_orm_2_info, atlas_orm)
-    return Page(total=total, items=atlas_infos)
+    return Page(total=total, items=atlas_infos, next_cursor=next_cursor)
 
 
 @router.post("/api/createAtlasRegion", description="创建脑图谱区域", response_model=Response[int])
 @wrap_api_response
 def create_atlas_region(create: AtlasRegionCreate, ctx: AllUserContext = Depends()) -> int:
     check_atlas_exists(ctx.db, create.atlas_id)
-    return common_crud.insert_row(ctx.db, AtlasRegion, create.dict(), commit=True, raise_on_fail=True)
+    row_id = common_crud.insert_row(ctx.db, AtlasRegion, create.dict(), commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, create.atlas_id)
+    return row_id
 
 
 @router.delete("/api/deleteAtlasRegion", description="删除脑图谱区域", response_model=NoneResponse)
 @wrap_api_response
 def delete_atlas_region(request: DeleteModelRequest, ctx: AllUserContext = Depends()) -> None:
+    atlas_id = crud.get_atlas_id(ctx.db, AtlasRegion, request.id)
     common_crud.update_row_as_deleted(ctx.db, AtlasRegion, id_=request.id, commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, atlas_id)
 
 
 @router.post("/api/updateAtlasRegion", description="更新脑图谱区域", response_model=NoneResponse)
 @wrap_api_response
 def update_atlas_region(request: AtlasRegionUpdate, ctx: AllUserContext = Depends()) -> None:
     check_atlas_region_exists(ctx.db, request.id)
+    old_atlas_id = crud.get_atlas_id(ctx.db, AtlasRegion, request.id)
     common_crud.update_row(
         ctx.db, AtlasRegion, request.dict(exclude={"id"}), id_=request.id, commit=True, raise_on_fail=True
     )
+    bump_atlas_versions(ctx, old_atlas_id, request.atlas_id)
 
 
 @router.get(
@@ -129,14 +149,33 @@ def get_atlas_region_info(
 
 @router.get("/api/getAtlasRegionTrees", description="获取脑图谱区域树形结构", response_model=Response[list[AtlasRegionTreeInfo]])
 @wrap_api_response
-def get_atlas_region_trees(
-    atlas_id: ID = Query(description="脑图谱ID"), ctx: AllUserContext = Depends()
-) -> list[AtlasRegionTreeInfo]:
-    regions = crud.list_atlas_regions_by_atlas_id(ctx.db, atlas_id)
+async def get_atlas_region_trees(
+    atlas_id: ID = Query(description="脑图谱ID"), ctx: AsyncAllUserContext = Depends()
+) -> RawJson:
+    version, region_trees_json = await run_in_threadpool(cache.get_atlas_tree, ctx.cache, REGION_TREE, atlas_id)
+    if version is not None:
+        check_not_modified(REGION_TREE, atlas_id, version)
+    if region_trees_json is not None:
+        return RawJson(region_trees_json)
+
+    regions = await ctx.async_db.run_sync(crud.list_atlas_regions_by_atlas_id, atlas_id)
     region_tree_nodes = convert.map_list(convert.atlas_region_orm_2_tree_node, regions)
     region_trees = build_trees(region_tree_nodes)
     region_tree_infos = convert.map_list(convert.atlas_region_tree_node_2_info, region_trees)
-    return region_tree_infos
+    region_trees_json = dump_tree_infos(region_tree_infos)
+    await run_in_threadpool(cache.set_atlas_tree, ctx.cache, REGION_TREE, atlas_id, version, region_trees_json)
+    return region_trees_json
+
+
+def dump_tree_infos(tree_infos: list[BaseModel]) -> RawJson:
+    return RawJson(dump_json(tree_infos))
+
+
+def bump_atlas_versions(ctx: Context, *atlas_ids: int | None) -> None:
+    """脑图谱相关数据修改后更换脑图谱版本，使缓存的树失效，需要在提交后调用"""
+    for atlas_id in set(atlas_ids):
+        if atlas_id is not None:
+            cache.bump_atlas_version(ctx.cache, atlas_id)
 
 
 def build_trees(tree_nodes: list) -> list:
@@ -155,13 +194,17 @@ def build_trees(tree_nodes: list) -> list:
 @wrap_api_response
 def create_atlas_region_link(create: AtlasRegionLinkCreate, ctx: AllUserContext = Depends()) -> int:
     check_atlas_exists(ctx.db, create.atlas_id)
-    return common_crud.insert_row(ctx.db, AtlasRegionLink, create.dict(), commit=True, raise_on_fail=True)
+    row_id = common_crud.insert_row(ctx.db, AtlasRegionLink, create.dict(), commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, create.atlas_id)
+    return row_id
 
 
 @router.delete("/api/deleteAtlasRegionLink", description="删除脑区连接", response_model=NoneResponse)
 @wrap_api_response
 def delete_atlas_region_link(request: DeleteModelRequest, ctx: AllUserContext = Depends()) -> None:
+    atlas_id = crud.get_atlas_id(ctx.db, AtlasRegionLink, request.id)
     common_crud.update_row_as_deleted(ctx.db, AtlasRegionLink, id_=request.id, commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, atlas_id)
 
 
 @router.post("/api/updateAtlasRegionLink", description="更新脑区连接", response_model=NoneResponse)
@@ -169,9 +212,11 @@ def delete_atlas_region_link(request: DeleteModelRequest, ctx: AllUserContext =
 def update_atlas_region_link(update: AtlasRegionLinkUpdate, ctx: AllUserContext = Depends()) -> None:
     check_atlas_exists(ctx.db, update.atlas_id)
     check_atlas_region_exists(ctx.db, update.id)
+    old_atlas_id = crud.get_atlas_id(ctx.db, AtlasRegionLink, update.id)
     common_crud.update_row(
         ctx.db, AtlasRegionLink, update.dict(exclude={"id"}), id_=update.id, commit=True, raise_on_fail=True
     )
+    bump_atlas_versions(ctx, old_atlas_id, update.atlas_id)
 
 
 @router.get("/api/getAtlasRegionLinkInfo", description="获取脑区连接详情", response_model=Response[AtlasRegionLinkInfo])
@@ -192,13 +237,16 @@ def get_atlas_region_link_info(
 def create_behavioral_domain(create: AtlasBehavioralDomainCreate, ctx: AllUserContext = Depends()) -> int:
     check_atlas_exists(ctx.db, create.atlas_id)
     domain_id = common_crud.insert_row(ctx.db, AtlasBehavioralDomain, create.dict(), commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, create.atlas_id)
     return domain_id
 
 
 @router.delete("/api/deleteBehavioralDomain", description="删除脑图谱行为域", response_model=NoneResponse)
 @wrap_api_response
 def delete_behavioral_domain(request: DeleteModelRequest, ctx: AllUserContext = Depends()) -> None:
+    atlas_id = crud.get_atlas_id(ctx.db, AtlasBehavioralDomain, request.id)
     common_crud.update_row_as_deleted(ctx.db, AtlasBehavioralDomain, id_=request.id, commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, atlas_id)
 
 
 @router.post("/api/updateAtlasBehavioralDomain", description="更新脑图谱行为域", response_model=NoneResponse)
@@ -206,9 +254,11 @@ def delete_behavioral_domain(request: DeleteModelRequest, ctx: AllUserContext =
 def update_atlas_region_link(update: AtlasBehavioralDomainUpdate, ctx: AllUserContext = Depends()) -> None:
     check_atlas_exists(ctx.db, update.atlas_id)
     check_atlas_behavioral_domain_exists(ctx.db, update.id)
+    old_atlas_id = crud.get_atlas_id(ctx.db, AtlasBehavioralDomain, update.id)
     common_crud.update_row(
         ctx.db, AtlasBehavioralDomain, update.dict(exclude={"id"}), id_=update.id, commit=True, raise_on_fail=True
     )
+    bump_atlas_versions(ctx, old_atlas_id, update.atlas_id)
 
 
 @router.get(
@@ -219,12 +269,20 @@ def update_atlas_region_link(update: AtlasBehavioralDomainUpdate, ctx: AllUserCo
 @wrap_api_response
 def get_atlas_behavioral_domain_trees(
     atlas_id: ID = Query(description="脑图谱ID"), ctx: AllUserContext = Depends()
-) -> list[AtlasBehavioralDomainTreeInfo]:
+) -> RawJson:
+    version, domain_trees_json = cache.get_atlas_tree(ctx.cache, BEHAVIORAL_DOMAIN_TREE, atlas_id)
+    if version is not None:
+        check_not_modified(BEHAVIORAL_DOMAIN_TREE, atlas_id, version)
+    if domain_trees_json is not None:
+        return RawJson(domain_trees_json)
+
     domains = crud.list_atlas_behavioral_domains_by_atlas_id(ctx.db, atlas_id)
     domain_tree_nodes = convert.map_list(convert.atlas_behavioral_domain_orm_2_tree_node, domains)
     domain_trees = build_trees(domain_tree_nodes)
     domain_tree_infos = convert.map_list(convert.atlas_behavioral_domain_tree_node_2_info, domain_trees)
-    return domain_tree_infos
+    domain_trees_json = dump_tree_infos(domain_tree_infos)
+    cache.set_atlas_tree(ctx.cache, BEHAVIORAL_DOMAIN_TREE, atlas_id, version, domain_trees_json)
+    return domain_trees_json
 
 
 @router.post("/api/createAtlasRegionBehavioralDomain", description="创建脑区相关的行为域", response_model=Response[int])
@@ -234,15 +292,19 @@ def create_atlas_region_behavioral_domain(
 ) -> int:
     check_atlas_exists(ctx.db, create.atlas_id)
     check_atlas_region_exists(ctx.db, create.region_id)
-    return common_crud.insert_row(ctx.db, AtlasRegionBehavioralDomain, create.dict(), commit=True, raise_on_fail=True)
+    row_id = common_crud.insert_row(ctx.db, AtlasRegionBehavioralDomain, create.dict(), commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, create.atlas_id)
+    return row_id
 
 
 @router.delete("/api/deleteAtlasRegionBehavioralDomain", description="删除脑区相关的行为域", response_model=NoneResponse)
 @wrap_api_response
 def delete_atlas_region_behavioral_domain(request: DeleteModelRequest, ctx: AllUserContext = Depends()) -> None:
+    atlas_id = crud.get_atlas_id(ctx.db, AtlasRegionBehavioralDomain, request.id)
     common_crud.update_row_as_deleted(
         ctx.db, AtlasRegionBehavioralDomain, id_=request.id, commit=True, raise_on_fail=True
     )
+    bump_atlas_versions(ctx, atlas_id)
 
 
 @router.post("/api/updateAtlasRegionBehavioralDomain", description="更新脑区相关的行为域", response_model=NoneResponse)
@@ -252,9 +314,11 @@ def update_atlas_region_behavioral_domain(
 ) -> None:
     check_atlas_exists(ctx.db, update.atlas_id)
     check_atlas_region_exists(ctx.db, update.id)
+    old_atlas_id = crud.get_atlas_id(ctx.db, AtlasRegionBehavioralDomain, update.id)
     common_crud.update_row(
         ctx.db, AtlasRegionBehavioralDomain, update.dict(exclude={"id"}), id_=update.id, commit=True, raise_on_fail=True
     )
+    bump_atlas_versions(ctx, old_atlas_id, update.atlas_id)
 
 
 @router.get(
@@ -280,13 +344,16 @@ def create_paradigm_class(create: AtlasParadigmClassCreate, ctx: AllUserContext
     paradigm_class_id = common_crud.insert_row(
         ctx.db, AtlasParadigmClass, create.dict(), commit=True, raise_on_fail=True
     )
+    bump_atlas_versions(ctx, create.atlas_id)
     return paradigm_class_id
 
 
 @router.delete("/api/deleteParadigmClass", description="删除脑图谱范例集", response_model=NoneResponse)
 @wrap_api_response
 def delete_paradigm_class(request: DeleteModelRequest, ctx: AllUserContext = Depends()) -> None:
+    atlas_id = crud.get_atlas_id(ctx.db, AtlasParadigmClass, request.id)
     common_crud.update_row_as_deleted(ctx.db, AtlasParadigmClass, id_=request.id, commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, atlas_id)
 
 
 @router.post("/api/updateParadigmClass", description="更新脑图谱范例集", response_model=NoneResponse)
@@ -294,23 +361,31 @@ def delete_paradigm_class(request: DeleteModelRequest, ctx: AllUserContext = Dep
 def update_paradigm_class(update: AtlasParadigmClassUpdate, ctx: AllUserContext = Depends()) -> None:
     check_atlas_exists(ctx.db, update.atlas_id)
     check_atlas_paradigm_class_exists(ctx.db, update.id)
+    old_atlas_id = crud.get_atlas_id(ctx.db, AtlasParadigmClass, update.id)
     common_crud.update_row(
         ctx.db, AtlasParadigmClass, update.dict(exclude={"id"}), id_=update.id, commit=True, raise_on_fail=True
     )
+    bump_atlas_versions(ctx, old_atlas_id, update.atlas_id)
 
 
 @router.get(
     "/api/getParadigmClassTrees", description="获取脑图谱范例集树", response_model=Response[list[AtlasParadigmClassTreeInfo]]
 )
 @wrap_api_response
-def get_paradigm_class_trees(
-    atlas_id: ID = Query(description="脑图谱ID"), ctx: AllUserContext = Depends()
-) -> list[AtlasParadigmClassTreeInfo]:
+def get_paradigm_class_trees(atlas_id: ID = Query(description="脑图谱ID"), ctx: AllUserContext = Depends()) -> RawJson:
+    version, paradigm_class_trees_json = cache.get_atlas_tree(ctx.cache, PARADIGM_CLASS_TREE, atlas_id)
+    if version is not None:
+        check_not_modified(PARADIGM_CLASS_TREE, atlas_id, version)
+    if paradigm_class_trees_json is not None:
+        return RawJson(paradigm_class_trees_json)
+
     paradigm_classes = crud.list_atlas_paradigm_class_by_atlas_id(ctx.db, atlas_id)
     paradigm_class_tree_nodes = convert.map_list(convert.atlas_paradigm_class_orm_2_tree_node, paradigm_classes)
     paradigm_class_trees = build_trees(paradigm_class_tree_nodes)
     paradigm_class_tree_infos = convert.map_list(convert.atlas_paradigm_class_tree_node_2_info, paradigm_class_trees)
-    return paradigm_class_tree_infos
+    paradigm_class_trees_json = dump_tree_infos(paradigm_class_tree_infos)
+    cache.set_atlas_tree(ctx.cache, PARADIGM_CLASS_TREE, atlas_id, version, paradigm_class_trees_json)
+    return paradigm_class_trees_json
 
 
 @router.post("/api/createAtlasRegionParadigmClass", description="创建脑区相关的范例集", response_model=Response[int])
@@ -318,13 +393,17 @@ def get_paradigm_class_trees(
 def create_atlas_region_paradigm_class(create: AtlasRegionParadigmClassCreate, ctx: AllUserContext = Depends()) -> int:
     check_atlas_exists(ctx.db, create.atlas_id)
     check_atlas_region_exists(ctx.db, create.region_id)
-    return common_crud.insert_row(ctx.db, AtlasRegionParadigmClass, create.dict(), commit=True, raise_on_fail=True)
+    row_id = common_crud.insert_row(ctx.db, AtlasRegionParadigmClass, create.dict(), commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, create.atlas_id)
+    return row_id
 
 
 @router.delete("/api/deleteAtlasRegionParadigmClass", description="删除脑区相关的范例集", response_model=NoneResponse)
 @wrap_api_response
 def delete_atlas_region_paradigm_class(request: DeleteModelRequest, ctx: AllUserContext = Depends()) -> None:
+    atlas_id = crud.get_atlas_id(ctx.db, AtlasRegionParadigmClass, request.id)
     common_crud.update_row_as_deleted(ctx.db, AtlasRegionParadigmClass, id_=request.id, commit=True, raise_on_fail=True)
+    bump_atlas_versions(ctx, atlas_id)
 
 
 @router.post("/api/updateAtlasRegionParadigmClass", description="更新脑区相关的范例集", response_model=NoneResponse)
@@ -332,9 +411,11 @@ def delete_atlas_region_paradigm_class(request: DeleteModelRequest, ctx: AllUser
 def update_atlas_region_paradigm_class(update: AtlasRegionParadigmClassUpdate, ctx: AllUserContext = Depends()) -> None:
     check_atlas_exists(ctx.db, update.atlas_id)
     check_atlas_region_exists(ctx.db, update.id)
+    old_atlas_id = crud.get_atlas_id(ctx.db, AtlasRegionParadigmClass, update.id)
     common_crud.update_row(
         ctx.db, AtlasRegionParadigmClass, update.dict(exclude={"id"}), id_=update.id, commit=True, raise_on_fail=True
     )
+    bump_atlas_versions(ctx, old_atlas_id, update.atlas_id)
 
 
 @router.get(
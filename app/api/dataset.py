@@ -48,6 +48,7 @@ def create_dataset(request: CreateDatasetRequest, ctx: ResearcherContext = Depen
     return dataset_id
 
 
+@router.get("/api/getDatasetInfo", description="获取数据集详情", response_model=Response[DatasetInfo])
 @router.post("/api/getDatasetInfo", description="获取数据集详情", response_model=Response[DatasetInfo])
 @wrap_api_response
 def get_dataset_info(dataset_id: int, ctx: HumanSubjectContext = Depends()) -> DatasetInfo:
@@ -61,9 +62,9 @@ def get_dataset_info(dataset_id: int, ctx: HumanSubjectContext = Depends()) -> D
 @router.post("/api/getDatasetByPage", description="获取数据集列表", response_model=Response[Page[DatasetInfo]])
 @wrap_api_response
 def get_dataset_by_page(search: DatasetSearch = Depends(), ctx: HumanSubjectContext = Depends()) -> Page[DatasetInfo]:
-    total, orm_datasets = crud.search_datasets(ctx.db, search)
+    total, orm_datasets, next_cursor = crud.search_datasets(ctx.db, search)
     dataset_infos = convert.map_list(convert.dataset_orm_2_info, orm_datasets)
-    return Page(total=total, items=dataset_infos)
+    return Page(total=total, items=dataset_infos, next_cursor=next_cursor)
 
 
 @router.post("/api/updateDataset", description="更新数据集", response_model=NoneResponse)
@@ -55,9 +55,9 @@ def get_eeg_data_info(eeg_data_id: int, ctx: HumanSubjectContext = Depends()) ->
 @router.get("/api/getEEGDataByPage", description="获取数据集列表", response_model=Response[Page[EEGDataInfo]])
 @wrap_api_response
 def get_eeg_data_by_page(search: EEGDataSearch = Depends(), ctx: HumanSubjectContext = Depends()) -> Page[EEGDataInfo]:
-    total, orm_eeg_data = crud.search_eegdata(ctx.db, search)
+    total, orm_eeg_data, next_cursor = crud.search_eegdata(ctx.db, search)
     eeg_data_infos = convert.map_list(convert.EEGData_orm_2_info, orm_eeg_data)
-    return Page(total=total, items=eeg_data_infos)
+    return Page(total=total, items=eeg_data_infos, next_cursor=next_cursor)
 
 
 @router.post("/api/updateEEGData", description="更新数据集", response_model=NoneResponse)
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
 
 from app.api import wrap_api_response
-from app.common.context import HumanSubjectContext, ResearcherContext
+from app.common.context import AsyncHumanSubjectContext, HumanSubjectContext, ResearcherContext
 from app.common.exception import ServiceError
 from app.common.localization import Entity
-from app.db import common_crud
+from app.db import common_crud, unit_of_work
 from app.db.crud import experiment as crud
+from app.db.memo import RequestMemo
 from app.db.orm import Experiment, ExperimentAssistant, ExperimentTag
 from app.model import convert
 from app.model.request import DeleteModelRequest, UpdateExperimentAssistantsRequest, UpdateExperimentRequest
@@ -24,40 +26,47 @@ router = APIRouter(tags=["experiment"])
 @router.post("/api/createExperiment", description="创建实验", response_model=Response[int])
 @wrap_api_response
 def create_experiment(request: CreateExperimentRequest, ctx: ResearcherContext = Depends()) -> int:
-    experiment_id = common_crud.insert_row(
-        ctx.db, Experiment, request.dict(exclude={"assistants", "tags"}), commit=False
-    )
-    if experiment_id is None:
-        raise ServiceError.database_fail()
-
-    if len(request.assistants) > 0:
-        assistants = [
-            {"user_id": assistant_id, "experiment_id": experiment_id} for assistant_id in set(request.assistants)
-        ]
-        all_inserted = common_crud.bulk_insert_rows(ctx.db, ExperimentAssistant, assistants, commit=False)
-        if not all_inserted:
+    with unit_of_work(ctx.db):
+        experiment_id = common_crud.insert_row(
+            ctx.db, Experiment, request.dict(exclude={"assistants", "tags"}), commit=False
+        )
+        if experiment_id is None:
             raise ServiceError.database_fail()
 
-    if len(request.tags) > 0:
-        tags = [{"experiment_id": experiment_id, "tag": tag} for tag in set(request.tags)]
-        all_inserted = common_crud.bulk_insert_rows(ctx.db, ExperimentTag, tags, commit=False)
-        if not all_inserted:
-            raise ServiceError.database_fail()
+        if len(request.assistants) > 0:
+            assistants = [
+                {"user_id": assistant_id, "experiment_id": experiment_id} for assistant_id in set(request.assistants)
+            ]
+            all_inserted = common_crud.bulk_insert_rows(ctx.db, ExperimentAssistant, assistants, commit=False)
+            if not all_inserted:
+                raise ServiceError.database_fail()
+
+        if len(request.tags) > 0:
+            tags = [{"experiment_id": experiment_id, "tag": tag} for tag in set(request.tags)]
+            all_inserted = common_crud.bulk_insert_rows(ctx.db, ExperimentTag, tags, commit=False)
+            if not all_inserted:
+                raise ServiceError.database_fail()
 
-    ctx.db.commit()
     return experiment_id
 
 
 @router.get("/api/getExperimentInfo", description="获取实验详情", response_model=Response[ExperimentResponse])
 @wrap_api_response
-def get_experiment_info(
-    experiment_id: int = Query(description="实验ID"), ctx: HumanSubjectContext = Depends()
+async def get_experiment_info(
+    experiment_id: int = Query(description="实验ID"), ctx: AsyncHumanSubjectContext = Depends()
 ) -> ExperimentResponse:
-    orm_experiment = crud.get_experiment_by_id(ctx.db, experiment_id)
+    return await ctx.async_db.run_sync(load_experiment_info, ctx.memo, experiment_id)
+
+
+def load_experiment_info(db: Session, memo: RequestMemo, experiment_id: int) -> ExperimentResponse:
+    """在async_db的run_sync中执行，转换时访问的属性即使需要延迟加载也不会在事件循环中直接执行IO"""
+    orm_experiment = crud.get_experiment_by_id(db, experiment_id)
     if orm_experiment is None:
         raise ServiceError.not_found(Entity.experiment)
 
-    experiment = convert.experiment_orm_2_response(orm_experiment)
+    assistant_ids = crud.list_experiment_assistant_ids(db, experiment_id)
+    users = memo.load_users(db, [orm_experiment.main_operator, *assistant_ids])
+    experiment = convert.experiment_orm_2_response(orm_experiment, assistant_ids, users)
     return experiment
 
 
@@ -2,7 +2,7 @@ import logging
 import os.path
 from os import PathLike
 from pathlib import Path
-from typing import IO
+from typing import IO, Any, Iterator
 from zipfile import ZipFile
 
 from fastapi import APIRouter, Depends
@@ -13,10 +13,10 @@ from sqlalchemy.orm import Session
 
 from app.api import wrap_api_response
 from app.common.config import config
-from app.common.context import HumanSubjectContext, NotLogonContext, ResearcherContext
+from app.common.context import AsyncHumanSubjectContext, HumanSubjectContext, NotLogonContext, ResearcherContext
 from app.common.exception import ServiceError
 from app.common.localization import Entity
-from app.db import common_crud
+from app.db import common_crud, unit_of_work
 from app.db.crud import file as crud
 from app.db.orm import StorageFile, VirtualFile
 from app.model import convert
@@ -37,9 +37,10 @@ def upload_file(
     file: UploadFile = FastApiFile(),
     ctx: ResearcherContext = Depends(),
 ) -> int:
-    virtual_file_id, os_storage_path = save_file(ctx.db, file, experiment_id, is_original)
-    if file.filename.endswith(".nev.zip") and is_nev_zip_file(os_storage_path):
-        handle_nev_zip_file(ctx.db, os_storage_path, experiment_id, virtual_file_id)
+    with unit_of_work(ctx.db):
+        virtual_file_id, os_storage_path = save_file(ctx.db, file, experiment_id, is_original)
+        if file.filename.endswith(".nev.zip") and is_nev_zip_file(os_storage_path):
+            handle_nev_zip_file(ctx.db, os_storage_path, experiment_id, virtual_file_id)
     return virtual_file_id
 
 
@@ -102,8 +103,15 @@ def handle_nev_zip_file(db: Session, zip_file_path: Path, experiment_id: int, vi
     nev_dir = config.FILE_ROOT / str(experiment_id) / str(virtual_file_id)
     nev_dir.mkdir()
 
-    # 解压缩zip文件
-    storage_file_dicts = []
+    # 边解压边插入StorageFile行
+    storage_files = iter_nev_storage_files(zip_file_path, nev_dir, experiment_id, virtual_file_id)
+    if not common_crud.bulk_insert_rows(db, StorageFile, storage_files, commit=True):
+        raise ServiceError.database_fail()
+
+
+def iter_nev_storage_files(
+    zip_file_path: Path, nev_dir: Path, experiment_id: int, virtual_file_id: int
+) -> Iterator[dict[str, Any]]:
     with ZipFile(zip_file_path, mode="r") as zip_file:
         for filename, file_info in zip_file.NameToInfo.items():
             file_extension = get_filename_extension(filename)
@@ -113,18 +121,12 @@ def handle_nev_zip_file(db: Session, zip_file_path: Path, experiment_id: int, vi
             output_file_path = nev_dir / output_file_name
             with zip_file.open(file_info, mode="r") as zipped_file:
                 write_file(zipped_file, output_file_path)
-            storage_file_dicts.append(
-                {
-                    "virtual_file_id": virtual_file_id,
-                    "name": output_file_name,
-                    "size": get_file_size(output_file_path),
-                    "storage_path": f"{experiment_id}/{virtual_file_id}/{output_file_name}",
-                }
-            )
-
-    # 插入StorageFile行
-    if not common_crud.bulk_insert_rows(db, StorageFile, storage_file_dicts, commit=True):
-        raise ServiceError.database_fail()
+            yield {
+                "virtual_file_id": virtual_file_id,
+                "name": output_file_name,
+                "size": get_file_size(output_file_path),
+                "storage_path": f"{experiment_id}/{virtual_file_id}/{output_file_name}",
+            }
 
 
 @router.get("/api/getFileTypes", description="获取当前实验已有的文件类型", response_model=Response[list[str]])
@@ -136,10 +138,12 @@ def get_file_types(experiment_id: int = Query(description="实验ID"), ctx: Huma
 
 @router.get("/api/getFilesByPage", description="分页获取文件列表", response_model=Response[list[FileResponse]])
 @wrap_api_response
-def get_files_by_page(search: FileSearch = Depends(), ctx: HumanSubjectContext = Depends()) -> Page[FileResponse]:
-    total, files = crud.search_files(ctx.db, search)
+async def get_files_by_page(
+    search: FileSearch = Depends(), ctx: AsyncHumanSubjectContext = Depends()
+) -> Page[FileResponse]:
+    total, files, next_cursor = await ctx.async_db.run_sync(crud.search_files, search)
     file_responses = convert.map_list(convert.virtual_file_orm_2_response, files)
-    return Page(total=total, items=file_responses)
+    return Page(total=total, items=file_responses, next_cursor=next_cursor)
 
 
 @router.get("/api/downloadFile/{file_id}", description="下载文件")
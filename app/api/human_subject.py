@@ -5,7 +5,7 @@ from app.common.context import HumanSubjectContext, ResearcherContext
 from app.common.exception import ServiceError
 from app.common.localization import Entity
 from app.common.user_auth import AccessLevel, hash_password
-from app.db import common_crud
+from app.db import cache, common_crud, unit_of_work
 from app.db.crud import human_subject as crud
 from app.db.orm import ExperimentHumanSubject, HumanSubject, User
 from app.model import convert
@@ -19,25 +19,35 @@ router = APIRouter(tags=["human subject"])
 @router.post("/api/createHumanSubject", description="创建人类被试者", response_model=Response[CreateHumanSubjectResponse])
 @wrap_api_response
 def create_human_subject(request: HumanSubjectCreate, ctx: ResearcherContext = Depends()) -> CreateHumanSubjectResponse:
-    next_index = crud.get_next_human_subject_index(ctx.db)
-    username = f"HS{next_index:06}"
-    password = f"{username}#brain#{username}"
-    user_dict = {
-        "username": username,
-        "staff_id": username,
-        "access_level": AccessLevel.HUMAN_SUBJECT.value,
-        "hashed_password": hash_password(password),
-    }
-    user_id = common_crud.insert_row(ctx.db, User, user_dict, commit=True)
-    if user_id is None:
-        raise ServiceError.database_fail()
-
-    human_subject_dict = request.dict() | {"user_id": user_id}
-    human_subject_id = common_crud.insert_row(ctx.db, HumanSubject, human_subject_dict, commit=True)
-    if human_subject_id is None:
-        raise ServiceError.database_fail()
-
-    return CreateHumanSubjectResponse(user_id=user_id, username=username, staff_id=username, password=password)
+    while True:
+        next_index = crud.get_next_human_subject_index(ctx.db, update_index=False)
+        if next_index is None:
+            raise ServiceError.database_fail()
+        username = f"HS{next_index:06}"
+        password = f"{username}#brain#{username}"
+        # bcrypt较慢，在事务外计算密码哈希，避免哈希期间持有序号的行锁
+        hashed_password = hash_password(password)
+
+        with unit_of_work(ctx.db):
+            if not crud.claim_human_subject_index(ctx.db, next_index):
+                # 序号已被并发的请求占用，结束当前事务后重新读取序号
+                continue
+            user_dict = {
+                "username": username,
+                "staff_id": username,
+                "access_level": AccessLevel.HUMAN_SUBJECT.value,
+                "hashed_password": hashed_password,
+            }
+            user_id = common_crud.insert_row(ctx.db, User, user_dict, commit=True)
+            if user_id is None:
+                raise ServiceError.database_fail()
+
+            human_subject_dict = request.dict() | {"user_id": user_id}
+            human_subject_id = common_crud.insert_row(ctx.db, HumanSubject, human_subject_dict, commit=True)
+            if human_subject_id is None:
+                raise ServiceError.database_fail()
+
+        return CreateHumanSubjectResponse(user_id=user_id, username=username, staff_id=username, password=password)
 
 
 @router.delete("/api/deleteHumanSubjects", description="批量删除人类被试者", response_model=NoneResponse)
@@ -51,6 +61,7 @@ def delete_human_subjects(request: DeleteHumanSubjectRequest, ctx: ResearcherCon
     success = common_crud.bulk_update_rows_as_deleted(ctx.db, User, where=[User.id.in_(request.user_ids)], commit=True)
     if not success:
         raise ServiceError.database_fail()
+    cache.invalidate_user_access_level(ctx.cache, *request.user_ids)
 
 
 @router.get("/api/getHumanSubjectInfo", description="获取人类被试者详情", response_model=Response[HumanSubjectResponse])
@@ -71,9 +82,9 @@ def get_human_subject_info(
 def get_human_subjects_by_page(
     search: HumanSubjectSearch = Depends(), ctx: HumanSubjectContext = Depends()
 ) -> Page[HumanSubjectResponse]:
-    total, human_subjects = crud.search_human_subjects(ctx.db, search)
+    total, human_subjects, next_cursor = crud.search_human_subjects(ctx.db, search)
     human_subjects_responses = convert.map_list(convert.human_subject_orm_2_response, human_subjects)
-    return Page(total=total, items=human_subjects_responses)
+    return Page(total=total, items=human_subjects_responses, next_cursor=next_cursor)
 
 
 @router.post("/api/updateHumanSubject", description="更新人类被试者", response_model=NoneResponse)
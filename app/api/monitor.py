@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+
+from app.api import wrap_api_response
+from app.common.context import AdministratorContext
+from app.common.schedule import scheduled_jobs
+from app.db.pool_stats import get_pool_stats
+from app.external.rpc import rpc_stats
+from app.model.response import Response
+from app.model.schema import DatabasePoolStats, RemoteServiceStats, ScheduledJobStats
+
+router = APIRouter(tags=["monitor"])
+
+
+@router.get("/api/getDatabasePoolStats", description="获取数据库连接池统计", response_model=Response[list[DatabasePoolStats]])
+@wrap_api_response
+def get_database_pool_stats(ctx: AdministratorContext = Depends()) -> list[DatabasePoolStats]:
+    return [DatabasePoolStats(**stats) for stats in get_pool_stats()]
+
+
+@router.get("/api/getScheduledJobStats", description="获取定时任务执行统计", response_model=Response[list[ScheduledJobStats]])
+@wrap_api_response
+def get_scheduled_job_stats(ctx: AdministratorContext = Depends()) -> list[ScheduledJobStats]:
+    return [ScheduledJobStats.from_orm(job_stats) for job_stats in scheduled_jobs.values()]
+
+
+@router.get("/api/getRemoteServiceStats", description="获取算法服务调用统计", response_model=Response[list[RemoteServiceStats]])
+@wrap_api_response
+def get_remote_service_stats(ctx: AdministratorContext = Depends()) -> list[RemoteServiceStats]:
+    return [RemoteServiceStats(**stats.snapshot()) for stats in list(rpc_stats.values())]
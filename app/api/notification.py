@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, Query
 import app.db.crud.notification as crud
 from app.api import wrap_api_response
 from app.common.config import config
-from app.common.context import HumanSubjectContext
+from app.common.context import AsyncHumanSubjectContext, HumanSubjectContext
 from app.common.exception import ServiceError
 from app.db import common_crud
 from app.db.orm import Notification
@@ -28,8 +28,8 @@ def send_notification(request: NotificationBase, ctx: HumanSubjectContext = Depe
 
 @router.get("/api/getUnreadNotificationCount", description="获取未读通知总数", response_model=Response[int])
 @wrap_api_response
-def get_unread_notification_count(ctx: HumanSubjectContext = Depends()) -> int:
-    unread_count = crud.get_notification_unread_count(ctx.db, ctx.user_id)
+async def get_unread_notification_count(ctx: AsyncHumanSubjectContext = Depends()) -> int:
+    unread_count = await ctx.async_db.run_sync(crud.get_notification_unread_count, ctx.user_id)
     return unread_count
 
 
@@ -42,7 +42,8 @@ def get_recent_unread_notifications(
     ctx: HumanSubjectContext = Depends(),
 ) -> list[NotificationResponse]:
     orm_notifications = crud.list_recent_unread_notifications(ctx.db, ctx.user_id, count)
-    return convert.map_list(convert.notification_orm_2_response, orm_notifications)
+    users = ctx.memo.load_users(ctx.db, (orm_notification.creator for orm_notification in orm_notifications))
+    return [convert.notification_orm_2_response(orm_notification, users) for orm_notification in orm_notifications]
 
 
 @router.get("/api/getNotificationsByPage", description="分页获取所有通知", response_model=Response[Page[NotificationResponse]])
@@ -50,9 +51,12 @@ def get_recent_unread_notifications(
 def get_notifications_by_page(
     search: NotificationSearch = Depends(), ctx: HumanSubjectContext = Depends()
 ) -> Page[NotificationResponse]:
-    total, orm_notifications = crud.search_notifications(ctx.db, search, ctx.user_id)
-    notification_responses = convert.map_list(convert.notification_orm_2_response, orm_notifications)
-    return Page(total=total, items=notification_responses)
+    total, orm_notifications, next_cursor = crud.search_notifications(ctx.db, search, ctx.user_id)
+    users = ctx.memo.load_users(ctx.db, (orm_notification.creator for orm_notification in orm_notifications))
+    notification_responses = [
+        convert.notification_orm_2_response(orm_notification, users) for orm_notification in orm_notifications
+    ]
+    return Page(total=total, items=notification_responses, next_cursor=next_cursor)
 
 
 @router.post("/api/markNotificationsAsRead", description="批量将通知标记为已读", response_model=Response[list[int]])
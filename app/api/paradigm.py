@@ -62,7 +62,8 @@ def get_paradigm_info(
     orm_paradigm = crud.get_paradigm_by_id(ctx.db, paradigm_id)
     if orm_paradigm is None:
         raise ServiceError.not_found(Entity.paradigm)
-    paradigm_response = convert.paradigm_orm_2_response(orm_paradigm)
+    users = ctx.memo.load_users(ctx.db, [orm_paradigm.creator])
+    paradigm_response = convert.paradigm_orm_2_response(orm_paradigm, users)
     return paradigm_response
 
 
@@ -74,7 +75,8 @@ def get_paradigms_by_page(
     ctx: HumanSubjectContext = Depends(),
 ) -> list[ParadigmResponse]:
     orm_paradigms = crud.search_paradigms(ctx.db, experiment_id, page_param)
-    paradigm_responses = convert.map_list(convert.paradigm_orm_2_response, orm_paradigms)
+    users = ctx.memo.load_users(ctx.db, (orm_paradigm.creator for orm_paradigm in orm_paradigms))
+    paradigm_responses = [convert.paradigm_orm_2_response(orm_paradigm, users) for orm_paradigm in orm_paradigms]
     return paradigm_responses
 
 
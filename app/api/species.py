@@ -26,6 +26,7 @@ def create_species(request: CreateSpeciesRequest, ctx: ResearcherContext = Depen
     return species_id
 
 
+@router.get("/api/getSpeciesInfo", description="获取物种名称详情", response_model=Response[SpeciesInfo])
 @router.post("/api/getSpeciesInfo", description="获取物种名称详情", response_model=Response[SpeciesInfo])
 @wrap_api_response
 def get_species_info(species_id: int, ctx: HumanSubjectContext = Depends()) -> SpeciesInfo:
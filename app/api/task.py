@@ -114,16 +114,18 @@ def get_task_info(task_id: int = Query(ge=0), ctx: HumanSubjectContext = Depends
     if orm_task is None:
         raise ServiceError.not_found(Entity.task)
 
-    task_info = convert.task_orm_2_info(orm_task)
+    users = ctx.memo.load_users(ctx.db, [orm_task.creator])
+    task_info = convert.task_orm_2_info(orm_task, users)
     return task_info
 
 
 @router.get("/api/getTasksByPage", description="分页查找任务", response_model=Response[Page[TaskBaseInfo]])
 @wrap_api_response
 def get_tasks_by_page(search: TaskSearch = Depends(), ctx: HumanSubjectContext = Depends()) -> Page[TaskBaseInfo]:
-    total, orm_tasks = crud.search_task(ctx.db, search)
-    task_base_infos = convert.map_list(convert.task_orm_2_base_info, orm_tasks)
-    return Page(total=total, items=task_base_infos)
+    total, orm_tasks, next_cursor = crud.search_task(ctx.db, search)
+    users = ctx.memo.load_users(ctx.db, (orm_task.creator for orm_task in orm_tasks))
+    task_base_infos = [convert.task_orm_2_base_info(orm_task, users) for orm_task in orm_tasks]
+    return Page(total=total, items=task_base_infos, next_cursor=next_cursor)
 
 
 @router.get("/api/getTaskStepsInfo", description="获取任务步骤详情", response_model=Response[list[TaskStepInfo]])
@@ -96,3 +96,4 @@ def delete_user(request: DeleteModelRequest, ctx: AdministratorContext = Depends
     success = common_crud.update_row_as_deleted(ctx.db, User, id_=request.id, commit=True)
     if not success:
         raise ServiceError.database_fail()
+    cache.invalidate_user_access_level(ctx.cache, request.id)
@@ -1,18 +1,21 @@
+import functools
+
 from fastapi import Depends
 from redis import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.common.config import config
 from app.common.exception import ServiceError
-from app.common.user_auth import AccessLevel, oauth2_scheme, verify_current_user
-from app.db import get_db_session
+from app.common.user_auth import AccessLevel, async_verify_current_user, oauth2_scheme, verify_current_user
+from app.db import get_async_db_session, get_db_session
 from app.db.cache import get_redis
+from app.db.memo import RequestMemo, get_request_memo
 
 
 class Context:
     def __init__(self, db: Session, token: str | None, api_access_level: int | None):
         self.db: Session = db
-        self.cache: Redis = get_redis()
         if not config.ENABLE_AUTH:
             self.user_id = 1
         elif token is None and api_access_level is None:
@@ -22,6 +25,15 @@ class Context:
         else:
             self.user_id: int | None = verify_current_user(db, self.cache, token, api_access_level)
 
+    @functools.cached_property
+    def cache(self) -> Redis:
+        # 不访问缓存的请求不获取Redis连接
+        return get_redis()
+
+    @functools.cached_property
+    def memo(self) -> RequestMemo:
+        return get_request_memo(self.db)
+
 
 class NotLogonContext(Context):
     def __init__(self, db: Session = Depends(get_db_session)):
@@ -46,3 +58,66 @@ class ResearcherContext(Context):
 class AdministratorContext(Context):
     def __init__(self, db: Session = Depends(get_db_session), token: str = Depends(oauth2_scheme)):
         super().__init__(db, token, AccessLevel.ADMINISTRATOR)
+
+
+class AsyncContext(Context):
+    """用于async接口，鉴权和接口中都通过async_db访问数据库，没有同步的db"""
+
+    def __init__(self, async_db: AsyncSession, user_id: int | None):
+        self.async_db: AsyncSession = async_db
+        self.user_id: int | None = user_id
+
+    @functools.cached_property
+    def memo(self) -> RequestMemo:
+        return get_request_memo(self.async_db.sync_session)
+
+
+def async_current_user(api_access_level: int):
+    """async接口的鉴权依赖，与async_db使用同一个会话"""
+
+    async def get_current_user_id(
+        async_db: AsyncSession = Depends(get_async_db_session), token: str | None = Depends(oauth2_scheme)
+    ) -> int:
+        if not config.ENABLE_AUTH:
+            return 1
+        if token is None:
+            raise ServiceError.not_login()
+        return await async_verify_current_user(async_db, get_redis(), token, api_access_level)
+
+    return get_current_user_id
+
+
+class AsyncAllUserContext(AsyncContext):
+    def __init__(
+        self,
+        async_db: AsyncSession = Depends(get_async_db_session),
+        user_id: int = Depends(async_current_user(AccessLevel.MINIMUM)),
+    ):
+        super().__init__(async_db, user_id)
+
+
+class AsyncHumanSubjectContext(AsyncContext):
+    def __init__(
+        self,
+        async_db: AsyncSession = Depends(get_async_db_session),
+        user_id: int = Depends(async_current_user(AccessLevel.HUMAN_SUBJECT)),
+    ):
+        super().__init__(async_db, user_id)
+
+
+class AsyncResearcherContext(AsyncContext):
+    def __init__(
+        self,
+        async_db: AsyncSession = Depends(get_async_db_session),
+        user_id: int = Depends(async_current_user(AccessLevel.RESEARCHER)),
+    ):
+        super().__init__(async_db, user_id)
+
+
+class AsyncAdministratorContext(AsyncContext):
+    def __init__(
+        self,
+        async_db: AsyncSession = Depends(get_async_db_session),
+        user_id: int = Depends(async_current_user(AccessLevel.ADMINISTRATOR)),
+    ):
+        super().__init__(async_db, user_id)
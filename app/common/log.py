@@ -1,7 +1,7 @@
 import sys
 from contextvars import ContextVar
 from datetime import datetime
-from logging import ERROR, INFO, Formatter, Handler, Logger, LogRecord, StreamHandler, getLogger
+from logging import ERROR, INFO, WARNING, Formatter, Handler, Logger, LogRecord, StreamHandler, getLogger
 from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 from queue import Queue
@@ -13,7 +13,8 @@ from app.common.util import CURRENT_TIMEZONE, get_module_name
 ACCESS_LOGGER_NAME = "access"
 UVICORN_LOGGER_NAME = "uvicorn.access"
 SQLALCHEMY_LOGGER_NAME = "sqlalchemy.engine.Engine"
-LOGGER_NAMES = {ACCESS_LOGGER_NAME, UVICORN_LOGGER_NAME, SQLALCHEMY_LOGGER_NAME}
+SLOW_QUERY_LOGGER_NAME = "slow_query"
+LOGGER_NAMES = {ACCESS_LOGGER_NAME, UVICORN_LOGGER_NAME, SQLALCHEMY_LOGGER_NAME, SLOW_QUERY_LOGGER_NAME}
 
 DEFAULT_LOG_FORMAT = "%(asctime)s|%(levelname)s|%(request_id)s|%(module_name)s:%(lineno)d|%(message)s"
 if config.DEBUG_MODE:
@@ -76,11 +77,14 @@ uvicorn_handler = init_handler(config.LOG_ROOT / "uvicorn.log", name_logger_filt
 sqlalchemy_handler = init_handler(
     config.LOG_ROOT / "sqlalchemy.log", name_logger_filter(SQLALCHEMY_LOGGER_NAME), level=INFO
 )
+slow_query_handler = init_handler(
+    config.LOG_ROOT / "slow_query.log", name_logger_filter(SLOW_QUERY_LOGGER_NAME), log_format=ACCESS_LOG_FORMAT
+)
 
 log_queue = Queue()
 log_queue_handler = CustomFormatQueueHandler(log_queue)
 log_queue_listener = QueueListener(log_queue, respect_handler_level=True)
-handlers = [root_handler, access_handler, error_handler, uvicorn_handler, sqlalchemy_handler]
+handlers = [root_handler, access_handler, error_handler, uvicorn_handler, sqlalchemy_handler, slow_query_handler]
 if config.DEBUG_MODE:
     stdout_handler = StreamHandler(sys.stdout)
     stdout_handler.setFormatter(Formatter(fmt=DEFAULT_LOG_FORMAT))
@@ -99,4 +103,6 @@ def init_logger(name: str | None, level: int = INFO) -> Logger:
 root_logger = init_logger(None)
 access_logger = init_logger(ACCESS_LOGGER_NAME)
 uvicorn_logger = init_logger(UVICORN_LOGGER_NAME)
-sqlalchemy_logger = init_logger(SQLALCHEMY_LOGGER_NAME, level=INFO)
+# SQLAlchemy在日志级别为INFO时会输出所有SQL，只有DATABASE_CONFIG中开启echo时才输出
+sqlalchemy_logger = init_logger(SQLALCHEMY_LOGGER_NAME, level=WARNING)
+slow_query_logger = init_logger(SLOW_QUERY_LOGGER_NAME)
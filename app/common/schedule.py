@@ -1,18 +1,169 @@
 import asyncio
 import functools
 import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime
 from typing import Awaitable, Callable
 
+from redis import Redis, RedisError
+
+from app.common.config import config
+from app.common.util import now
+from app.db.cache import get_redis
+
 Fn = Callable[[], None]
 AsyncFn = Callable[[], Awaitable[None]]
 
 logger = logging.getLogger(__name__)
 
+# 获取或续约租约，只有租约为空或属于自己时才能成功
+ACQUIRE_LEASE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current == false or current == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+LEADER_KEY = "schedule:leader"
+JOB_LAST_RUN_KEY_FORMAT = "schedule:job:{}:last_run"
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    """
+    多个worker中只有持有租约的leader执行leader_only任务，由独立的循环每隔租约时长的1/3续约
+    本地按发起续约的时间计算租约到期时间，续约失败或Redis不可用时到期后自动放弃leader身份
+    """
+
+    def __init__(
+        self, key: str, worker_id: str, lease_seconds: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.key = key
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self.expire_at = 0.0
+        self.renew_task: asyncio.Task | None = None
+        # 第一次续约完成后leader_only任务才开始执行，避免启动时都因为没有租约而跳过
+        self.first_renewed = asyncio.Event()
+
+    @property
+    def is_leader(self) -> bool:
+        return self.clock() < self.expire_at
+
+    def renew(self, cache: Redis) -> bool:
+        start_time = self.clock()
+        lease_ms = int(self.lease_seconds * 1000)
+        if cache.eval(ACQUIRE_LEASE_SCRIPT, 1, self.key, self.worker_id, lease_ms):
+            self.expire_at = start_time + self.lease_seconds
+            return True
+        self.expire_at = 0.0
+        return False
+
+    def start_renewing(self) -> None:
+        if self.renew_task is None:
+            self.renew_task = asyncio.create_task(self.keep_renewing())
+
+    async def keep_renewing(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.renew, get_redis())
+            except RedisError as e:
+                logger.error(f"renew schedule leader lease error, msg={e}")
+            self.first_renewed.set()
+            await asyncio.sleep(self.lease_seconds / 3)
+
+
+leader_lease = LeaderLease(LEADER_KEY, WORKER_ID, config.SCHEDULE_LEADER_LEASE_SECONDS)
+
+
+def try_claim_job_run(cache: Redis, name: str, interval_in_seconds: float, worker_id: str = WORKER_ID) -> bool:
+    """
+    每个执行间隔只能认领一次，执行后不删除，键在一个间隔后过期
+    leader切换时新旧leader都可能认为自己是leader，同一个间隔内只有一个能执行
+    """
+    key = JOB_LAST_RUN_KEY_FORMAT.format(name)
+    return bool(cache.set(key, worker_id, px=int(interval_in_seconds * 1000), nx=True))
+
+
+class JobStats:
+    def __init__(self, name: str, interval_in_seconds: float, leader_only: bool) -> None:
+        self.name = name
+        self.interval_in_seconds = interval_in_seconds
+        self.leader_only = leader_only
+        self.runs = 0
+        self.failures = 0
+        self.skips = 0
+        self.running = False
+        self.last_duration_ms: float | None = None
+        self.last_success_at: datetime | None = None
+        self.last_error: str | None = None
+
+
+scheduled_jobs: dict[str, JobStats] = {}
+
+
+def repeat_task(
+    interval_in_seconds: float,
+    max_repetitions: int | None = None,
+    *,
+    leader_only: bool = False,
+    jitter_seconds: float = 0.0,
+) -> Callable[[Fn | AsyncFn], AsyncFn]:
+    """
+    周期执行任务，上一次执行结束后才开始计时，同一个worker内不会重叠执行
+    leader_only为True时整个集群只有leader执行，每个间隔最多执行一次
+    jitter_seconds为每次间隔额外增加的随机时长，避免多个任务同时执行
+    """
 
-def repeat_task(interval_in_seconds: float, max_repetitions: int | None = None) -> Callable[[Fn | AsyncFn], AsyncFn]:
     def decorator(func: Fn | AsyncFn) -> AsyncFn:
         is_async_fn = asyncio.iscoroutinefunction(func)
         first_run = True
+        name = f"{func.__module__}.{func.__qualname__}"
+        stats = scheduled_jobs[name] = JobStats(name, interval_in_seconds, leader_only)
+
+        async def run_func() -> None:
+            if is_async_fn:
+                await func()
+            else:
+                await asyncio.to_thread(func)
+
+        async def run_once() -> bool:
+            if leader_only:
+                try:
+                    claimed = leader_lease.is_leader and await asyncio.to_thread(
+                        try_claim_job_run, get_redis(), name, interval_in_seconds
+                    )
+                except RedisError as e:
+                    logger.error(f"claim schedule job error, job={name}, msg={e}")
+                    claimed = False
+                if not claimed:
+                    stats.skips += 1
+                    return False
+
+            stats.running = True
+            start_time = time.perf_counter()
+            success = False
+            try:
+                await run_func()
+                success = True
+                stats.last_success_at = now()
+                stats.last_error = None
+            except Exception as e:
+                stats.failures += 1
+                stats.last_error = str(e)
+                logger.error(f"repeat task raise error, job={name}, msg={e}")
+            finally:
+                stats.runs += 1
+                stats.running = False
+                stats.last_duration_ms = (time.perf_counter() - start_time) * 1000
+            return success
 
         @functools.wraps(func)
         async def wrapper() -> None:
@@ -21,19 +172,17 @@ def repeat_task(interval_in_seconds: float, max_repetitions: int | None = None)
                 return
             first_run = False
             repetitions = 0
+            if leader_only:
+                leader_lease.start_renewing()
 
             async def loop() -> None:
                 nonlocal repetitions
+                if leader_only:
+                    await leader_lease.first_renewed.wait()
                 while max_repetitions is None or repetitions < max_repetitions:
-                    try:
-                        if is_async_fn:
-                            await func()
-                        else:
-                            await asyncio.to_thread(func)
+                    if await run_once():
                         repetitions += 1
-                    except Exception as e:
-                        logger.error(f"repeat task raise error: {e}")
-                    await asyncio.sleep(interval_in_seconds)
+                    await asyncio.sleep(interval_in_seconds + random.uniform(0, jitter_seconds))
 
             asyncio.create_task(loop())
 
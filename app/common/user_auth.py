@@ -1,4 +1,7 @@
+import contextlib
+import hashlib
 import logging
+import time
 from datetime import timedelta
 from enum import IntEnum
 from typing import NoReturn
@@ -7,12 +10,14 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import ExpiredSignatureError, JWTError, jwt
 from passlib.context import CryptContext
 from redis import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 import app.db.crud.user as crud_user
+from app.common.config import config
 from app.common.exception import ServiceError
-from app.common.util import utc_now
-from app.db.cache import get_user_access_level
+from app.common.util import TTLCache, utc_now
+from app.db.cache import async_get_user_access_level, get_user_access_level
 from app.model.response import AccessTokenData
 
 logger = logging.getLogger(__name__)
@@ -24,6 +29,11 @@ ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login", auto_error=False)
 
+# 已验证签名的token，键为token的摘要，值为(user_id, exp)
+decoded_token_cache: TTLCache[str, tuple[int, int]] = TTLCache(
+    config.DECODED_TOKEN_CACHE_SIZE, config.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
 
 class AccessLevel(IntEnum):
     MINIMUM = 0
@@ -50,20 +60,34 @@ def raise_unauthorized_exception(**data) -> NoReturn:
 
 
 def verify_current_user(db: Session, cache: Redis, token: str, api_access_level: int) -> int:
-    try:
-        # 从token中解码AccessTokenData
-        payload_dict = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        token_data = AccessTokenData(**payload_dict)
-        user_id = int(token_data.sub)
-
+    with handle_token_error(token):
+        user_id = decode_access_token(token)
         # 验证用户是否存在，权限是否够
-        user_access_level = get_user_access_level(db, cache, user_id)
-        if user_access_level is None:
-            raise_unauthorized_exception(user_id={user_id})
-        if user_access_level < api_access_level:
-            logger.error(f"unauthorized api invocation, {user_id=}")
-            raise ServiceError.no_enough_access_level()
+        check_user_access_level(user_id, get_user_access_level(db, cache, user_id), api_access_level)
         return user_id
+
+
+async def async_verify_current_user(async_db: AsyncSession, cache: Redis, token: str, api_access_level: int) -> int:
+    """async接口使用，通过async_db查询用户权限"""
+    with handle_token_error(token):
+        user_id = decode_access_token(token)
+        user_access_level = await async_get_user_access_level(async_db, cache, user_id)
+        check_user_access_level(user_id, user_access_level, api_access_level)
+        return user_id
+
+
+def check_user_access_level(user_id: int, user_access_level: int | None, api_access_level: int) -> None:
+    if user_access_level is None:
+        raise_unauthorized_exception(user_id={user_id})
+    if user_access_level < api_access_level:
+        logger.error(f"unauthorized api invocation, {user_id=}")
+        raise ServiceError.no_enough_access_level()
+
+
+@contextlib.contextmanager
+def handle_token_error(token: str):
+    try:
+        yield
     except ExpiredSignatureError as e:
         # token过期
         token_payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_signature": False})
@@ -74,6 +98,21 @@ def verify_current_user(db: Session, cache: Redis, token: str, api_access_level:
         raise_unauthorized_exception(token=token)
 
 
+def decode_access_token(token: str) -> int:
+    token_digest = hashlib.sha256(token.encode("UTF-8")).hexdigest()
+    cached = decoded_token_cache.get(token_digest)
+    # 与jose的过期判断一致，exp早于当前时间时过期，过期后重新解码以抛出同样的ExpiredSignatureError
+    if cached is not None and cached[1] >= int(time.time()):
+        return cached[0]
+
+    # 从token中解码AccessTokenData
+    payload_dict = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    token_data = AccessTokenData(**payload_dict)
+    user_id = int(token_data.sub)
+    decoded_token_cache.set(token_digest, (user_id, int(token_data.exp.timestamp())))
+    return user_id
+
+
 def verify_password(db: Session, staff_id: str, password: str) -> int | None:
     user_auth = crud_user.get_user_auth_by_staff_id(db, staff_id)
     if user_auth is not None and crypt_context.verify(password, user_auth.hashed_password):
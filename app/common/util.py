@@ -3,9 +3,10 @@ import socket
 import sys
 import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timezone, tzinfo
 from pathlib import Path
-from typing import TypeVar
+from typing import Any, Generic, Hashable, TypeVar
 
 from dateutil import tz
 from pydantic import BaseModel
@@ -15,6 +16,7 @@ from app.common.config import config
 Model = TypeVar("Model", bound=BaseModel)
 AnotherModel = TypeVar("AnotherModel", bound=BaseModel)
 T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
 
 CURRENT_TIMEZONE: tzinfo = tz.gettz(config.TIMEZONE)
 
@@ -97,3 +99,42 @@ def generate_request_id() -> str:
     serial_num = request_id_counter.get_value() & 0xFFF
     request_id = (timestamp << 22) + (machine_id << 12) + serial_num
     return f"{request_id:x}"
+
+
+class TTLCache(Generic[K, T]):
+    """进程内带失效时间的LRU缓存，线程安全"""
+
+    def __init__(self, max_size: int, expire_seconds: float) -> None:
+        self.max_size = max_size
+        self.expire_seconds = expire_seconds
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[K, tuple[float, T]] = OrderedDict()
+
+    def get(self, key: K) -> T | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expire_at, value = entry
+            if expire_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: T) -> None:
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.expire_seconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def pop(self, key: Any) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
@@ -1,24 +1,153 @@
 import contextlib
+import functools
+import itertools
 from reprlib import recursive_repr
-from typing import TypeVar
+from typing import Callable, ParamSpec, TypeVar
 
 import sqlalchemy.orm
+from sqlalchemy import Delete, Engine, Insert, Update
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 import alembic.config
 import alembic.migration
 import alembic.script
 from app.common.config import config
+from app.common.exception import ServiceError
+from app.db.pool_stats import InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, instrument_engine
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = sqlalchemy.create_engine(config.DATABASE_URL, **config.DATABASE_CONFIG)
-SessionLocal = sqlalchemy.orm.sessionmaker(bind=engine)
+def get_async_url(url: str) -> URL:
+    # 异步引擎与同步引擎连接同一个数据库，只替换驱动
+    return make_url(url).set(drivername=config.ASYNC_DATABASE_DRIVER)
+
+
+def create_db_engine(name: str, url: str) -> Engine:
+    engine_config = {"poolclass": InstrumentedQueuePool, **config.DATABASE_CONFIG}
+    return instrument_engine(name, sqlalchemy.create_engine(url, **engine_config))
+
+
+def create_async_db_engine(name: str, url: str) -> AsyncEngine:
+    engine_config = {"poolclass": InstrumentedAsyncAdaptedQueuePool, **config.DATABASE_CONFIG}
+    new_async_engine = create_async_engine(get_async_url(url), **engine_config)
+    instrument_engine(name, new_async_engine.sync_engine)
+    return new_async_engine
+
+
+engine = create_db_engine("primary", config.DATABASE_URL)
+replica_engines = [create_db_engine(f"replica-{index}", url) for index, url in enumerate(config.DATABASE_REPLICA_URLS)]
+async_engine = create_async_db_engine("async-primary", config.DATABASE_URL)
+async_replica_engines = [
+    create_async_db_engine(f"async-replica-{index}", url) for index, url in enumerate(config.DATABASE_REPLICA_URLS)
+]
+
+USE_REPLICA_KEY = "use_replica"
+PIN_PRIMARY_KEY = "pin_primary"
+REPLICA_ENGINE_KEY = "replica_engine"
+UNIT_OF_WORK_KEY = "unit_of_work"
+UNIT_OF_WORK_FAILED_KEY = "unit_of_work_failed"
+_replica_counter = itertools.count()
+
+
+def choose_replica(engines: list[Engine]) -> Engine:
+    if config.DATABASE_REPLICA_BALANCE == "least_connections":
+        return min(engines, key=lambda replica: replica.pool.checkedout())
+    return engines[next(_replica_counter) % len(engines)]
+
+
+class RoutingSession(sqlalchemy.orm.Session):
+    """读写分离，只有显式声明为只读的查询发往从库，会话中出现写操作后所有语句都发往主库"""
+
+    primary_engine: Engine = engine
+    replica_engines: list[Engine] = replica_engines
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info[PIN_PRIMARY_KEY] = True
+            return self.primary_engine
+        if self.replica_engines and self.info.get(USE_REPLICA_KEY) and not self.info.get(PIN_PRIMARY_KEY):
+            # 同一个会话固定使用一个从库，避免不同从库同步进度不同导致前后读到的数据不一致
+            replica = self.info.get(REPLICA_ENGINE_KEY)
+            if replica is None:
+                replica = self.info[REPLICA_ENGINE_KEY] = choose_replica(self.replica_engines)
+            return replica
+        return self.primary_engine
+
+    def commit(self) -> None:
+        if self.info.get(UNIT_OF_WORK_KEY):
+            # 工作单元内的提交推迟到工作单元结束，只将修改发送到数据库
+            self.flush()
+            return
+        super().commit()
+
+
+class AsyncRoutingSession(RoutingSession):
+    primary_engine = async_engine.sync_engine
+    replica_engines = [async_replica_engine.sync_engine for async_replica_engine in async_replica_engines]
+
+
+SessionLocal = sqlalchemy.orm.sessionmaker(class_=RoutingSession)
+AsyncSessionLocal = async_sessionmaker(sync_session_class=AsyncRoutingSession, expire_on_commit=False)
 
 OrmModel = TypeVar("OrmModel", bound=Base)
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@contextlib.contextmanager
+def use_replica(db: sqlalchemy.orm.Session):
+    previous = db.info.get(USE_REPLICA_KEY, False)
+    db.info[USE_REPLICA_KEY] = True
+    try:
+        yield
+    finally:
+        db.info[USE_REPLICA_KEY] = previous
+
+
+@contextlib.contextmanager
+def unit_of_work(db: sqlalchemy.orm.Session):
+    """代码块中的写操作合并为一个事务，正常结束时提交一次，出现异常时回滚，嵌套时并入外层工作单元"""
+    if db.info.get(UNIT_OF_WORK_KEY):
+        yield
+        return
+    db.info[UNIT_OF_WORK_KEY] = True
+    db.info[UNIT_OF_WORK_FAILED_KEY] = False
+    try:
+        yield
+    except BaseException:
+        db.info[UNIT_OF_WORK_KEY] = False
+        db.rollback()
+        raise
+    db.info[UNIT_OF_WORK_KEY] = False
+    if db.info.pop(UNIT_OF_WORK_FAILED_KEY):
+        # 工作单元内有写操作失败，已执行的修改不完整，不能提交
+        db.rollback()
+        raise ServiceError.database_fail()
+    db.commit()
+
+
+def rollback_failed_write(db: sqlalchemy.orm.Session) -> None:
+    """写操作失败时回滚，工作单元内回滚会丢弃之前的语句，改为标记工作单元失败，结束时回滚"""
+    if db.info.get(UNIT_OF_WORK_KEY):
+        db.info[UNIT_OF_WORK_FAILED_KEY] = True
+    else:
+        db.rollback()
+
+
+def read_from_replica(func: Callable[P, R]) -> Callable[P, R]:
+    """被装饰函数的第一个参数为Session，函数中执行的查询在没有写操作时发往从库"""
+
+    @functools.wraps(func)
+    def wrapper(db: sqlalchemy.orm.Session, *args, **kwargs):
+        with use_replica(db):
+            return func(db, *args, **kwargs)
+
+    return wrapper
 
 
 def get_db_session():
@@ -32,6 +161,14 @@ def get_db_session():
 new_db_session = contextlib.contextmanager(get_db_session)
 
 
+async def get_async_db_session():
+    async with AsyncSessionLocal() as db_session:
+        yield db_session
+
+
+new_async_db_session = contextlib.asynccontextmanager(get_async_db_session)
+
+
 def check_database_is_up_to_date() -> bool:
     alembic_config_file = "alembic.ini"
     alembic_config = alembic.config.Config(alembic_config_file)
@@ -1,38 +1,223 @@
+import functools
 import logging
+import threading
+import uuid
 
-from redis import Redis
+from redis import BlockingConnectionPool, Redis, RedisError
+from redis.commands.core import Script
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 import app.db.crud.user as crud_user
 from app.common.config import config
+from app.common.util import TTLCache
 
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def get_redis_pool() -> BlockingConnectionPool:
+    """进程内共享的连接池，第一次使用时创建，安装hiredis后自动使用hiredis解析响应"""
+    return BlockingConnectionPool(
+        host=config.CACHE_HOST,
+        port=config.CACHE_PORT,
+        decode_responses=True,
+        max_connections=config.CACHE_MAX_CONNECTIONS,
+        timeout=config.CACHE_POOL_TIMEOUT_SECONDS,
+        socket_timeout=config.CACHE_SOCKET_TIMEOUT_SECONDS,
+        socket_connect_timeout=config.CACHE_SOCKET_TIMEOUT_SECONDS,
+        health_check_interval=config.CACHE_HEALTH_CHECK_INTERVAL_SECONDS,
+    )
+
+
 def get_redis() -> Redis:
-    return Redis(host=config.CACHE_HOST, port=config.CACHE_PORT, decode_responses=True)
+    # Redis对象本身不持有连接，执行命令时才从连接池获取
+    return Redis(connection_pool=get_redis_pool())
 
 
 USER_ACCESS_LEVEL_FORMAT: str = "ual:{}"
+# 广播缓存失效的频道，消息内容为失效的Redis键
+CACHE_INVALIDATION_CHANNEL: str = "cache:invalidation"
+
+# 进程内缓存，键与Redis键相同
+user_access_level_local_cache: TTLCache[str, int] = TTLCache(
+    config.USER_ACCESS_LEVEL_LOCAL_CACHE_SIZE, config.USER_ACCESS_LEVEL_LOCAL_CACHE_EXPIRE_SECONDS
+)
+local_caches: list[TTLCache] = [user_access_level_local_cache]
 
 
 def get_user_access_level(db: Session, cache: Redis, user_id: int) -> int | None:
     key = USER_ACCESS_LEVEL_FORMAT.format(user_id)
-    access_level: str = cache.get(key)
+    access_level = get_cached_user_access_level(cache, key)
     if access_level is not None:
-        return int(access_level)
+        return access_level
     access_level: int | None = crud_user.get_user_access_level(db, user_id)
+    if access_level is not None:
+        set_user_access_level(cache, key, access_level)
+    return access_level
+
+
+async def async_get_user_access_level(async_db: AsyncSession, cache: Redis, user_id: int) -> int | None:
+    """async接口使用，进程内缓存未命中时在线程池中访问Redis，数据库通过async_db查询"""
+    key = USER_ACCESS_LEVEL_FORMAT.format(user_id)
+    access_level = user_access_level_local_cache.get(key)
+    if access_level is not None:
+        return access_level
+    access_level = await run_in_threadpool(get_cached_user_access_level, cache, key)
+    if access_level is not None:
+        return access_level
+    access_level: int | None = await async_db.run_sync(crud_user.get_user_access_level, user_id)
+    if access_level is not None:
+        await run_in_threadpool(set_user_access_level, cache, key, access_level)
+    return access_level
+
+
+def get_cached_user_access_level(cache: Redis, key: str) -> int | None:
+    access_level = user_access_level_local_cache.get(key)
+    if access_level is not None:
+        return access_level
+    access_level: str = cache.get(key)
     if access_level is None:
         return None
+    user_access_level_local_cache.set(key, int(access_level))
+    return int(access_level)
+
+
+def set_user_access_level(cache: Redis, key: str, access_level: int) -> None:
     result = cache.setex(key, config.CACHE_EXPIRE_SECONDS, access_level)
     log_cache(result, f"set user_access_level {{}}, {key}={access_level}")
-    return access_level
+    user_access_level_local_cache.set(key, access_level)
 
 
-def invalidate_user_access_level(cache: Redis, user_id: int) -> None:
-    key = USER_ACCESS_LEVEL_FORMAT.format(user_id)
-    result = cache.delete(key) <= 1
-    log_cache(result, f"del user_access_level {{}}, key={key}")
+def invalidate_user_access_level(cache: Redis, *user_ids: int) -> None:
+    keys = [USER_ACCESS_LEVEL_FORMAT.format(user_id) for user_id in user_ids]
+    if not keys:
+        return
+    result = cache.delete(*keys) <= len(keys)
+    log_cache(result, f"del user_access_level {{}}, {keys=}")
+    broadcast_invalidation(cache, *keys)
+
+
+def broadcast_invalidation(cache: Redis, *keys: str) -> None:
+    """通知所有worker删除进程内缓存，包括当前worker"""
+    evict_local_caches(*keys)
+    for key in keys:
+        cache.publish(CACHE_INVALIDATION_CHANNEL, key)
+
+
+def evict_local_caches(*keys: str) -> None:
+    for local_cache in local_caches:
+        for key in keys:
+            local_cache.pop(key)
+
+
+def clear_local_caches() -> None:
+    for local_cache in local_caches:
+        local_cache.clear()
+
+
+class CacheInvalidationListener:
+    """后台线程订阅缓存失效消息，断开重连后清空进程内缓存，避免使用断开期间已失效的数据"""
+
+    def __init__(self) -> None:
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if all(local_cache.max_size <= 0 for local_cache in local_caches) or self.thread is not None:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="cache-invalidation-listener", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                clear_local_caches()
+                while not self.stop_event.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        evict_local_caches(message["data"])
+            except RedisError as e:
+                logger.error(f"cache invalidation listener error, msg={e}")
+                clear_local_caches()
+                self.stop_event.wait(config.CACHE_SOCKET_TIMEOUT_SECONDS)
+            finally:
+                pubsub.close()
+
+
+cache_invalidation_listener = CacheInvalidationListener()
+
+
+ATLAS_VERSION_FORMAT: str = "atlas:version:{}"
+ATLAS_TREE_FORMAT: str = "atlas:tree:{}:{}:"
+# 一次往返读取脑图谱当前版本和该版本的树，缓存键由版本拼接而成，无法全部声明在KEYS中，不支持Redis集群
+# 版本不存在（首次访问、Redis清空或键被淘汰）时写入调用方生成的新版本，不会与清空前的版本重复
+GET_VERSIONED_VALUE_SCRIPT: str = """
+local version = redis.call('GET', KEYS[1])
+if not version then
+    version = ARGV[2]
+    redis.call('SET', KEYS[1], version)
+end
+return {version, redis.call('GET', ARGV[1] .. version)}
+"""
+
+
+@functools.cache
+def get_versioned_value_script() -> Script:
+    return get_redis().register_script(GET_VERSIONED_VALUE_SCRIPT)
+
+
+def new_atlas_version() -> str:
+    return uuid.uuid4().hex
+
+
+def get_atlas_tree(cache: Redis, tree_type: str, atlas_id: int) -> tuple[str | None, str | None]:
+    """返回脑图谱的当前版本和该版本缓存的树JSON，未缓存时树为None，Redis不可用时版本也为None"""
+    version_key = ATLAS_VERSION_FORMAT.format(atlas_id)
+    tree_key_prefix = ATLAS_TREE_FORMAT.format(tree_type, atlas_id)
+    try:
+        version, tree_json = get_versioned_value_script()(
+            keys=[version_key], args=[tree_key_prefix, new_atlas_version()], client=cache
+        )
+    except RedisError as e:
+        logger.error(f"get atlas tree error, {tree_key_prefix=}, msg={e}")
+        return None, None
+    return version, tree_json
+
+
+def set_atlas_tree(cache: Redis, tree_type: str, atlas_id: int, version: str | None, tree_json: str) -> None:
+    # 读取时Redis不可用，没有版本可以写入
+    if version is None:
+        return
+    # 构建期间脑图谱被修改时版本已改变，按构建前读到的版本写入，旧版本的缓存不会再被读取
+    key = ATLAS_TREE_FORMAT.format(tree_type, atlas_id) + version
+    try:
+        result = cache.setex(key, config.CACHE_EXPIRE_SECONDS, tree_json)
+    except RedisError as e:
+        logger.error(f"set atlas tree error, {key=}, msg={e}")
+        return
+    log_cache(result, f"set atlas tree {{}}, key={key}")
+
+
+def bump_atlas_version(cache: Redis, atlas_id: int) -> None:
+    # 每次修改生成新的随机版本，而不是递增计数，计数在Redis清空后会从0重新开始，与旧的版本和ETag重复
+    key = ATLAS_VERSION_FORMAT.format(atlas_id)
+    try:
+        cache.set(key, new_atlas_version())
+    except RedisError as e:
+        # 修改已经提交，不能因缓存失败返回错误，缓存的树等待过期
+        logger.error(f"bump atlas version error, {key=}, msg={e}")
 
 
 def log_cache(is_success: bool, template: str) -> None:
@@ -1,16 +1,19 @@
+import itertools
 import logging
-from typing import Any, cast
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Sequence, TypeAlias, cast
 
-from sqlalchemy import delete, insert, select, text, update
+from sqlalchemy import Executable, delete, insert, select, text, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.engine import CursorResult
 from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.roles import WhereHavingRole
 
+from app.common.config import config
 from app.common.exception import ServiceError
 from app.common.localization import Entity
 from app.common.util import now
-from app.db import OrmModel
+from app.db import OrmModel, entity_cache, read_from_replica, rollback_failed_write
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +21,18 @@ logger = logging.getLogger(__name__)
 def get_row_by_id(
     db: Session, table: type[OrmModel], id_: int, *, raise_on_fail: bool = False, not_found_entity: Entity | None = None
 ) -> OrmModel | None:
-    return get_row(db, table, table.id == id_, raise_on_fail=raise_on_fail, not_found_entity=not_found_entity)
+    if not entity_cache.is_entity_cached(table):
+        return get_row(db, table, table.id == id_, raise_on_fail=raise_on_fail, not_found_entity=not_found_entity)
 
+    row = entity_cache.get_cached_row(db, table, id_)
+    if row is None:
+        row = get_row(db, table, table.id == id_, raise_on_fail=raise_on_fail, not_found_entity=not_found_entity)
+        if row is not None:
+            entity_cache.cache_row(db, table, row)
+    return row
 
+
+@read_from_replica
 def get_row(
     db: Session,
     table: type[OrmModel],
@@ -42,6 +54,7 @@ def get_row(
         return row
 
 
+@read_from_replica
 def exists_row(
     db: Session,
     table: type[OrmModel],
@@ -50,6 +63,8 @@ def exists_row(
     where: list[WhereHavingRole] | None = None,
     include_deleted: bool = False,
 ) -> bool:
+    if id_ is not None and not include_deleted and entity_cache.is_entity_cached(table):
+        return get_row_by_id(db, table, id_) is not None
     if id_ is not None:
         where = [table.id == id_]
     if where is None:
@@ -86,7 +101,7 @@ def insert_row(
             return None
         finally:
             if not success:
-                db.rollback()
+                rollback_failed_write(db)
             elif commit:
                 db.commit()
 
@@ -96,22 +111,97 @@ def insert_row(
     return result_id
 
 
-def bulk_insert_rows(db: Session, table: type[OrmModel], rows: list[dict[str, Any]], *, commit: bool) -> bool:
-    if not rows:
+class ChunkResult(NamedTuple):
+    # 批次序号，从0开始
+    index: int
+    # 批次中的行数
+    row_count: int
+    # 数据库返回的影响行数
+    affected_rows: int
+
+
+ChunkCallback: TypeAlias = Callable[[ChunkResult], None]
+
+
+def iter_chunks(rows: Iterable[dict[str, Any]], chunk_size: int) -> Iterator[list[dict[str, Any]]]:
+    row_iter = iter(rows)
+    while chunk := list(itertools.islice(row_iter, chunk_size)):
+        yield chunk
+
+
+def bulk_insert_rows(
+    db: Session,
+    table: type[OrmModel],
+    rows: Iterable[dict[str, Any]],
+    *,
+    commit: bool,
+    chunk_size: int = config.BULK_WRITE_CHUNK_SIZE,
+    on_chunk: ChunkCallback | None = None,
+) -> bool:
+    """按批次executemany插入，rows可以是迭代器，所有批次在同一个事务中"""
+
+    def check_chunk(chunk_result: ChunkResult) -> bool:
+        return chunk_result.affected_rows == chunk_result.row_count
+
+    return _bulk_write_rows(db, table, insert(table), rows, check_chunk, commit, chunk_size, on_chunk)
+
+
+def bulk_upsert_rows(
+    db: Session,
+    table: type[OrmModel],
+    rows: Iterable[dict[str, Any]],
+    update_columns: Sequence[str],
+    *,
+    commit: bool,
+    chunk_size: int = config.BULK_WRITE_CHUNK_SIZE,
+    touch: bool = True,
+    on_chunk: ChunkCallback | None = None,
+) -> bool:
+    """INSERT ... ON DUPLICATE KEY UPDATE，唯一键冲突时更新update_columns中的列"""
+    stmt = mysql_insert(table)
+    update_dict = {column: stmt.inserted[column] for column in update_columns}
+    if touch:
+        update_dict["gmt_modified"] = now()
+    stmt = stmt.on_duplicate_key_update(update_dict)
+
+    # 插入的行影响行数为1，更新的行为2，未变化的行为0或1，无法校验
+    def check_chunk(_chunk_result: ChunkResult) -> bool:
         return True
 
+    return _bulk_write_rows(db, table, stmt, rows, check_chunk, commit, chunk_size, on_chunk)
+
+
+def _bulk_write_rows(
+    db: Session,
+    table: type[OrmModel],
+    stmt: Executable,
+    rows: Iterable[dict[str, Any]],
+    check_chunk: Callable[[ChunkResult], bool],
+    commit: bool,
+    chunk_size: int,
+    on_chunk: ChunkCallback | None,
+) -> bool:
     success = False
+    chunk_count = 0
     try:
-        stmt = insert(table).values(rows)
-        result = cast(CursorResult, db.execute(stmt))
-        if result.rowcount == len(rows):
-            success = True
+        for chunk in iter_chunks(rows, chunk_size):
+            # raw模式下直接执行Core语句，才能拿到executemany的影响行数
+            result = cast(CursorResult, db.execute(stmt, chunk, execution_options={"dml_strategy": "raw"}))
+            chunk_result = ChunkResult(index=chunk_count, row_count=len(chunk), affected_rows=result.rowcount)
+            chunk_count += 1
+            if on_chunk is not None:
+                on_chunk(chunk_result)
+            if not check_chunk(chunk_result):
+                logger.error(f"bulk write table {table.__name__} affected rows mismatch, {chunk_result=}")
+                return False
+        success = True
     except DBAPIError as e:
-        logger.error(f"insert table {table.__name__} error, msg={e}, values={rows}")
+        # 异常信息中包含参数，只记录数据库返回的错误
+        logger.error(f"bulk write table {table.__name__} error, {chunk_count=}, msg={e.orig}")
     finally:
         if not success:
-            db.rollback()
-        elif commit:
+            rollback_failed_write(db)
+        elif commit and chunk_count > 0:
             db.commit()
     return success
 
@@ -174,6 +264,7 @@ def bulk_update_rows(
     if touch:
         update_dict = update_dict | {"gmt_modified": now()}
     try:
+        entity_cache.invalidate_rows(db, table, where)
         stmt = update(table).where(*where).values(**update_dict)
         db.execute(stmt)
         success = True
@@ -181,7 +272,7 @@ def bulk_update_rows(
         logger.error(f"update table {table.__name__} error, msg={e}")
     finally:
         if not success:
-            db.rollback()
+            rollback_failed_write(db)
         elif commit:
             db.commit()
     if not success and raise_on_fail:
@@ -211,6 +302,7 @@ def bulk_update_rows_as_deleted(
 def bulk_delete_rows(db: Session, table: type[OrmModel], where: list[WhereHavingRole], *, commit: bool) -> bool:
     success = False
     try:
+        entity_cache.invalidate_rows(db, table, where)
         stmt = delete(table).where(*where)
         db.execute(stmt)
         success = True
@@ -218,7 +310,7 @@ def bulk_delete_rows(db: Session, table: type[OrmModel], where: list[WhereHaving
         logger.error(f"delete rows from table {table.__name__} error, msg={e}")
     finally:
         if not success:
-            db.rollback()
+            rollback_failed_write(db)
         elif commit:
             db.commit()
     return success
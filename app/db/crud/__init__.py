@@ -1,25 +1,271 @@
+import base64
+import itertools
+import json
 import logging
-from typing import Any, Sequence
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from typing import Any, Hashable, Sequence
 
-from sqlalchemy import Select, func, select, text
-from sqlalchemy.orm import Session
+from sqlalchemy import ClauseElement, ColumnElement, Executable, Select, and_, event, func, or_, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import InstrumentedAttribute, ORMExecuteState, Session
+from sqlalchemy.sql.util import find_tables
+
+from app.common.config import config
+from app.common.exception import ServiceError
+from app.db import read_from_replica
+from app.model.enum_filed import PageTotalMode
 
 logger = logging.getLogger(__name__)
 
 
+@read_from_replica
 def query_pages(
-    db: Session, base_stmt: Select, offset: int, limit: int, *, scalars: bool = True
-) -> tuple[int, Sequence[Any]]:
+    db: Session,
+    base_stmt: Select,
+    offset: int,
+    limit: int,
+    *,
+    total_mode: PageTotalMode = PageTotalMode.exact,
+    scalars: bool = True,
+) -> tuple[int | None, Sequence[Any]]:
     items_stmt = base_stmt.offset(offset).limit(limit)
-    result = db.execute(items_stmt)
-    if scalars:
-        result = result.scalars()
-    items = result.all()
-    total_stmt = base_stmt.with_only_columns(func.count())
-    total = db.execute(total_stmt).scalar()
+    # limit为0时第一页也不返回行，不能据此判断总数为0
+    return _query_page_and_total(
+        db, base_stmt, items_stmt, total_mode, is_first_page=offset == 0 and limit > 0, scalars=scalars
+    )
+
+
+@read_from_replica
+def query_cursor_pages(
+    db: Session,
+    base_stmt: Select,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    offset: int,
+    limit: int,
+    cursor: str | None,
+    *,
+    descending: bool = False,
+    total_mode: PageTotalMode = PageTotalMode.exact,
+    scalars: bool = True,
+) -> tuple[int | None, Sequence[Any], str | None]:
+    """按(sort_column, id_column)排序分页，cursor非空时使用游标分页并忽略offset，返回的next_cursor为空表示没有下一页"""
+    order_columns = [sort_column] if sort_column is id_column else [sort_column, id_column]
+    items_stmt = base_stmt.order_by(*(column.desc() if descending else column.asc() for column in order_columns))
+    if cursor is None:
+        items_stmt = items_stmt.offset(offset)
+    else:
+        cursor_values = decode_page_cursor(cursor, order_columns)
+        items_stmt = items_stmt.where(keyset_after(order_columns, cursor_values, descending=descending))
+    # 多取一行，用于判断是否还有下一页
+    items_stmt = items_stmt.limit(limit + 1)
+    total, items = _query_page_and_total(
+        db, base_stmt, items_stmt, total_mode, is_first_page=cursor is None and offset == 0, scalars=scalars
+    )
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        if items:
+            next_cursor = encode_page_cursor([getattr(items[-1], column.key) for column in order_columns])
+    return total, items, next_cursor
+
+
+def _query_page_and_total(
+    db: Session, base_stmt: Select, items_stmt: Select, total_mode: PageTotalMode, *, is_first_page: bool, scalars: bool
+) -> tuple[int | None, Sequence[Any]]:
+    total_stmt = base_stmt.with_only_columns(func.count(), maintain_column_froms=True)
+    if total_mode is not PageTotalMode.exact:
+        result = db.execute(items_stmt)
+        items = (result.scalars() if scalars else result).all()
+        total = None if total_mode is PageTotalMode.none else estimate_total(db, base_stmt, total_stmt)
+        return total, items
+
+    # 总数作为不相关子查询附加在每一行末尾，一次往返同时取回分页数据和总数
+    result = db.execute(items_stmt.add_columns(total_stmt.scalar_subquery().correlate(None)))
+    column_count = len(result.keys()) - 1
+    frozen_result = result.freeze()
+    rows = frozen_result().all()
+    page_result = frozen_result().columns(*range(column_count))
+    items = (page_result.scalars() if scalars else page_result).all()
+    if rows:
+        total = rows[0][-1]
+    elif is_first_page:
+        total = 0
+    else:
+        # 超出最后一页时没有行可以带回总数，只能单独查询
+        total = db.execute(total_stmt).scalar()
+    page_total_cache.put(total_stmt, total)
     return total, items
 
 
+def estimate_total(db: Session, base_stmt: Select, total_stmt: Select) -> int:
+    """优先使用缓存的精确总数，缓存不存在或已失效时使用优化器估计的行数"""
+    total = page_total_cache.get(total_stmt)
+    if total is not None:
+        return total
+    return explain_rows_estimate(db, base_stmt)
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Select) -> None:
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kwargs) -> str:
+    return f"EXPLAIN {compiler.process(element.statement, **kwargs)}"
+
+
+def explain_rows_estimate(db: Session, stmt: Select) -> int:
+    # 连接查询按嵌套循环估算，每张表估计扫描的行数乘以过滤比例后连乘
+    estimate = None
+    for plan in db.execute(Explain(stmt)).mappings():
+        if plan["id"] != 1 or plan["table"] is None or plan["rows"] is None:
+            continue
+        table_rows = plan["rows"] * (plan["filtered"] if plan["filtered"] is not None else 100.0) / 100.0
+        estimate = table_rows if estimate is None else estimate * table_rows
+    return round(estimate) if estimate is not None else 0
+
+
+class PageTotalCache:
+    """进程内的分页总数缓存，查询涉及的表有写入时失效"""
+
+    def __init__(self, max_size: int, expire_seconds: float) -> None:
+        self.max_size = max_size
+        self.expire_seconds = expire_seconds
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[Hashable, tuple[tuple[str, ...], tuple[int, ...], float, int]] = OrderedDict()
+        # 语句结构到涉及的表名，同一结构只遍历一次语句
+        self.statement_tables: dict[Hashable, tuple[str, ...]] = {}
+        self.table_versions: defaultdict[str, int] = defaultdict(int)
+        self.version_counter = itertools.count(1)
+
+    def get(self, total_stmt: Select) -> int | None:
+        if self.max_size <= 0:
+            return None
+        key = self._key(total_stmt)
+        if key is None:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            table_names, versions, expire_at, total = entry
+            if versions != self._versions(table_names) or expire_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return total
+
+    def put(self, total_stmt: Select, total: int) -> None:
+        if self.max_size <= 0:
+            return
+        key = self._key(total_stmt)
+        if key is None:
+            return
+        table_names = self._tables(key[0], total_stmt)
+        with self.lock:
+            self.entries[key] = (
+                table_names,
+                self._versions(table_names),
+                time.monotonic() + self.expire_seconds,
+                total,
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate_table(self, table_name: str) -> None:
+        self.table_versions[table_name] = next(self.version_counter)
+
+    def _versions(self, table_names: tuple[str, ...]) -> tuple[int, ...]:
+        return tuple(self.table_versions[table_name] for table_name in table_names)
+
+    def _tables(self, statement_key: Hashable, total_stmt: Select) -> tuple[str, ...]:
+        table_names = self.statement_tables.get(statement_key)
+        if table_names is None:
+            table_names = tuple(sorted({table.name for table in find_tables(total_stmt)}))
+            if len(self.statement_tables) >= self.max_size:
+                self.statement_tables.clear()
+            self.statement_tables[statement_key] = table_names
+        return table_names
+
+    @staticmethod
+    def _key(total_stmt: Select) -> tuple[Hashable, str] | None:
+        # 使用SQLAlchemy的语句缓存键和绑定参数值，不编译SQL，语句不可缓存时返回None
+        cache_key = total_stmt._generate_cache_key()
+        if cache_key is None:
+            return None
+        return cache_key.key, repr([param.effective_value for param in cache_key.bindparams])
+
+
+page_total_cache = PageTotalCache(config.PAGE_TOTAL_CACHE_SIZE, config.PAGE_TOTAL_CACHE_EXPIRE_SECONDS)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_page_total_on_dml(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        page_total_cache.invalidate_table(orm_execute_state.statement.table.name)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_page_total_on_flush(session: Session, _flush_context) -> None:
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        page_total_cache.invalidate_table(obj.__table__.name)
+
+
+def contains_text(column: InstrumentedAttribute, term: str) -> ColumnElement[bool]:
+    """字符串包含查询，关键词不短于ngram分词长度时使用全文索引，否则回退为LIKE"""
+    if len(term) < config.FULLTEXT_NGRAM_TOKEN_SIZE or '"' in term:
+        return column.icontains(term)
+    # 短语模式匹配连续的ngram分词，全文索引召回后再用LIKE保证与子串匹配的结果一致
+    return and_(column.match(f'"{term}"'), column.icontains(term))
+
+
+def keyset_after(
+    columns: list[InstrumentedAttribute], values: list[Any], *, descending: bool = False
+) -> ColumnElement[bool]:
+    # (a, b) > (x, y) 展开为 a > x OR (a = x AND b > y)，MySQL可以对展开后的条件使用索引范围扫描
+    conditions = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        equal_prefix = [prefix_column == prefix_value for prefix_column, prefix_value in zip(columns[:i], values[:i])]
+        after = column < value if descending else column > value
+        conditions.append(and_(*equal_prefix, after))
+    return or_(*conditions)
+
+
+def encode_page_cursor(values: list[Any]) -> str:
+    json_values = [value.isoformat() if isinstance(value, date) else value for value in values]
+    cursor_json = json.dumps(json_values, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(cursor_json.encode("UTF-8")).decode("ASCII")
+
+
+def decode_page_cursor(cursor: str, columns: list[InstrumentedAttribute]) -> list[Any]:
+    try:
+        json_values = json.loads(base64.urlsafe_b64decode(cursor.encode("ASCII")))
+        if not isinstance(json_values, list) or len(json_values) != len(columns):
+            raise ValueError(f"cursor should have {len(columns)} values")
+        return [_parse_cursor_value(column, value) for column, value in zip(columns, json_values)]
+    except (ValueError, TypeError) as e:
+        logger.error(f"invalid page cursor, {cursor=}, msg={e}")
+        raise ServiceError.params_error("invalid cursor")
+
+
+def _parse_cursor_value(column: InstrumentedAttribute, value: Any) -> Any:
+    python_type = column.type.python_type
+    if issubclass(python_type, datetime):
+        return datetime.fromisoformat(value)
+    if issubclass(python_type, date):
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
 def send_heartbeat(db: Session) -> None:
     db.execute(select(text("1")))
     logger.info("database heartbeat sent")
@@ -5,7 +5,8 @@ from sqlalchemy.orm import Session, aliased
 
 from app.common.exception import ServiceError
 from app.common.localization import Entity
-from app.db.crud import query_pages
+from app.db import OrmModel, read_from_replica
+from app.db.crud import contains_text, query_cursor_pages
 from app.db.orm import (
     Atlas,
     AtlasBehavioralDomain,
@@ -19,13 +20,16 @@ from app.model.field import ID
 from app.model.schema import AtlasSearch
 
 
-def search_atlases(db: Session, search: AtlasSearch) -> tuple[int, Sequence[Atlas]]:
+@read_from_replica
+def search_atlases(db: Session, search: AtlasSearch) -> tuple[int | None, Sequence[Atlas], str | None]:
     base_stmt = select(Atlas).select_from(Atlas)
     if search.name:
-        base_stmt = base_stmt.where(Atlas.name.icontains(search.name))
+        base_stmt = base_stmt.where(contains_text(Atlas.name, search.name))
     if not search.include_deleted:
         base_stmt = base_stmt.where(Atlas.is_deleted == False)
-    return query_pages(db, base_stmt, search.offset, search.limit)
+    return query_cursor_pages(
+        db, base_stmt, Atlas.id, Atlas.id, search.offset, search.limit, search.cursor, total_mode=search.total_mode
+    )
 
 
 # noinspection PyTypeChecker
@@ -117,7 +121,13 @@ def list_atlas_region_behavioral_domains(
 ) -> Sequence[AtlasRegionBehavioralDomain]:
     stmt = (
         select(AtlasRegionBehavioralDomain.key, AtlasRegionBehavioralDomain.value)
-        .join(AtlasRegion, AtlasRegionBehavioralDomain.region_id == AtlasRegion.region_id)
+        .join(
+            AtlasRegion,
+            and_(
+                AtlasRegionBehavioralDomain.atlas_id == AtlasRegion.atlas_id,
+                AtlasRegionBehavioralDomain.region_id == AtlasRegion.region_id,
+            ),
+        )
         .join(Atlas, AtlasRegionBehavioralDomain.atlas_id == Atlas.id)
         .where(
             AtlasRegionBehavioralDomain.atlas_id == atlas_id,
@@ -155,7 +165,13 @@ def list_atlas_paradigm_class_by_atlas_id(db: Session, atlas_id: ID) -> Sequence
 def list_atlas_region_paradigm_classes(db: Session, atlas_id: ID, region_id: ID) -> Sequence[AtlasRegionParadigmClass]:
     stmt = (
         select(AtlasRegionParadigmClass.key, AtlasRegionParadigmClass.value)
-        .join(AtlasRegion, AtlasRegionParadigmClass.region_id == AtlasRegion.region_id)
+        .join(
+            AtlasRegion,
+            and_(
+                AtlasRegionParadigmClass.atlas_id == AtlasRegion.atlas_id,
+                AtlasRegionParadigmClass.region_id == AtlasRegion.region_id,
+            ),
+        )
         .join(Atlas, AtlasRegionParadigmClass.atlas_id == Atlas.id)
         .where(
             AtlasRegionParadigmClass.region_id == region_id,
@@ -167,3 +183,7 @@ def list_atlas_region_paradigm_classes(db: Session, atlas_id: ID, region_id: ID)
     )
     paradigm_classes = db.execute(stmt).all()
     return paradigm_classes
+
+
+def get_atlas_id(db: Session, table: type[OrmModel], id_: int) -> int | None:
+    return db.execute(select(table.atlas_id).where(table.id == id_)).scalar()
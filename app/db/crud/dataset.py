@@ -3,29 +3,33 @@ from typing import Sequence
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.db.crud import query_pages
+from app.db import read_from_replica
+from app.db.crud import contains_text, query_cursor_pages
 from app.db.orm import Dataset
 from app.model.schema import DatasetSearch
 
 
-def search_datasets(db: Session, search: DatasetSearch) -> tuple[int, Sequence[Dataset]]:
+@read_from_replica
+def search_datasets(db: Session, search: DatasetSearch) -> tuple[int | None, Sequence[Dataset], str | None]:
     base_stmt = select(Dataset).select_from(Dataset)
     if search.user_id is not None:
         base_stmt = base_stmt.where(Dataset.user_id == search.user_id)
     if search.data_publisher is not None:
-        base_stmt = base_stmt.where(Dataset.data_publisher.icontains(search.data_publisher))
+        base_stmt = base_stmt.where(contains_text(Dataset.data_publisher, search.data_publisher))
     if search.data_update_year is not None:
         base_stmt = base_stmt.where(Dataset.data_update_year == search.data_update_year)
     if search.experiment_platform is not None:
-        base_stmt = base_stmt.where(Dataset.experiment_platform.icontains(search.experiment_platform))
+        base_stmt = base_stmt.where(contains_text(Dataset.experiment_platform, search.experiment_platform))
     if search.project is not None:
-        base_stmt = base_stmt.where(Dataset.project.icontains(search.project))
+        base_stmt = base_stmt.where(contains_text(Dataset.project, search.project))
     if search.species is not None:
-        base_stmt = base_stmt.where(Dataset.species.icontains(search.species))
+        base_stmt = base_stmt.where(contains_text(Dataset.species, search.species))
     if search.organ is not None:
-        base_stmt = base_stmt.where(Dataset.organ.icontains(search.organ))
+        base_stmt = base_stmt.where(contains_text(Dataset.organ, search.organ))
     if search.development_stage is not None:
-        base_stmt = base_stmt.where(Dataset.development_stage.icontains(search.development_stage))
+        base_stmt = base_stmt.where(contains_text(Dataset.development_stage, search.development_stage))
     if not search.include_deleted:
         base_stmt = base_stmt.where(Dataset.is_deleted == False)
-    return query_pages(db, base_stmt, search.offset, search.limit)
+    return query_cursor_pages(
+        db, base_stmt, Dataset.id, Dataset.id, search.offset, search.limit, search.cursor, total_mode=search.total_mode
+    )
@@ -1,8 +1,10 @@
 from typing import Sequence
 
-from sqlalchemy import Row, func, select
+from sqlalchemy import Row, select
 from sqlalchemy.orm import Session
 
+from app.db import read_from_replica
+from app.db.crud import contains_text, query_pages
 from app.db.orm import Device, Experiment, ExperimentDevice
 from app.model.schema import DeviceSearch
 
@@ -38,7 +40,8 @@ def get_last_index(db: Session, experiment_id: int) -> int | None:
 SearchDeviceRow = Row[tuple[int, str, str, str] | tuple[int, str, str, str, int]]
 
 
-def search_devices(db: Session, search: DeviceSearch) -> tuple[int, Sequence[SearchDeviceRow]]:
+@read_from_replica
+def search_devices(db: Session, search: DeviceSearch) -> tuple[int | None, Sequence[SearchDeviceRow]]:
     base_stmt = select(Device.id, Device.brand, Device.name, Device.purpose).select_from(Device)
     if search.experiment_id is not None:
         base_stmt = (
@@ -48,12 +51,10 @@ def search_devices(db: Session, search: DeviceSearch) -> tuple[int, Sequence[Sea
             .where(Experiment.id == search.experiment_id, Experiment.is_deleted == False)
         )
     if search.brand:
-        base_stmt = base_stmt.where(Device.brand.icontains(search.brand))
+        base_stmt = base_stmt.where(contains_text(Device.brand, search.brand))
     if search.name:
-        base_stmt = base_stmt.where(Device.name.icontains(search.name))
+        base_stmt = base_stmt.where(contains_text(Device.name, search.name))
     if not search.include_deleted:
         base_stmt = base_stmt.where(Device.is_deleted == False)
 
-    rows = db.execute(base_stmt.offset(search.offset).limit(search.limit)).all()
-    total = db.execute(base_stmt.with_only_columns(func.count())).scalar()
-    return total, rows
+    return query_pages(db, base_stmt, search.offset, search.limit, total_mode=search.total_mode, scalars=False)
@@ -3,12 +3,14 @@ from typing import Sequence
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.db.crud import query_pages
+from app.db import read_from_replica
+from app.db.crud import query_cursor_pages
 from app.db.orm import EEGData
 from app.model.schema import EEGDataSearch
 
 
-def search_eegdata(db: Session, search: EEGDataSearch) -> tuple[int, Sequence[EEGData]]:
+@read_from_replica
+def search_eegdata(db: Session, search: EEGDataSearch) -> tuple[int | None, Sequence[EEGData], str | None]:
     base_stmt = select(EEGData).select_from(EEGData)
     if search.user_id is not None:
         base_stmt = base_stmt.where(EEGData.user_id == search.user_id)
@@ -20,4 +22,6 @@ def search_eegdata(db: Session, search: EEGDataSearch) -> tuple[int, Sequence[EE
         base_stmt = base_stmt.where(EEGData.age == search.age)
     if not search.include_deleted:
         base_stmt = base_stmt.where(EEGData.is_deleted == False)
-    return query_pages(db, base_stmt, search.offset, search.limit)
+    return query_cursor_pages(
+        db, base_stmt, EEGData.id, EEGData.id, search.offset, search.limit, search.cursor, total_mode=search.total_mode
+    )
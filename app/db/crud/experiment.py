@@ -3,10 +3,10 @@ from typing import Any, Sequence
 
 from sqlalchemy import CursorResult, and_, insert, or_, select, update
 from sqlalchemy.exc import DBAPIError
-from sqlalchemy.orm import Session, immediateload, joinedload, load_only, raiseload, subqueryload
+from sqlalchemy.orm import Session, immediateload, load_only, raiseload
 
-from app.db import common_crud
-from app.db.crud.user import load_user_info
+from app.db import common_crud, entity_cache, read_from_replica
+from app.db.crud import contains_text
 from app.db.orm import Experiment, ExperimentAssistant, ExperimentTag, User
 from app.model.enum_filed import GetExperimentsByPageSortBy, GetExperimentsByPageSortOrder
 from app.model.schema import ExperimentSearch
@@ -41,6 +41,7 @@ def insert_or_update_experiment(db: Session, id_: int, row: dict[str, Any]) -> N
         else:
             exists_experiment_id = exists_result.id
         if exists_experiment_id != id_:
+            entity_cache.invalidate_rows(db, Experiment, [Experiment.id.in_([exists_experiment_id, id_])])
             update_result: CursorResult = db.execute(
                 update(Experiment).where(Experiment.id == exists_experiment_id).values(id=id_, **row)
             )
@@ -59,16 +60,13 @@ def get_experiment_by_id(db: Session, experiment_id: int) -> Experiment | None:
     stmt = (
         select(Experiment)
         .where(Experiment.id == experiment_id, Experiment.is_deleted == False)
-        .options(
-            load_user_info(joinedload(Experiment.main_operator_obj)),
-            load_user_info(subqueryload(Experiment.assistants)),
-            immediateload(Experiment.tags),
-        )
+        .options(immediateload(Experiment.tags))
     )
     experiment = db.execute(stmt).scalar()
     return experiment
 
 
+@read_from_replica
 def search_experiments(db: Session, search: ExperimentSearch) -> Sequence[Experiment]:
     stmt = (
         select(Experiment)
@@ -78,11 +76,11 @@ def search_experiments(db: Session, search: ExperimentSearch) -> Sequence[Experi
         .options(immediateload(Experiment.tags), raiseload("*"))
     )
     if search.name:
-        stmt = stmt.where(Experiment.name.icontains(search.name))
+        stmt = stmt.where(contains_text(Experiment.name, search.name))
     if search.type:
         stmt = stmt.where(Experiment.type.icontains(search.type))
     if search.tag:
-        stmt = stmt.join(Experiment.tags).where(ExperimentTag.tag.icontains(search.tag))
+        stmt = stmt.join(Experiment.tags).where(contains_text(ExperimentTag.tag, search.tag))
     if not search.include_deleted:
         stmt = stmt.where(Experiment.is_deleted == False)
     order_by_column = SEARCH_EXPERIMENT_SORT_BY_COLUMN[search.sort_by]
@@ -106,6 +104,11 @@ def list_experiment_assistants(db: Session, experiment_id: int) -> Sequence[User
     return users
 
 
+def list_experiment_assistant_ids(db: Session, experiment_id: int) -> Sequence[int]:
+    stmt = select(ExperimentAssistant.user_id).where(ExperimentAssistant.experiment_id == experiment_id)
+    return db.execute(stmt).scalars().all()
+
+
 def search_experiment_assistants(db: Session, experiment_id: int, assistant_ids: list[int]) -> Sequence[int]:
     stmt = select(ExperimentAssistant.user_id).where(
         ExperimentAssistant.experiment_id == experiment_id, ExperimentAssistant.user_id.in_(assistant_ids)
@@ -4,7 +4,8 @@ from typing import Sequence
 from sqlalchemy import select
 from sqlalchemy.orm import Session, immediateload, load_only
 
-from app.db.crud import query_pages
+from app.db import read_from_replica
+from app.db.crud import contains_text, query_cursor_pages
 from app.db.orm import StorageFile, VirtualFile
 from app.model.schema import FileSearch
 
@@ -25,23 +26,30 @@ def get_file_extensions(db: Session, experiment_id: int) -> Sequence[str]:
     return extensions
 
 
-def search_files(db: Session, search: FileSearch) -> tuple[int, Sequence[VirtualFile]]:
+@read_from_replica
+def search_files(db: Session, search: FileSearch) -> tuple[int | None, Sequence[VirtualFile], str | None]:
     base_stmt = (
-        select(VirtualFile)
-        .where(VirtualFile.paradigm_id.is_(None))
-        .order_by(VirtualFile.id.asc())
-        .options(immediateload(VirtualFile.storage_files))
+        select(VirtualFile).where(VirtualFile.paradigm_id.is_(None)).options(immediateload(VirtualFile.storage_files))
     )
     if search.experiment_id is not None:
         base_stmt = base_stmt.where(VirtualFile.experiment_id == search.experiment_id)
     if search.name:
-        base_stmt = base_stmt.where(VirtualFile.name.icontains(search.name))
+        base_stmt = base_stmt.where(contains_text(VirtualFile.name, search.name))
     if search.file_type:
         base_stmt = base_stmt.where(VirtualFile.file_type.icontains(search.file_type))
     if not search.include_deleted:
         base_stmt = base_stmt.where(VirtualFile.is_deleted == False)
 
-    return query_pages(db, base_stmt, search.offset, search.limit)
+    return query_cursor_pages(
+        db,
+        base_stmt,
+        VirtualFile.id,
+        VirtualFile.id,
+        search.offset,
+        search.limit,
+        search.cursor,
+        total_mode=search.total_mode,
+    )
 
 
 def get_file_download_info(db: Session, virtual_file_id: int) -> tuple[str | None, str | None]:
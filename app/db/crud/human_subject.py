@@ -2,11 +2,11 @@ import logging
 import sys
 from typing import Sequence
 
-from sqlalchemy import select, text
+from sqlalchemy import select, text, update
 from sqlalchemy.orm import Session, joinedload
 
-from app.db import common_crud
-from app.db.crud import query_pages
+from app.db import common_crud, read_from_replica
+from app.db.crud import query_cursor_pages
 from app.db.orm import Experiment, ExperimentHumanSubject, HumanSubject, HumanSubjectIndex, User
 from app.model.schema import HumanSubjectSearch
 
@@ -39,6 +39,12 @@ def get_next_human_subject_index(
     return next_index
 
 
+def claim_human_subject_index(db: Session, index: int) -> bool:
+    """序号仍为index时加1并返回True，已被其他请求占用时返回False，序号行锁持有到事务结束"""
+    stmt = update(HumanSubjectIndex).where(HumanSubjectIndex.index == index).values(index=index + 1)
+    return db.execute(stmt).rowcount == 1
+
+
 def get_human_subject(db: Session, user_id: int) -> HumanSubject | None:
     stmt = (
         select(HumanSubject)
@@ -49,7 +55,10 @@ def get_human_subject(db: Session, user_id: int) -> HumanSubject | None:
     return row
 
 
-def search_human_subjects(db: Session, search: HumanSubjectSearch) -> tuple[int, Sequence[HumanSubject]]:
+@read_from_replica
+def search_human_subjects(
+    db: Session, search: HumanSubjectSearch
+) -> tuple[int | None, Sequence[HumanSubject], str | None]:
     base_stmt = select(HumanSubject).options(load_human_subject_user_option())
     if search.experiment_id is not None:
         base_stmt = base_stmt.join(Experiment.human_subjects.and_(Experiment.is_deleted == False)).where(
@@ -68,7 +77,16 @@ def search_human_subjects(db: Session, search: HumanSubjectSearch) -> tuple[int,
     if not search.include_deleted:
         base_stmt = base_stmt.where(HumanSubject.is_deleted == False)
 
-    return query_pages(db, base_stmt, search.offset, search.limit)
+    return query_cursor_pages(
+        db,
+        base_stmt,
+        HumanSubject.id,
+        HumanSubject.id,
+        search.offset,
+        search.limit,
+        search.cursor,
+        total_mode=search.total_mode,
+    )
 
 
 def list_experiment_human_subjects(db: Session, experiment_id: int) -> Sequence[int]:
@@ -1,10 +1,11 @@
 from typing import Sequence
 
 from sqlalchemy import func, select
-from sqlalchemy.orm import Session, immediateload
+from sqlalchemy.orm import Session
 
-from app.db.crud import query_pages
-from app.db.orm import Notification, User
+from app.db import read_from_replica
+from app.db.crud import query_cursor_pages
+from app.db.orm import Notification
 from app.model.enum_filed import NotificationStatus
 from app.model.schema import NotificationSearch
 
@@ -19,13 +20,11 @@ def get_notification_unread_count(db: Session, user_id: int) -> int:
     return db.execute(stmt).scalar()
 
 
-def search_notifications(db: Session, search: NotificationSearch, user_id: int) -> tuple[int, Sequence[Notification]]:
-    stmt = (
-        select(Notification)
-        .options(immediateload(Notification.creator_user).load_only(User.username))
-        .where(Notification.receiver == user_id)
-        .order_by(Notification.gmt_create.desc())
-    )
+@read_from_replica
+def search_notifications(
+    db: Session, search: NotificationSearch, user_id: int
+) -> tuple[int | None, Sequence[Notification], str | None]:
+    stmt = select(Notification).where(Notification.receiver == user_id)
     if search.notification_type:
         stmt = stmt.where(Notification.type == search.notification_type)
     if search.status:
@@ -36,14 +35,27 @@ def search_notifications(db: Session, search: NotificationSearch, user_id: int)
         stmt = stmt.where(Notification.gmt_create <= search.create_time_end)
     if not search.include_deleted:
         stmt = stmt.where(Notification.is_deleted == False)
-    return query_pages(db, stmt, search.offset, search.limit)
+    return query_cursor_pages(
+        db,
+        stmt,
+        Notification.gmt_create,
+        Notification.id,
+        search.offset,
+        search.limit,
+        search.cursor,
+        descending=True,
+        total_mode=search.total_mode,
+    )
 
 
 def list_recent_unread_notifications(db: Session, user_id: int, count: int) -> Sequence[Notification]:
     stmt = (
         select(Notification)
-        .options(immediateload(Notification.creator_user).load_only(User.username))
-        .where(Notification.receiver == user_id, Notification.status == NotificationStatus.unread)
+        .where(
+            Notification.receiver == user_id,
+            Notification.status == NotificationStatus.unread,
+            Notification.is_deleted == False,
+        )
         .limit(count)
         .order_by(Notification.gmt_create.desc())
     )
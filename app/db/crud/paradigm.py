@@ -1,17 +1,13 @@
 from typing import Sequence
 
 from sqlalchemy import and_, select
-from sqlalchemy.orm import Session, immediateload, joinedload, load_only
+from sqlalchemy.orm import Session, immediateload, load_only
 
-from app.db.crud.user import load_user_info
+from app.db import read_from_replica
 from app.db.orm import Experiment, Paradigm, StorageFile, VirtualFile
 from app.model.schema import PageParm
 
 
-def load_paradigm_creator_option():
-    return load_user_info(joinedload(Paradigm.creator_obj))
-
-
 def load_paradigm_files_option():
     return immediateload(Paradigm.exist_virtual_files).load_only(VirtualFile.id)
 
@@ -20,7 +16,7 @@ def get_paradigm_by_id(db: Session, paradigm_id: int) -> Paradigm | None:
     stmt = (
         select(Paradigm)
         .where(Paradigm.id == paradigm_id, Paradigm.is_deleted == False)
-        .options(load_paradigm_creator_option(), load_paradigm_files_option())
+        .options(load_paradigm_files_option())
     )
     paradigm = db.execute(stmt).scalar()
     return paradigm
@@ -32,6 +28,7 @@ def list_paradigm_files(db: Session, paradigm_id: int) -> list[int]:
     return list(result)
 
 
+@read_from_replica
 def search_paradigms(db: Session, experiment_id: int, page_param: PageParm) -> list[Paradigm]:
     stmt = (
         select(Paradigm)
@@ -39,7 +36,7 @@ def search_paradigms(db: Session, experiment_id: int, page_param: PageParm) -> l
         .join(Experiment, and_(Paradigm.experiment_id == Experiment.id, Experiment.is_deleted == False))
         .offset(page_param.offset)
         .limit(page_param.limit)
-        .options(load_paradigm_creator_option(), load_paradigm_files_option())
+        .options(load_paradigm_files_option())
     )
     if not page_param.include_deleted:
         stmt = stmt.where(Paradigm.is_deleted == False)
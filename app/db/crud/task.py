@@ -1,17 +1,18 @@
 from typing import Sequence
 
 from sqlalchemy import func, select
-from sqlalchemy.orm import Session, immediateload, joinedload, load_only, noload
+from sqlalchemy.orm import Session, immediateload, load_only, noload
 
-from app.db.crud import query_pages
-from app.db.crud.user import load_user_info
+from app.db import read_from_replica
+from app.db.crud import contains_text, query_cursor_pages, query_pages
 from app.db.orm import Experiment, Task, TaskStep, VirtualFile
 from app.model.schema import TaskSearch, TaskSourceFileSearch
 
 
+@read_from_replica
 def search_source_files(
     db: Session, search: TaskSourceFileSearch
-) -> tuple[int, Sequence[tuple[VirtualFile, Experiment]]]:
+) -> tuple[int | None, Sequence[tuple[VirtualFile, Experiment]]]:
     base_stmt = (
         select(VirtualFile, Experiment)
         .select_from(VirtualFile)
@@ -22,30 +23,29 @@ def search_source_files(
         )
     )
     if search.name:
-        base_stmt = base_stmt.where(VirtualFile.name.icontains(search.name))
+        base_stmt = base_stmt.where(contains_text(VirtualFile.name, search.name))
     if search.file_type:
         base_stmt = base_stmt.where(VirtualFile.file_type == search.file_type)
     if search.experiment_name:
-        base_stmt = base_stmt.where(Experiment.name.icontains(search.experiment_name))
+        base_stmt = base_stmt.where(contains_text(Experiment.name, search.experiment_name))
     if not search.include_deleted:
         base_stmt = base_stmt.where(Experiment.is_deleted == False, VirtualFile.is_deleted == False)
-    return query_pages(db, base_stmt, search.offset, search.limit, scalars=False)
+    return query_pages(db, base_stmt, search.offset, search.limit, total_mode=search.total_mode, scalars=False)
 
 
 def get_task_info_by_id(db: Session, task_id: int) -> Task | None:
     stmt = (
         select(Task)
         .where(Task.id == task_id, Task.is_deleted == False)
-        .options(
-            load_user_info(joinedload(Task.creator_obj)), immediateload(Task.steps.and_(TaskStep.is_deleted == False))
-        )
+        .options(immediateload(Task.steps.and_(TaskStep.is_deleted == False)))
     )
     task = db.execute(stmt).scalar()
     return task
 
 
-def search_task(db: Session, search: TaskSearch) -> tuple[int, Sequence[Task]]:
-    base_stmt = select(Task).options(load_user_info(joinedload(Task.creator_obj)), noload(Task.steps))
+@read_from_replica
+def search_task(db: Session, search: TaskSearch) -> tuple[int | None, Sequence[Task], str | None]:
+    base_stmt = select(Task).options(noload(Task.steps))
     if not search.include_deleted:
         base_stmt = base_stmt.where(Task.is_deleted == False)
     if search.name:
@@ -61,7 +61,9 @@ def search_task(db: Session, search: TaskSearch) -> tuple[int, Sequence[Task]]:
     if search.creator is not None:
         base_stmt = base_stmt.where(Task.creator == search.creator)
 
-    return query_pages(db, base_stmt, search.offset, search.limit)
+    return query_cursor_pages(
+        db, base_stmt, Task.id, Task.id, search.offset, search.limit, search.cursor, total_mode=search.total_mode
+    )
 
 
 def get_steps_by_task_id(db: Session, task_id: int) -> Sequence[TaskStep]:
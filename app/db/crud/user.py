@@ -1,26 +1,27 @@
-from typing import Sequence
+from typing import Iterable, Sequence
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.common.exception import ServiceError
-from app.db import common_crud
-from app.db.crud import query_pages
+from app.db import common_crud, read_from_replica
+from app.db.crud import contains_text, query_pages
 from app.db.orm import User
-from app.model.schema import UserAuth, UserCreate, UserSearch
+from app.model.schema import UserAuth, UserCreate, UserInfo, UserSearch
 
 
-def search_users(db: Session, search: UserSearch) -> tuple[int, Sequence[User]]:
+@read_from_replica
+def search_users(db: Session, search: UserSearch) -> tuple[int | None, Sequence[User]]:
     stmt = select(User)
     if search.username:
-        stmt = stmt.where(User.username.icontains(search.username))
+        stmt = stmt.where(contains_text(User.username, search.username))
     if search.staff_id:
-        stmt = stmt.where(User.staff_id.icontains(search.staff_id))
+        stmt = stmt.where(contains_text(User.staff_id, search.staff_id))
     if search.access_level is not None:
         stmt = stmt.where(User.access_level == search.access_level)
     if not search.include_deleted:
         stmt = stmt.where(User.is_deleted == False)
-    return query_pages(db, stmt, search.offset, search.limit)
+    return query_pages(db, stmt, search.offset, search.limit, total_mode=search.total_mode)
 
 
 def get_user_access_level(db: Session, user_id: int) -> int | None:
@@ -49,5 +50,8 @@ def get_user_staff_id(db: Session, user_id: int) -> str | None:
     return db.execute(select(User.staff_id).where(User.id == user_id, User.is_deleted == False)).scalar()
 
 
-def load_user_info(load):
-    return load.load_only(User.id, User.username, User.staff_id)
+@read_from_replica
+def list_user_infos(db: Session, user_ids: Iterable[int]) -> list[UserInfo]:
+    # 与原先的关联加载一致，已删除的用户同样返回
+    stmt = select(User.id, User.username, User.staff_id).where(User.id.in_(user_ids))
+    return [UserInfo.from_orm(row) for row in db.execute(stmt)]
@@ -0,0 +1,178 @@
+import enum
+import functools
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, Iterable
+
+from redis import RedisError
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
+from sqlalchemy.sql.roles import WhereHavingRole
+
+from app.common.config import config
+from app.common.util import TTLCache
+from app.db import PIN_PRIMARY_KEY, OrmModel
+from app.db.cache import broadcast_invalidation, get_redis, local_caches
+
+logger = logging.getLogger(__name__)
+
+ENTITY_FORMAT: str = "entity:{}:{}"
+# 失效后写入的占位值，存在期间不缓存实体
+TOMBSTONE: str = "-"
+# Session.info中记录事务提交后需要失效的缓存键
+PENDING_INVALIDATION_KEY: str = "pending_entity_invalidation"
+
+# 进程内缓存，键与Redis键相同，值为列名到列值的映射
+entity_local_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+    config.ENTITY_LOCAL_CACHE_SIZE, config.ENTITY_LOCAL_CACHE_EXPIRE_SECONDS
+)
+local_caches.append(entity_local_cache)
+
+
+def is_entity_cached(table: type[OrmModel]) -> bool:
+    return table.__tablename__ in config.ENTITY_CACHE_TABLES
+
+
+def get_cached_row(db: Session, table: type[OrmModel], id_: int) -> OrmModel | None:
+    key = ENTITY_FORMAT.format(table.__tablename__, id_)
+    values = entity_local_cache.get(key)
+    if values is None:
+        try:
+            row_json: str | None = get_redis().get(key)
+        except RedisError as e:
+            logger.error(f"get entity cache error, {key=}, msg={e}")
+            return None
+        if row_json is None or row_json == TOMBSTONE:
+            return None
+        values = load_values(table, json.loads(row_json))
+        entity_local_cache.set(key, values)
+    return attach_row(db, table, values)
+
+
+def cache_row(db: Session, table: type[OrmModel], row: OrmModel) -> None:
+    if has_writes(db):
+        # 有写操作的事务读到的可能是未提交的数据，回滚后缓存中会留下不存在的行
+        return
+    key = ENTITY_FORMAT.format(table.__tablename__, row.id)
+    values = {attr.key: getattr(row, attr.key) for attr in inspect(table).column_attrs}
+    row_json = json.dumps({name: dump_value(value) for name, value in values.items()}, ensure_ascii=False)
+    try:
+        # 刚失效的实体存在占位值，不写入，读到的可能是从库中的旧数据
+        if get_redis().set(key, row_json, ex=config.ENTITY_CACHE_EXPIRE_SECONDS, nx=True):
+            entity_local_cache.set(key, values)
+    except RedisError as e:
+        logger.error(f"set entity cache error, {key=}, msg={e}")
+
+
+def has_writes(db: Session) -> bool:
+    """会话中出现写操作后固定使用主库，提交前的修改可能尚未flush"""
+    return bool(db.info.get(PIN_PRIMARY_KEY) or db.new or db.dirty or db.deleted)
+
+
+def attach_row(db: Session, table: type[OrmModel], values: dict[str, Any]) -> OrmModel:
+    # Session中已有该行时直接返回，merge会用缓存的值覆盖尚未flush的修改
+    existing_row = db.identity_map.get(identity_key(table, values["id"]))
+    if existing_row is not None:
+        return existing_row
+    # 构造为已持久化的对象后合并到Session，不发出查询，关联属性仍可通过Session懒加载
+    row = table(**values)
+    make_transient_to_detached(row)
+    return db.merge(row, load=False)
+
+
+def dump_value(value: Any) -> Any:
+    match value:
+        case enum.Enum():
+            return value.name
+        case datetime() | date():
+            return value.isoformat()
+        case _:
+            return value
+
+
+def load_values(table: type[OrmModel], values: dict[str, Any]) -> dict[str, Any]:
+    column_types = get_column_types(table)
+    return {name: load_value(column_types.get(name), value) for name, value in values.items()}
+
+
+def load_value(column_type: type | None, value: Any) -> Any:
+    if value is None or column_type is None:
+        return value
+    if column_type is datetime:
+        return datetime.fromisoformat(value)
+    if column_type is date:
+        return date.fromisoformat(value)
+    if issubclass(column_type, enum.Enum):
+        return column_type[value]
+    return value
+
+
+@functools.cache
+def get_column_types(table: type[OrmModel]) -> dict[str, type | None]:
+    column_types = {}
+    for attr in inspect(table).column_attrs:
+        try:
+            column_types[attr.key] = attr.columns[0].type.python_type
+        except NotImplementedError:
+            column_types[attr.key] = None
+    return column_types
+
+
+def invalidate_rows(db: Session, table: type[OrmModel], where: list[WhereHavingRole]) -> None:
+    """在写入前调用，立即失效并在事务提交后再次失效，提交后的占位值避免并发读取重新缓存旧数据"""
+    if not is_entity_cached(table):
+        return
+    ids = extract_ids(table, where)
+    if ids is None:
+        ids = db.execute(select(table.id).where(*where)).scalars().all()
+    keys = [ENTITY_FORMAT.format(table.__tablename__, id_) for id_ in ids]
+    if not keys:
+        return
+    db.info.setdefault(PENDING_INVALIDATION_KEY, set()).update(keys)
+    invalidate_entities(*keys)
+
+
+def extract_ids(table: type[OrmModel], where: list[WhereHavingRole]) -> Iterable[int] | None:
+    """从table.id == x或table.id.in_(xs)条件中取出ID，其他条件返回None"""
+    id_column = table.__table__.c.id
+    for clause in where:
+        if not isinstance(clause, BinaryExpression) or not clause.left.compare(id_column):
+            continue
+        if not isinstance(clause.right, BindParameter):
+            continue
+        if clause.operator is operators.eq:
+            return [clause.right.value]
+        if clause.operator is operators.in_op:
+            return clause.right.value
+    return None
+
+
+def invalidate_entities(*keys: str) -> None:
+    try:
+        cache = get_redis()
+        with cache.pipeline(transaction=False) as pipeline:
+            for key in keys:
+                pipeline.set(key, TOMBSTONE, px=int(config.ENTITY_CACHE_TOMBSTONE_SECONDS * 1000))
+            pipeline.execute()
+        broadcast_invalidation(cache, *keys)
+    except RedisError as e:
+        # Redis不可用时只能失效当前进程，其他进程和Redis中的缓存等待过期
+        logger.error(f"invalidate entity cache error, {keys=}, msg={e}")
+        for key in keys:
+            entity_local_cache.pop(key)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_entities(session: Session) -> None:
+    keys = session.info.pop(PENDING_INVALIDATION_KEY, None)
+    if keys:
+        invalidate_entities(*keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_pending_invalidation(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATION_KEY, None)
@@ -0,0 +1,36 @@
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+import app.db.crud.user as crud_user
+from app.model.schema import UserInfo
+
+REQUEST_MEMO_KEY: str = "request_memo"
+
+
+class RequestMemo:
+    """一次请求内的查询结果，保存在请求的Session中，请求结束后随Session释放"""
+
+    def __init__(self) -> None:
+        # 已确认存在的行，(表名, ID)
+        self.existing_rows: set[tuple[str, int]] = set()
+        # 已加载的用户，不存在的用户为None
+        self.users: dict[int, UserInfo | None] = {}
+
+    def load_users(self, db: Session, user_ids: Iterable[int]) -> dict[int, UserInfo]:
+        """先收集所有用户ID，未加载过的用户合并为一次IN查询，返回ID到用户的映射"""
+        user_ids = set(user_ids)
+        missing_user_ids = user_ids - self.users.keys()
+        if missing_user_ids:
+            for user_info in crud_user.list_user_infos(db, missing_user_ids):
+                self.users[user_info.id] = user_info
+            for user_id in missing_user_ids:
+                self.users.setdefault(user_id, None)
+        return {user_id: self.users[user_id] for user_id in user_ids if self.users[user_id] is not None}
+
+
+def get_request_memo(db: Session) -> RequestMemo:
+    memo = db.info.get(REQUEST_MEMO_KEY)
+    if memo is None:
+        memo = db.info[REQUEST_MEMO_KEY] = RequestMemo()
+    return memo
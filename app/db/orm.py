@@ -1,6 +1,20 @@
 from datetime import date, datetime
 
-from sqlalchemy import BigInteger, Boolean, Date, DateTime, Double, Enum, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Double,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import expression
 
@@ -33,7 +47,11 @@ class ModelMixin:
 @table_repr
 class User(Base, ModelMixin):
     __tablename__ = "user"
-    __table_args__ = {"comment": "用户"}
+    __table_args__ = (
+        Index("ft_user_username", "username", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        Index("ft_user_staff_id", "staff_id", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        {"comment": "用户"},
+    )
 
     username: Mapped[str] = mapped_column(String(255), nullable=False, index=True, comment="用户名")
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False, comment="密码哈希")
@@ -46,14 +64,19 @@ class User(Base, ModelMixin):
 @table_repr
 class Notification(Base, ModelMixin):
     __tablename__ = "notification"
-    __table_args__ = {"comment": "通知"}
+    __table_args__ = (
+        Index(
+            "ix_notification_receiver_status_is_deleted_gmt_create", "receiver", "status", "is_deleted", "gmt_create"
+        ),
+        {"comment": "通知"},
+    )
 
     gmt_create: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, index=True, server_default=func.now(), comment="创建时间"
     )
     type: Mapped[NotificationType] = mapped_column(Enum(NotificationType), nullable=False, comment="消息类型")
     creator: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"), nullable=False, comment="消息发送者ID")
-    receiver: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"), nullable=False, index=True, comment="消息接收者ID")
+    receiver: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"), nullable=False, comment="消息接收者ID")
     status: Mapped[NotificationStatus] = mapped_column(Enum(NotificationStatus), nullable=False, comment="消息状态")
     content: Mapped[str] = mapped_column(Text, nullable=False, comment="消息内容")
 
@@ -90,7 +113,10 @@ class ExperimentDevice(Base):
 
 class ExperimentTag(Base):
     __tablename__ = "experiment_tag"
-    __table_args__ = {"comment": "实验标签"}
+    __table_args__ = (
+        Index("ft_experiment_tag_tag", "tag", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        {"comment": "实验标签"},
+    )
 
     experiment_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("experiment.id"), nullable=False, primary_key=True, comment="实验ID"
@@ -101,7 +127,10 @@ class ExperimentTag(Base):
 @table_repr
 class Experiment(Base, ModelMixin):
     __tablename__ = "experiment"
-    __table_args__ = {"comment": "实验"}
+    __table_args__ = (
+        Index("ft_experiment_name", "name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        {"comment": "实验"},
+    )
 
     name: Mapped[str] = mapped_column(String(255), nullable=False, comment="实验名称")
     type: Mapped[ExperimentType] = mapped_column(Enum(ExperimentType), nullable=False, comment="实验类型")
@@ -151,11 +180,19 @@ class StorageFile(Base, ModelMixin):
 @table_repr
 class VirtualFile(Base, ModelMixin):
     __tablename__ = "virtual_file"
-    __table_args__ = {"comment": "虚拟文件"}
-
-    experiment_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("experiment.id"), nullable=False, index=True, comment="实验ID"
+    __table_args__ = (
+        Index(
+            "ix_virtual_file_experiment_id_paradigm_id_is_deleted_file_type",
+            "experiment_id",
+            "paradigm_id",
+            "is_deleted",
+            "file_type",
+        ),
+        Index("ft_virtual_file_name", "name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        {"comment": "虚拟文件"},
     )
+
+    experiment_id: Mapped[int] = mapped_column(Integer, ForeignKey("experiment.id"), nullable=False, comment="实验ID")
     paradigm_id: Mapped[int | None] = mapped_column(
         Integer, ForeignKey("paradigm.id"), nullable=True, index=True, comment="范式ID，null表示不属于范式而属于实验"
     )
@@ -195,7 +232,11 @@ class Paradigm(Base, ModelMixin):
 @table_repr
 class Device(Base, ModelMixin):
     __tablename__ = "device"
-    __table_args__ = {"comment": "实验设备"}
+    __table_args__ = (
+        Index("ft_device_brand", "brand", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        Index("ft_device_name", "name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        {"comment": "实验设备"},
+    )
 
     brand: Mapped[str] = mapped_column(String(255), nullable=False, comment="设备品牌")
     name: Mapped[str] = mapped_column(String(255), nullable=False, comment="设备名称")
@@ -259,7 +300,10 @@ class Task(Base, ModelMixin):
 @table_repr
 class TaskStep(Base, ModelMixin):
     __tablename__ = "task_step"
-    __table_args__ = {"comment": "任务步骤"}
+    __table_args__ = (
+        Index("ix_task_step_task_id_is_deleted_index", "task_id", "is_deleted", "index"),
+        {"comment": "任务步骤"},
+    )
 
     task_id: Mapped[int] = mapped_column(Integer, ForeignKey("task.id"), nullable=False, comment="任务ID")
     name: Mapped[str] = mapped_column(String(255), nullable=False, comment="步骤名字")
@@ -286,7 +330,10 @@ class TreeNodeMixin(ModelMixin):
 @table_repr
 class Atlas(Base, ModelMixin):
     __tablename__ = "atlas"
-    __table_args__ = {"comment": "脑图谱"}
+    __table_args__ = (
+        Index("ft_atlas_name", "name", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        {"comment": "脑图谱"},
+    )
 
     name: Mapped[str] = mapped_column(VarChar, nullable=False, comment="名称")
     url: Mapped[str] = mapped_column(VarChar, nullable=False, comment="主页地址")
@@ -297,7 +344,10 @@ class Atlas(Base, ModelMixin):
 @table_repr
 class AtlasRegion(Base, TreeNodeMixin, AtlasComponentMixin):
     __tablename__ = "atlas_region"
-    __table_args__ = {"comment": "脑图谱脑区构成信息，以树状结构存储"}
+    __table_args__ = (
+        Index("ix_atlas_region_atlas_id_is_deleted", "atlas_id", "is_deleted"),
+        {"comment": "脑图谱脑区构成信息，以树状结构存储"},
+    )
 
     region_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True, comment="脑区ID")
     description: Mapped[str] = mapped_column(VarChar, nullable=False, comment="描述")
@@ -310,7 +360,10 @@ class AtlasRegion(Base, TreeNodeMixin, AtlasComponentMixin):
 @table_repr
 class AtlasRegionLink(Base, ModelMixin, AtlasComponentMixin):
     __tablename__ = "atlas_region_link"
-    __table_args__ = {"comment": "脑图谱脑区之间的连接强度信息"}
+    __table_args__ = (
+        Index("ix_atlas_region_link_atlas_id_link_id", "atlas_id", "link_id"),
+        {"comment": "脑图谱脑区之间的连接强度信息"},
+    )
 
     link_id: Mapped[int] = mapped_column(Integer, nullable=False, comment="连接信息ID")
     region1: Mapped[str] = mapped_column(VarChar, nullable=False, comment="脑区1")
@@ -322,7 +375,10 @@ class AtlasRegionLink(Base, ModelMixin, AtlasComponentMixin):
 @table_repr
 class AtlasBehavioralDomain(Base, TreeNodeMixin, AtlasComponentMixin):
     __tablename__ = "atlas_behavioral_domain"
-    __table_args__ = {"comment": "脑图谱的行为域结构数据，以树状结构存储"}
+    __table_args__ = (
+        Index("ix_atlas_behavioral_domain_atlas_id_is_deleted", "atlas_id", "is_deleted"),
+        {"comment": "脑图谱的行为域结构数据，以树状结构存储"},
+    )
 
     name: Mapped[str] = mapped_column(VarChar, nullable=False, comment="名称")
     value: Mapped[float] = mapped_column(Double, nullable=False, comment="值")
@@ -333,7 +389,10 @@ class AtlasBehavioralDomain(Base, TreeNodeMixin, AtlasComponentMixin):
 @table_repr
 class AtlasRegionBehavioralDomain(Base, ModelMixin, AtlasComponentMixin):
     __tablename__ = "atlas_region_behavioral_domain"
-    __table_args__ = {"comment": "脑图谱中与脑区相关联的行为域数据"}
+    __table_args__ = (
+        Index("ix_atlas_region_behavioral_domain_atlas_id_region_id", "atlas_id", "region_id"),
+        {"comment": "脑图谱中与脑区相关联的行为域数据"},
+    )
 
     key: Mapped[str] = mapped_column(VarChar, nullable=False, comment="行为域")
     value: Mapped[float] = mapped_column(Double, nullable=False, comment="行为域值")
@@ -343,7 +402,10 @@ class AtlasRegionBehavioralDomain(Base, ModelMixin, AtlasComponentMixin):
 @table_repr
 class AtlasParadigmClass(Base, TreeNodeMixin, AtlasComponentMixin):
     __tablename__ = "atlas_paradigm_class"
-    __table_args__ = {"comment": "脑图谱范例集"}
+    __table_args__ = (
+        Index("ix_atlas_paradigm_class_atlas_id_is_deleted", "atlas_id", "is_deleted"),
+        {"comment": "脑图谱范例集"},
+    )
 
     name: Mapped[str] = mapped_column(VarChar, nullable=False, comment="名称")
     value: Mapped[float] = mapped_column(Double, nullable=False, comment="值")
@@ -354,7 +416,10 @@ class AtlasParadigmClass(Base, TreeNodeMixin, AtlasComponentMixin):
 @table_repr
 class AtlasRegionParadigmClass(Base, ModelMixin, AtlasComponentMixin):
     __tablename__ = "atlas_region_paradigm_class"
-    __table_args__ = {"comment": "脑图谱中与脑区相关联的范例集"}
+    __table_args__ = (
+        Index("ix_atlas_region_paradigm_class_atlas_id_region_id", "atlas_id", "region_id"),
+        {"comment": "脑图谱中与脑区相关联的范例集"},
+    )
 
     key: Mapped[str] = mapped_column(VarChar, nullable=False, comment="范例集")
     value: Mapped[float] = mapped_column(Double, nullable=False, comment="范例集值")
@@ -363,7 +428,17 @@ class AtlasRegionParadigmClass(Base, ModelMixin, AtlasComponentMixin):
 
 class Dataset(Base, ModelMixin):
     __tablename__ = "dataset"
-    __table_args__ = {"comment": "数据集"}
+    __table_args__ = (
+        Index("ft_dataset_data_publisher", "data_publisher", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        Index(
+            "ft_dataset_experiment_platform", "experiment_platform", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"
+        ),
+        Index("ft_dataset_project", "project", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        Index("ft_dataset_species", "species", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        Index("ft_dataset_organ", "organ", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        Index("ft_dataset_development_stage", "development_stage", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        {"comment": "数据集"},
+    )
 
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"), nullable=False, index=True, comment="用户ID")
     description: Mapped[str] = mapped_column(Text, nullable=False, comment="描述")
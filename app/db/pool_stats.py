@@ -0,0 +1,131 @@
+import itertools
+import threading
+import time
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """连接池的借出、归还和等待统计"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        # 正在等待连接的请求及其开始等待的时间
+        self.waiters: dict[int, float] = {}
+        self._waiter_ids = itertools.count()
+
+    def begin_wait(self) -> int:
+        waiter_id = next(self._waiter_ids)
+        with self.lock:
+            self.waiters[waiter_id] = time.monotonic()
+        return waiter_id
+
+    def end_wait(self, waiter_id: int, timeout: bool) -> None:
+        with self.lock:
+            wait_ms = (time.monotonic() - self.waiters.pop(waiter_id)) * 1000
+            self.waits += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            if timeout:
+                self.timeouts += 1
+
+    def record_checkout(self) -> None:
+        with self.lock:
+            self.checkouts += 1
+
+    def record_checkin(self) -> None:
+        with self.lock:
+            self.checkins += 1
+
+    def oldest_wait_seconds(self) -> float:
+        with self.lock:
+            if not self.waiters:
+                return 0.0
+            return time.monotonic() - min(self.waiters.values())
+
+    def snapshot(self, pool: QueuePool) -> dict[str, str | int | float]:
+        oldest_wait_seconds = self.oldest_wait_seconds()
+        with self.lock:
+            return {
+                "name": self.name,
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "waiting": len(self.waiters),
+                "oldest_wait_ms": oldest_wait_seconds * 1000,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": self.total_wait_ms / self.waits if self.waits else 0.0,
+                "max_wait_ms": self.max_wait_ms,
+            }
+
+
+class InstrumentedPoolMixin:
+    """记录从连接池获取连接的等待时间，连接池事件中没有等待开始的时机，因此覆盖_do_get"""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        waiter_id = self.stats.begin_wait()
+        timeout = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timeout = True
+            raise
+        finally:
+            self.stats.end_wait(waiter_id, timeout)
+
+    def recreate(self):
+        # Engine.dispose会重建连接池，统计数据沿用到新的连接池
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+instrumented_engines: list[Engine] = []
+
+
+def instrument_engine(name: str, engine: Engine) -> Engine:
+    if not isinstance(engine.pool, InstrumentedPoolMixin):
+        return engine
+    stats = PoolStats(name)
+    engine.pool.stats = stats
+
+    @event.listens_for(engine, "checkout")
+    def record_checkout(_dbapi_connection, _connection_record, _connection_proxy) -> None:
+        stats.record_checkout()
+
+    @event.listens_for(engine, "checkin")
+    def record_checkin(_dbapi_connection, _connection_record) -> None:
+        stats.record_checkin()
+
+    instrumented_engines.append(engine)
+    return engine
+
+
+def get_pool_stats() -> list[dict[str, str | int | float]]:
+    return [engine.pool.stats.snapshot(engine.pool) for engine in instrumented_engines]
+
+
+def get_max_pool_wait_seconds() -> float:
+    return max((engine.pool.stats.oldest_wait_seconds() for engine in instrumented_engines), default=0.0)
@@ -0,0 +1,140 @@
+import functools
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import Engine, event
+
+from app.common.config import config
+from app.common.log import SLOW_QUERY_LOGGER_NAME
+
+slow_query_logger = logging.getLogger(SLOW_QUERY_LOGGER_NAME)
+
+# IN列表展开后参数个数不同，归一化为同一种形态
+IN_PARAMS_PATTERN = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+BLANK_PATTERN = re.compile(r"\s+")
+
+
+class QueryStats:
+    """一个请求内执行的SQL统计"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.shape_counts: Counter[str] = Counter()
+
+    def record(self, shape: str, elapsed_ms: float) -> None:
+        with self.lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.shape_counts[shape] += 1
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        with self.lock:
+            return [(shape, count) for shape, count in self.shape_counts.most_common() if count > threshold]
+
+
+class ShapeStat:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+
+
+class ShapeStats:
+    """进程内按SQL形态聚合的统计，定期输出后清空"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.shapes: dict[str, ShapeStat] = {}
+
+    def record(self, shape: str, elapsed_ms: float, rowcount: int) -> None:
+        with self.lock:
+            stat = self.shapes.get(shape)
+            if stat is None:
+                stat = self.shapes[shape] = ShapeStat()
+            stat.count += 1
+            stat.total_ms += elapsed_ms
+            stat.max_ms = max(stat.max_ms, elapsed_ms)
+            stat.rows += max(rowcount, 0)
+
+    def drain(self) -> dict[str, ShapeStat]:
+        with self.lock:
+            shapes, self.shapes = self.shapes, {}
+        return shapes
+
+
+query_stats_ctxvar: ContextVar[QueryStats | None] = ContextVar("query-stats", default=None)
+# 每次执行SQL都要遍历，修改时整体替换，遍历时不需要加锁
+_collectors: tuple[QueryStats, ...] = ()
+_collectors_lock = threading.Lock()
+shape_stats = ShapeStats()
+
+
+# 同一条语句的字符串在SQLAlchemy编译缓存中重复出现，缓存归一化结果避免重复执行正则
+@functools.lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    statement = IN_PARAMS_PATTERN.sub("(...)", statement)
+    return BLANK_PATTERN.sub(" ", statement).strip()
+
+
+@contextmanager
+def collect_query_stats() -> Iterator[QueryStats]:
+    """收集代码块执行期间所有线程执行的SQL，不依赖请求上下文，用于测试"""
+    global _collectors
+    stats = QueryStats()
+    with _collectors_lock:
+        _collectors = (*_collectors, stats)
+    try:
+        yield stats
+    finally:
+        with _collectors_lock:
+            _collectors = tuple(collector for collector in _collectors if collector is not stats)
+
+
+# 开始时间记录在每次执行的上下文中，语句执行失败时随上下文一起释放，不会残留在连接上
+@event.listens_for(Engine, "before_cursor_execute")
+def _record_start_time(_conn, _cursor, _statement, _parameters, context, _executemany) -> None:
+    if context is not None:
+        context.query_start_time = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(_conn, cursor, statement, _parameters, context, _executemany) -> None:
+    start_time = getattr(context, "query_start_time", None)
+    if start_time is None:
+        return
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    shape = normalize_statement(statement)
+    rowcount = cursor.rowcount
+    request_stats = query_stats_ctxvar.get()
+    if request_stats is not None:
+        request_stats.record(shape, elapsed_ms)
+    for stats in _collectors:
+        stats.record(shape, elapsed_ms)
+    shape_stats.record(shape, elapsed_ms, rowcount)
+    log_slow_query(shape, elapsed_ms, rowcount)
+
+
+def log_slow_query(shape: str, elapsed_ms: float, rowcount: int) -> None:
+    """记录超过阈值的SQL，未超过阈值的按比例采样，不记录参数"""
+    slow = elapsed_ms >= config.SLOW_QUERY_THRESHOLD_MS
+    if slow or random.random() < config.SLOW_QUERY_SAMPLE_RATE:
+        slow_query_logger.info(f"rt={elapsed_ms:.1f};rows={rowcount};slow={slow};shape={shape}")
+
+
+def log_shape_stats() -> None:
+    shapes = sorted(shape_stats.drain().items(), key=lambda item: item[1].total_ms, reverse=True)
+    for shape, stat in shapes[: config.SLOW_QUERY_STATS_TOP_N]:
+        slow_query_logger.info(
+            f"count={stat.count};totalRt={stat.total_ms:.1f};avgRt={stat.total_ms / stat.count:.1f};"
+            f"maxRt={stat.max_ms:.1f};rows={stat.rows};shape={shape}"
+        )
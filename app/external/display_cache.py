@@ -0,0 +1,137 @@
+import contextvars
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, TypeVar
+
+from app.common.config import config
+from app.common.exception import ServiceError
+from app.external.model import BaseDisplayDataRequest, DisplayDataResponse
+
+logger = logging.getLogger(__name__)
+
+DisplayReq = TypeVar("DisplayReq", bound=BaseDisplayDataRequest)
+DisplayFn = Callable[[DisplayReq], DisplayDataResponse]
+
+# 列表中每个float约占用的内存，包括float对象和列表中的指针
+FLOAT_ITEM_BYTES: int = 32
+
+
+def estimate_display_data_bytes(display_data: DisplayDataResponse) -> int:
+    item_count = len(display_data.x_data) + len(display_data.stimulation)
+    item_count += sum(len(dataset.data) for dataset in display_data.datasets)
+    return item_count * FLOAT_ITEM_BYTES
+
+
+class DisplayDataCache:
+    """
+    按内存预算淘汰的LRU缓存，缓存查看EEG和NeuralSpike的分页数据，并在后台预取相邻页
+    文件修改时间是缓存键的一部分，文件被替换后不会读到旧数据
+    """
+
+    def __init__(self, max_bytes: int, prefetch_workers: int, max_pending_prefetches: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_pending_prefetches = max_pending_prefetches
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[Hashable, tuple[int, DisplayDataResponse]] = OrderedDict()
+        self.total_bytes = 0
+        # 正在预取的页，前台请求同一页时等待预取结果
+        self.pending: dict[Hashable, Future] = {}
+        self.executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="display-prefetch")
+
+    def load_page(self, display: DisplayFn, request: DisplayReq) -> DisplayDataResponse:
+        if self.max_bytes <= 0:
+            return display(request)
+        mtime_ns = get_mtime_ns(request.file_info.path)
+        if mtime_ns is None:
+            return display(request)
+
+        display_data = self.get_or_load(self.page_key(display, request, mtime_ns), display, request)
+        for page_index in (request.page_index + 1, request.page_index - 1):
+            if page_index >= 0:
+                page_request = request.copy(update={"page_index": page_index})
+                self.prefetch(self.page_key(display, page_request, mtime_ns), display, page_request)
+        return display_data
+
+    @staticmethod
+    def page_key(display: DisplayFn, request: DisplayReq, mtime_ns: int) -> Hashable:
+        # 除文件和页码外的参数（窗口、通道、block/segment/analog signal等）序列化后作为键的一部分
+        params = request.json(exclude={"file_info", "page_index"})
+        return display.__name__, request.file_info.id, request.file_info.path, mtime_ns, params, request.page_index
+
+    def get_or_load(self, key: Hashable, display: DisplayFn, request: DisplayReq) -> DisplayDataResponse:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry[1]
+            future = self.pending.get(key)
+        if future is not None:
+            try:
+                return future.result()
+            except ServiceError:
+                # 预取失败时由前台请求重新调用，返回本次请求的错误
+                pass
+        display_data = display(request)
+        self.put(key, display_data)
+        return display_data
+
+    def prefetch(self, key: Hashable, display: DisplayFn, request: DisplayReq) -> None:
+        with self.lock:
+            if key in self.entries or key in self.pending or len(self.pending) >= self.max_pending_prefetches:
+                return
+            # 复制上下文，预取请求沿用当前请求的RequestID
+            context = contextvars.copy_context()
+            try:
+                future = self.executor.submit(context.run, self.load_in_background, key, display, request)
+            except RuntimeError:
+                # 进程退出时线程池已关闭
+                return
+            self.pending[key] = future
+
+    def load_in_background(self, key: Hashable, display: DisplayFn, request: DisplayReq) -> DisplayDataResponse:
+        try:
+            display_data = display(request)
+            self.put(key, display_data)
+            return display_data
+        except ServiceError as e:
+            # 超出最后一页等错误只影响预取
+            logger.info(f"prefetch display data failed, page_index={request.page_index}, msg={e.message_id}")
+            raise
+        except Exception:
+            # 异常保存在future中，没有等待该页的请求时不会被记录
+            logger.exception(f"prefetch display data error, page_index={request.page_index}")
+            raise
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    def put(self, key: Hashable, display_data: DisplayDataResponse) -> None:
+        size = estimate_display_data_bytes(display_data)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if (old_entry := self.entries.pop(key, None)) is not None:
+                self.total_bytes -= old_entry[0]
+            self.entries[key] = (size, display_data)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (evicted_size, _) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_mtime_ns(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+display_data_cache = DisplayDataCache(
+    config.DISPLAY_CACHE_MAX_BYTES, config.DISPLAY_PREFETCH_WORKERS, config.DISPLAY_PREFETCH_MAX_PENDING
+)
@@ -0,0 +1,55 @@
+import bisect
+from itertools import pairwise
+from typing import Sequence
+
+from app.external.model import DisplayDataResponse
+
+
+def bucket_bounds(length: int, bucket_count: int) -> list[int]:
+    return [i * length // bucket_count for i in range(bucket_count + 1)]
+
+
+def downsample_min_max(values: Sequence[float], bounds: list[int]) -> list[float]:
+    """每个桶保留最小值和最大值，按在桶中出现的先后顺序排列，保留信号的包络和尖峰"""
+    result = []
+    for start, end in pairwise(bounds):
+        bucket = values[start:end]
+        if not bucket:
+            continue
+        low, high = min(bucket), max(bucket)
+        if bucket.index(low) <= bucket.index(high):
+            result += (low, high)
+        else:
+            result += (high, low)
+    return result
+
+
+def downsample_stimulation(stimulation: Sequence[int], bounds: list[int]) -> list[int]:
+    """刺激标记为采样点下标，映射为所在桶的第一个点的下标，同一个桶中的标记合并"""
+    positions = (2 * (bisect.bisect_right(bounds, index) - 1) for index in stimulation if 0 <= index < bounds[-1])
+    return list(dict.fromkeys(positions))
+
+
+def downsample_display_data(display_data: DisplayDataResponse, max_points: int | None) -> DisplayDataResponse:
+    """
+    按目标点数对每个通道做min/max分桶降采样，每个桶输出2个点，返回的点数不超过max_points
+    所有通道共用x_data，每个桶的x取桶中第一个和最后一个采样点的x
+    """
+    point_count = len(display_data.x_data)
+    if max_points is None or point_count <= max_points:
+        return display_data
+
+    bucket_count = max_points // 2
+    bounds = bucket_bounds(point_count, bucket_count)
+    x_data = []
+    for start, end in pairwise(bounds):
+        if start < end:
+            x_data += (display_data.x_data[start], display_data.x_data[end - 1])
+
+    datasets = []
+    for dataset in display_data.datasets:
+        dataset_bounds = bounds if len(dataset.data) == point_count else bucket_bounds(len(dataset.data), bucket_count)
+        datasets.append(dataset.copy(update={"data": downsample_min_max(dataset.data, dataset_bounds)}))
+    return DisplayDataResponse.construct(
+        x_data=x_data, stimulation=downsample_stimulation(display_data.stimulation, bounds), datasets=datasets
+    )
@@ -0,0 +1,208 @@
+"""
+在进程内读取EDF/EDF+/BDF文件，代替算法服务查看EEG数据和获取channel列表
+头部只解析一次，数据记录通过mmap按需读取，只复制请求的channel和时间窗口
+"""
+
+import functools
+import math
+import mmap
+import os
+import sys
+from array import array
+from typing import NamedTuple
+
+from app.common.exception import ServiceError
+from app.external.model import DisplayDataResponse, DisplayEEGRequest, FileInfo, FileType
+
+HEADER_BYTES: int = 256
+# 每个信号头部字段的长度，按EDF规范的顺序排列
+SIGNAL_FIELD_BYTES: list[tuple[str, int]] = [
+    ("label", 16),
+    ("transducer", 80),
+    ("physical_dimension", 8),
+    ("physical_min", 8),
+    ("physical_max", 8),
+    ("digital_min", 8),
+    ("digital_max", 8),
+    ("prefiltering", 80),
+    ("samples_per_record", 8),
+    ("reserved", 32),
+]
+ANNOTATION_LABELS: set[str] = {"EDF Annotations", "BDF Annotations"}
+MAX_VALUE_DECIMALS: int = 6
+
+
+class EdfSignal(NamedTuple):
+    label: str
+    unit: str
+    samples_per_record: int
+    # 在数据记录中的字节偏移
+    offset: int
+    # 物理值 = 数字值 * gain + bias
+    gain: float
+    bias: float
+    value_decimals: int
+
+
+class EdfHeader(NamedTuple):
+    sample_bytes: int
+    header_bytes: int
+    record_count: int
+    record_seconds: float
+    record_bytes: int
+    signals: list[EdfSignal]
+
+    def get_signal(self, label: str) -> EdfSignal:
+        for signal in self.signals:
+            if signal.label == label:
+                return signal
+        raise ServiceError.params_error(f"channel {label} not found")
+
+
+def is_local_readable(file_info: FileInfo) -> bool:
+    return file_info.type in (FileType.EDF, FileType.BDF)
+
+
+def read_eeg_channels(file_info: FileInfo) -> list[str]:
+    return [signal.label for signal in read_header(file_info.path).signals]
+
+
+def read_eeg_display_data(request: DisplayEEGRequest) -> DisplayDataResponse:
+    header = read_header(request.file_info.path)
+    signals = [header.get_signal(label) for label in request.channels] if request.channels else header.signals
+    if not signals:
+        raise ServiceError.params_error("no channel to display")
+
+    start_seconds = request.window * request.page_index
+    end_seconds = start_seconds + request.window
+    duration = header.record_count * header.record_seconds
+    if start_seconds >= duration:
+        raise ServiceError.params_error(f"page_index {request.page_index} out of range")
+
+    with open(request.file_info.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        datasets = []
+        x_data = []
+        for signal in signals:
+            sample_rate = signal.samples_per_record / header.record_seconds
+            start = math.floor(start_seconds * sample_rate)
+            end = min(math.floor(end_seconds * sample_rate), header.record_count * signal.samples_per_record)
+            digital_values = read_digital_values(data, header, signal, start, end)
+            values = [value * signal.gain + signal.bias for value in digital_values]
+            datasets.append(
+                DisplayDataResponse.Dataset.construct(
+                    name=signal.label, data=values, unit=signal.unit, value_decimals=signal.value_decimals
+                )
+            )
+            if not x_data:
+                x_data = [i / sample_rate for i in range(start, end)]
+    # EDF+的标注通道不作为刺激标记返回
+    return DisplayDataResponse.construct(x_data=x_data, stimulation=[], datasets=datasets)
+
+
+def read_digital_values(data: mmap.mmap, header: EdfHeader, signal: EdfSignal, start: int, end: int) -> array:
+    """读取一个信号第start到end个采样点的数字值，只复制跨越的数据记录中该信号的部分"""
+    if start >= end:
+        return decode_samples(b"", header.sample_bytes)
+    chunks = []
+    for record in range(start // signal.samples_per_record, (end - 1) // signal.samples_per_record + 1):
+        record_start = record * signal.samples_per_record
+        first = max(start, record_start) - record_start
+        last = min(end, record_start + signal.samples_per_record) - record_start
+        position = header.header_bytes + record * header.record_bytes + signal.offset
+        chunks.append(data[position + first * header.sample_bytes : position + last * header.sample_bytes])
+    return decode_samples(b"".join(chunks), header.sample_bytes)
+
+
+def decode_samples(raw: bytes, sample_bytes: int) -> array:
+    """EDF为16位、BDF为24位小端补码，BDF的每个采样点扩展为32位，数值为原值的256倍，在gain中除去"""
+    if sample_bytes == 2:
+        values = array("h")
+        values.frombytes(raw)
+    else:
+        widened = bytearray(len(raw) // 3 * 4)
+        for i in range(3):
+            widened[i + 1 :: 4] = raw[i::3]
+        values = array("i")
+        values.frombytes(widened)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def get_value_decimals(gain: float) -> int:
+    if gain == 0:
+        return 0
+    return min(max(math.ceil(-math.log10(abs(gain))), 0), MAX_VALUE_DECIMALS)
+
+
+def read_header(path: str) -> EdfHeader:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise ServiceError.params_error(f"cannot read file {os.path.basename(path)}")
+    return parse_header(path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=128)
+def parse_header(path: str, mtime_ns: int, file_size: int) -> EdfHeader:
+    # 修改时间和大小作为缓存键的一部分，文件被替换后重新解析
+    with open(path, "rb") as f:
+        header = f.read(HEADER_BYTES)
+        try:
+            signal_count = int(header[252:256])
+            signal_header = f.read(signal_count * HEADER_BYTES)
+            return build_header(header, signal_header, signal_count, file_size)
+        except (ValueError, ZeroDivisionError):
+            raise ServiceError.not_supported_file_type(os.path.basename(path))
+
+
+def build_header(header: bytes, signal_header: bytes, signal_count: int, file_size: int) -> EdfHeader:
+    if len(header) < HEADER_BYTES or len(signal_header) < signal_count * HEADER_BYTES:
+        raise ValueError("header truncated")
+    sample_bytes = 3 if header[0] == 0xFF else 2
+    header_bytes = int(header[184:192])
+    record_seconds = float(header[244:252])
+    if record_seconds <= 0:
+        raise ValueError("record duration must be positive")
+
+    fields: dict[str, list[str]] = {}
+    position = 0
+    for name, size in SIGNAL_FIELD_BYTES:
+        fields[name] = [
+            signal_header[position + i * size : position + (i + 1) * size].decode("latin-1").strip()
+            for i in range(signal_count)
+        ]
+        position += signal_count * size
+
+    signals = []
+    offset = 0
+    for i in range(signal_count):
+        samples_per_record = int(fields["samples_per_record"][i])
+        if samples_per_record > 0 and fields["label"][i] not in ANNOTATION_LABELS:
+            physical_min, physical_max = float(fields["physical_min"][i]), float(fields["physical_max"][i])
+            digital_min, digital_max = int(fields["digital_min"][i]), int(fields["digital_max"][i])
+            gain = (physical_max - physical_min) / (digital_max - digital_min)
+            bias = physical_min - digital_min * gain
+            value_decimals = get_value_decimals(gain)
+            if sample_bytes == 3:
+                gain /= 256
+            signals.append(
+                EdfSignal(
+                    fields["label"][i],
+                    fields["physical_dimension"][i],
+                    samples_per_record,
+                    offset,
+                    gain,
+                    bias,
+                    value_decimals,
+                )
+            )
+        offset += samples_per_record * sample_bytes
+
+    record_bytes = offset
+    # 记录数为-1（录制中未写入）或与文件大小不一致时以文件中完整的记录数为准
+    record_count = (file_size - header_bytes) // record_bytes
+    declared_record_count = int(header[236:244])
+    if declared_record_count >= 0:
+        record_count = min(record_count, declared_record_count)
+    return EdfHeader(sample_bytes, header_bytes, record_count, record_seconds, record_bytes, signals)
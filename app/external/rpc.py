@@ -1,8 +1,14 @@
+import functools
+import itertools
 import logging
-from typing import TypeVar
+import threading
+import time
+from typing import Any, TypeVar
 
+import orjson
 import requests
 from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
 
 from app.common.config import config
 from app.common.exception import ServiceError
@@ -24,30 +30,168 @@ logger = logging.getLogger(__name__)
 Req = TypeVar("Req", bound=BaseModel)
 Resp = TypeVar("Resp", bound=BaseModel)
 
-
-def do_rpc(api: str, request: Req, response_model: type[Resp]) -> Resp:
+RESPONSE_CHUNK_SIZE: int = 1024 * 1024
+
+
+class RpcStats:
+    """每个算法服务接口的调用次数和耗时"""
+
+    def __init__(self, api: str) -> None:
+        self.api = api
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_request_id: str | None = None
+
+    def record(self, elapsed_ms: float, success: bool, request_id: str) -> None:
+        with self.lock:
+            self.calls += 1
+            if not success:
+                self.failures += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.last_request_id = request_id
+
+    def record_retry(self) -> None:
+        with self.lock:
+            self.retries += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "api": self.api,
+                "calls": self.calls,
+                "failures": self.failures,
+                "retries": self.retries,
+                "avg_ms": self.total_ms / self.calls if self.calls else 0.0,
+                "max_ms": self.max_ms,
+                "last_request_id": self.last_request_id,
+            }
+
+
+rpc_stats: dict[str, RpcStats] = {}
+rpc_stats_lock = threading.Lock()
+
+
+def get_rpc_stats(api: str) -> RpcStats:
+    with rpc_stats_lock:
+        stats = rpc_stats.get(api)
+        if stats is None:
+            stats = rpc_stats[api] = RpcStats(api)
+        return stats
+
+
+@functools.cache
+def get_rpc_session() -> requests.Session:
+    """进程内共享的Session，连接池中保持keep-alive连接，避免每次调用重新建立TCP连接"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.ALGORITHM_POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    return session
+
+
+def do_rpc(api: str, request: Req, response_model: type[Resp] | Any) -> Resp:
     rpc_url = f"http://{config.ALGORITHM_HOST}{api}"
-    headers = {config.REQUEST_ID_HEADER_KEY: request_id_ctxvar.get()}
-
-    http_response = requests.post(rpc_url, data=request.json(), headers=headers)
-
-    if http_response.status_code != requests.codes.ok:
-        response_type = NoneResponse
-    else:
-        response_type = Response[response_model]
-    response = response_type.parse_obj(http_response.json())
-    if response.code != ResponseCode.SUCCESS:
-        logger.error(f"remote service returns error, code={response.code}, message={response.message}")
-        raise ServiceError.remote_service_error(response.message)
-    return response.data
+    request_id = request_id_ctxvar.get()
+    headers = {config.REQUEST_ID_HEADER_KEY: request_id, "Content-Type": "application/json"}
+    # 只有查询信息的接口是幂等的，可以安全重试
+    max_retries = config.ALGORITHM_MAX_RETRIES if api.startswith("/info/") else 0
+    stats = get_rpc_stats(api)
+
+    start_time = time.perf_counter()
+    success = False
+    try:
+        status_code, content = post_with_retry(rpc_url, request.json(), headers, max_retries, stats)
+        try:
+            response_json = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            logger.error(f"remote service returns invalid json, {api=}, {status_code=}, msg={e}")
+            raise ServiceError.remote_service_error("invalid response")
+
+        if status_code != requests.codes.ok:
+            response_type = NoneResponse
+        else:
+            response_type = Response[response_model]
+        response = response_type.parse_obj(response_json)
+        if response.code != ResponseCode.SUCCESS:
+            logger.error(f"remote service returns error, code={response.code}, message={response.message}")
+            raise ServiceError.remote_service_error(response.message)
+        success = True
+        return response.data
+    finally:
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        stats.record(elapsed_ms, success, request_id)
+        logger.info(f"rpc {api=}, {request_id=}, rt={elapsed_ms:.0f}ms, {success=}")
+
+
+def post_with_retry(
+    url: str, data: str, headers: dict[str, str], max_retries: int, stats: RpcStats
+) -> tuple[int, bytes]:
+    timeout = (config.ALGORITHM_CONNECT_TIMEOUT_SECONDS, config.ALGORITHM_READ_TIMEOUT_SECONDS)
+    for attempt in itertools.count():
+        try:
+            with get_rpc_session().post(url, data=data, headers=headers, timeout=timeout, stream=True) as response:
+                return response.status_code, read_content(response)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= max_retries:
+                logger.error(f"call remote service error, {url=}, {attempt=}, msg={e}")
+                raise ServiceError.remote_service_error("connection failed")
+            stats.record_retry()
+            time.sleep(config.ALGORITHM_RETRY_BACKOFF_SECONDS * 2**attempt)
+        except requests.RequestException as e:
+            logger.error(f"call remote service error, {url=}, msg={e}")
+            raise ServiceError.remote_service_error("request failed")
+
+
+def read_content(response: requests.Response) -> bytes:
+    """分块读取响应，超出ALGORITHM_MAX_RESPONSE_BYTES时中止"""
+    max_bytes = config.ALGORITHM_MAX_RESPONSE_BYTES
+    content_length = response.headers.get("Content-Length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        logger.error(f"remote service response too large, url={response.url}, {content_length=}")
+        raise ServiceError.remote_service_error("response too large")
+
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=RESPONSE_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            logger.error(f"remote service response too large, url={response.url}, {size=}")
+            raise ServiceError.remote_service_error("response too large")
+        chunks.append(chunk)
+    return b"".join(chunks)
 
 
 def display_eeg(request: DisplayEEGRequest) -> DisplayDataResponse:
-    return do_rpc("/display/eeg", request, DisplayDataResponse)
+    return construct_display_data(do_rpc("/display/eeg", request, Any))
 
 
 def display_neural_spike(request: DisplayNeuralSpikeRequest) -> DisplayDataResponse:
-    return do_rpc("/display/neural-spike", request, DisplayDataResponse)
+    return construct_display_data(do_rpc("/display/neural-spike", request, Any))
+
+
+def construct_display_data(data: dict[str, Any]) -> DisplayDataResponse:
+    # 数据点数量很大，以Any接收data，只检查返回的结构，不用pydantic逐个校验数值
+    try:
+        return DisplayDataResponse.construct(
+            x_data=data["x_data"],
+            stimulation=data["stimulation"],
+            datasets=[
+                DisplayDataResponse.Dataset.construct(
+                    name=dataset["name"],
+                    data=dataset["data"],
+                    unit=dataset["unit"],
+                    value_decimals=dataset["value_decimals"],
+                )
+                for dataset in data["datasets"]
+            ],
+        )
+    except (KeyError, TypeError) as e:
+        logger.error(f"remote service returns invalid display data, msg={e!r}")
+        raise ServiceError.remote_service_error("invalid response")
 
 
 def get_eeg_channels(request: GetFileInfoRequest) -> GetEEGChannelsResponse:
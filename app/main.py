@@ -10,9 +10,14 @@ from sqlalchemy.orm import Session
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 from starlette.responses import RedirectResponse
-from starlette.status import HTTP_400_BAD_REQUEST, HTTP_401_UNAUTHORIZED, HTTP_500_INTERNAL_SERVER_ERROR
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_401_UNAUTHORIZED,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 
-from app.api import ApiJsonResponse
+from app.api import ApiJsonResponse, if_none_match_ctxvar, parse_if_none_match, response_etag_ctxvar
 from app.api.algorithm import router as algorithm_router
 from app.api.atlas import router as atlas_router
 from app.api.auth import router as auth_router
@@ -22,6 +27,7 @@ from app.api.eegdata import router as eeg_data_router
 from app.api.experiment import router as experiment_router
 from app.api.file import router as file_router
 from app.api.human_subject import router as human_subject_router
+from app.api.monitor import router as monitor_router
 from app.api.notification import router as notification_router
 from app.api.paradigm import router as paradigm_router
 from app.api.species import router as species_router
@@ -35,11 +41,15 @@ from app.common.log import ACCESS_LOGGER_NAME, log_queue_listener, request_id_ct
 from app.common.schedule import repeat_task
 from app.common.user_auth import AccessLevel, hash_password
 from app.common.util import generate_request_id
-from app.db import check_database_is_up_to_date, new_db_session
+from app.db import async_engine, async_replica_engines, check_database_is_up_to_date, new_db_session
+from app.db.cache import cache_invalidation_listener
 from app.db.crud import send_heartbeat
 from app.db.crud.experiment import insert_or_update_experiment
 from app.db.crud.human_subject import get_next_human_subject_index, insert_human_subject_index
 from app.db.crud.user import insert_or_update_user
+from app.db.pool_stats import get_max_pool_wait_seconds
+from app.db.query_stats import QueryStats, log_shape_stats, query_stats_ctxvar
+from app.external.display_cache import display_data_cache
 from app.model.enum_filed import ExperimentType
 from app.model.response import NoneResponse, ResponseCode
 from app.model.schema import UserCreate
@@ -47,6 +57,9 @@ from app.model.schema import UserCreate
 app_logger = logging.getLogger(__name__)
 access_logger = logging.getLogger(ACCESS_LOGGER_NAME)
 
+# 连接池繁忙时仍需响应的接口，用于排查问题
+ADMISSION_EXEMPT_PATHS = {"/api/getDatabasePoolStats"}
+
 app = FastAPI(
     title="ZJBrainSciencePlatform",
     description="之江实验室 Brain Science 平台",
@@ -62,6 +75,7 @@ app = FastAPI(
         {"name": "dataset"},
         {"name": "eeg_data"},
         {"name": "species"},
+        {"name": "monitor"},
     ],
     debug=config.DEBUG_MODE,
 )
@@ -80,6 +94,7 @@ app.include_router(atlas_router)
 app.include_router(dataset_router)
 app.include_router(eeg_data_router)
 app.include_router(species_router)
+app.include_router(monitor_router)
 app.add_middleware(
     CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]
 )
@@ -91,6 +106,11 @@ def start_log_queue() -> None:
     log_queue_listener.start()
 
 
+@app.on_event("startup")
+def start_cache_invalidation_listener() -> None:
+    cache_invalidation_listener.start()
+
+
 @app.on_event("startup")
 def check_database_up_to_date() -> None:
     if not check_database_is_up_to_date():
@@ -105,35 +125,93 @@ def init_db_data():
         init_default_human_subject_index(db)
 
 
+# 心跳用于保持本worker连接池中的连接，每个worker都需要执行
 @app.on_event("startup")
-@repeat_task(config.DATABASE_HEARTBEAT_INTERVAL_SECONDS)
+@repeat_task(config.DATABASE_HEARTBEAT_INTERVAL_SECONDS, jitter_seconds=config.SCHEDULE_JITTER_SECONDS)
 def database_heartbeat() -> None:
     with new_db_session() as db:
         send_heartbeat(db)
 
 
+@app.on_event("startup")
+@repeat_task(config.SLOW_QUERY_STATS_INTERVAL_SECONDS)
+def dump_query_shape_stats() -> None:
+    log_shape_stats()
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine() -> None:
+    await async_engine.dispose()
+    for async_replica_engine in async_replica_engines:
+        await async_replica_engine.dispose()
+
+
+@app.on_event("shutdown")
+def stop_cache_invalidation_listener() -> None:
+    cache_invalidation_listener.stop()
+
+
+@app.on_event("shutdown")
+def stop_display_prefetch() -> None:
+    display_data_cache.shutdown()
+
+
 @app.on_event("shutdown")
 def stop_log_queue() -> None:
     log_queue_listener.stop()
 
 
+@app.middleware("http")
+async def admission_control(request: Request, call_next: Callable):
+    """数据库连接池等待过久时快速拒绝新请求，避免请求在线程池中堆积"""
+    wait_threshold = config.DATABASE_POOL_ADMISSION_WAIT_SECONDS
+    if wait_threshold > 0 and request.url.path not in ADMISSION_EXEMPT_PATHS:
+        max_wait_seconds = get_max_pool_wait_seconds()
+        if max_wait_seconds > wait_threshold:
+            app_logger.warning(f"reject request for database pool busy, api={request.url.path}, {max_wait_seconds=}")
+            response = exception_response(HTTP_503_SERVICE_UNAVAILABLE, ResponseCode.SERVER_BUSY, "server busy")
+            response.headers["Retry-After"] = str(config.DATABASE_POOL_RETRY_AFTER_SECONDS)
+            return response
+    return await call_next(request)
+
+
 @app.middleware("http")
 async def log_access_api(request: Request, call_next: Callable):
     start_time = datetime.now()
     request_id = generate_request_id()
     request_id_ctxvar.set(request_id)
+    query_stats = QueryStats()
+    query_stats_ctxvar.set(query_stats)
     request.state.access_info = {"requestId": request_id, "method": request.method, "api": request.url.path}
 
     response = await call_next(request)
 
     rt = datetime.now() - start_time
-    request.state.access_info.update(code=response.status_code, rt=int(rt.total_seconds() * 1000))
+    request.state.access_info.update(
+        code=response.status_code,
+        rt=int(rt.total_seconds() * 1000),
+        sqlCount=query_stats.count,
+        sqlRt=int(query_stats.total_ms),
+    )
     log_message = ";".join(f"{key}={value}" for key, value in request.state.access_info.items())
     access_logger.info(log_message)
+    for shape, count in query_stats.repeated_shapes(config.SQL_REPEAT_WARNING_THRESHOLD):
+        app_logger.warning(f"possible N+1 query, {count=}, statement={shape}")
 
     return response
 
 
+@app.middleware("http")
+async def parse_if_none_match_header(request: Request, call_next: Callable):
+    """GET请求生成ETag，If-None-Match匹配时返回304"""
+    if request.method == "GET":
+        if_none_match_ctxvar.set(parse_if_none_match(request.headers.get("If-None-Match")))
+    else:
+        if_none_match_ctxvar.set(None)
+    response_etag_ctxvar.set(None)
+    return await call_next(request)
+
+
 @app.middleware("http")
 async def filter_blank_query_params(request: Request, call_next: Callable):
     """去除空的参数，避免非str的可选参数解析失败"""
@@ -178,7 +256,7 @@ def handle_unexpected_exception(_request: Request, e: Exception):
 def exception_response(status_code: int, response_code: int, message_id: str, *format_args: Any) -> ApiJsonResponse:
     message = translate_message(message_id, *format_args)
     return ApiJsonResponse(
-        status_code=status_code, content=NoneResponse(code=response_code, message=message, data=None).dict()
+        status_code=status_code, content=NoneResponse(code=response_code, message=message, data=None)
     )
 
 
@@ -0,0 +1,88 @@
+"""
+DisplayDataResponse的二进制列式编码，请求头Accept包含application/x-zjbs-columnar时使用
+
+格式：4字节小端uint32头部长度 + JSON头部 + 填充到8字节对齐 + 数组数据
+头部中每个数组记录dtype、相对数组数据起始位置的offset和元素个数length，数组按8字节对齐，前端可直接创建TypedArray
+量化的数组实际值为整数乘以scale
+"""
+
+import struct
+import sys
+from array import array
+from typing import Any, Iterable, Sequence
+
+import orjson
+
+from app.external.model import DisplayDataResponse
+
+COLUMNAR_MEDIA_TYPE: str = "application/x-zjbs-columnar"
+
+# array的类型码和对应的dtype名称，'i'在支持的平台上均为4字节
+FLOAT32 = ("f", "float32")
+INT16 = ("h", "int16")
+INT32 = ("i", "int32")
+INT_RANGES = [(INT16, -(2**15), 2**15 - 1), (INT32, -(2**31), 2**31 - 1)]
+ALIGNMENT = 8
+
+
+def accepts_columnar(accept: str | None) -> bool:
+    return accept is not None and COLUMNAR_MEDIA_TYPE in accept
+
+
+class ColumnarWriter:
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.offset = 0
+
+    def add(self, typecode_dtype: tuple[str, str], values: Iterable[float | int], **extra: Any) -> dict[str, Any]:
+        typecode, dtype = typecode_dtype
+        values = array(typecode, values)
+        if sys.byteorder == "big":
+            values.byteswap()
+        data = values.tobytes()
+        info = {"dtype": dtype, "offset": self.offset, "length": len(values), **extra}
+        self.write(data)
+        return info
+
+    def write(self, data: bytes) -> None:
+        self.chunks.append(data)
+        self.offset += len(data)
+        if padding := -self.offset % ALIGNMENT:
+            self.chunks.append(bytes(padding))
+            self.offset += padding
+
+
+def quantize(values: Sequence[float], decimals: int) -> tuple[tuple[str, str], list[int]] | None:
+    """按value_decimals转为整数，能放入int16或int32时返回，含NaN、无穷或超出范围时返回None"""
+    if decimals < 0:
+        return None
+    scale = 10**decimals
+    try:
+        ints = [round(value * scale) for value in values]
+    except (ValueError, OverflowError):
+        return None
+    low, high = (min(ints), max(ints)) if ints else (0, 0)
+    for typecode_dtype, min_value, max_value in INT_RANGES:
+        if min_value <= low and high <= max_value:
+            return typecode_dtype, ints
+    return None
+
+
+def encode_display_data(display_data: DisplayDataResponse, envelope: dict[str, Any]) -> bytes:
+    writer = ColumnarWriter()
+    x_data = writer.add(FLOAT32, display_data.x_data)
+    datasets = []
+    for dataset in display_data.datasets:
+        meta = {"name": dataset.name, "unit": dataset.unit, "value_decimals": dataset.value_decimals}
+        quantized = quantize(dataset.data, dataset.value_decimals)
+        if quantized is None:
+            datasets.append(writer.add(FLOAT32, dataset.data, **meta))
+        else:
+            typecode_dtype, ints = quantized
+            datasets.append(writer.add(typecode_dtype, ints, scale=10**-dataset.value_decimals, **meta))
+
+    header = orjson.dumps(
+        envelope | {"x_data": x_data, "stimulation": list(display_data.stimulation), "datasets": datasets}
+    )
+    header_padding = bytes(-(4 + len(header)) % ALIGNMENT)
+    return b"".join([struct.pack("<I", len(header)), header, header_padding, *writer.chunks])
@@ -73,10 +73,12 @@ def orm_2_dict(orm: OrmModel, *, include: set[str] | None = None, exclude: set[s
     }
 
 
-def experiment_orm_2_response(experiment: Experiment) -> ExperimentResponse:
+def experiment_orm_2_response(
+    experiment: Experiment, assistant_ids: Iterable[int], users: dict[int, UserInfo]
+) -> ExperimentResponse:
     return ExperimentResponse(
-        main_operator=user_orm_2_info(experiment.main_operator_obj),
-        assistants=map_list(user_orm_2_info, experiment.assistants),
+        main_operator=users[experiment.main_operator],
+        assistants=[users[assistant_id] for assistant_id in assistant_ids],
         tags=map_list(lambda tag: tag.tag, experiment.tags),
         **orm_2_dict(experiment, exclude={"main_operator"}),
     )
@@ -86,9 +88,9 @@ def experiment_orm_2_simple_response(experiment: Experiment) -> ExperimentSimple
     return ExperimentSimpleResponse(tags=map_list(lambda tag: tag.tag, experiment.tags), **orm_2_dict(experiment))
 
 
-def paradigm_orm_2_response(paradigm: Paradigm) -> ParadigmResponse:
+def paradigm_orm_2_response(paradigm: Paradigm, users: dict[int, UserInfo]) -> ParadigmResponse:
     return ParadigmResponse(
-        creator=UserInfo.from_orm(paradigm.creator_obj),
+        creator=users[paradigm.creator],
         images=map_list(lambda orm_file: orm_file.id, paradigm.exist_virtual_files),
         **ParadigmInDB.from_orm(paradigm).dict(exclude={"creator"}),
     )
@@ -154,10 +156,8 @@ def user_orm_2_response(user: User) -> UserResponse:
     )
 
 
-def notification_orm_2_response(notification: Notification) -> NotificationResponse:
-    return NotificationResponse(
-        **orm_2_dict(notification, exclude={"creator_user"}), creator_name=notification.creator_user.username
-    )
+def notification_orm_2_response(notification: Notification, users: dict[int, UserInfo]) -> NotificationResponse:
+    return NotificationResponse(**orm_2_dict(notification), creator_name=users[notification.creator].username)
 
 
 def task_step_orm_2_info(task_step: TaskStep) -> TaskStepInfo:
@@ -173,7 +173,7 @@ def task_step_orm_2_info(task_step: TaskStep) -> TaskStepInfo:
     )
 
 
-def task_orm_2_info(task: Task) -> TaskInfo:
+def task_orm_2_info(task: Task, users: dict[int, UserInfo]) -> TaskInfo:
     steps = map_list(task_step_orm_2_info, task.steps)
     steps.sort(key=lambda step_info: step_info.index)
     return TaskInfo(
@@ -184,12 +184,12 @@ def task_orm_2_info(task: Task) -> TaskInfo:
         status=task.status,
         start_at=task.start_at,
         end_at=task.end_at,
-        creator=user_orm_2_info(task.creator_obj),
+        creator=users[task.creator],
         steps=steps,
     )
 
 
-def task_orm_2_base_info(task: Task) -> TaskBaseInfo:
+def task_orm_2_base_info(task: Task, users: dict[int, UserInfo]) -> TaskBaseInfo:
     return TaskBaseInfo(
         name=task.name,
         description=task.description,
@@ -198,7 +198,7 @@ def task_orm_2_base_info(task: Task) -> TaskBaseInfo:
         status=task.status,
         start_at=task.start_at,
         end_at=task.end_at,
-        creator=user_orm_2_info(task.creator_obj),
+        creator=users[task.creator],
     )
 
 
@@ -53,6 +53,12 @@ class ExperimentType(StrEnum):
     neuron = "neuron"
 
 
+class PageTotalMode(StrEnum):
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
 class GetExperimentsByPageSortBy(StrEnum):
     START_TIME = "start_time"
     TYPE = "type"
@@ -72,6 +72,8 @@ class BaseDisplayDataRequest(BaseModel):
     file_id: ID
     window: int = Field(ge=0)
     page_index: int = Field(ge=0)
+    # 返回的最大点数，一般为前端绘图区域的像素宽度，超出时按min/max分桶降采样，为空时返回全部采样点
+    max_points: int | None = Field(None, ge=2)
 
 
 class DisplayEEGRequest(BaseDisplayDataRequest):
@@ -22,6 +22,8 @@ class ResponseCode(IntEnum):
     UNAUTHORIZED = 3
     # 会话过期
     SESSION_TIMEOUT = 4
+    # 服务繁忙
+    SERVER_BUSY = 5
 
 
 class Response(GenericModel, Generic[Data]):
@@ -40,8 +42,9 @@ class LoginResponse(BaseModel):
 
 
 class Page(GenericModel, Generic[Model]):
-    total: int
+    total: int | None = Field(title="总数", description="total_mode为none时为空")
     items: list[Model]
+    next_cursor: str | None = Field(None, title="下一页游标", description="为空表示没有下一页")
 
 
 class AccessTokenData(BaseModel):
@@ -12,6 +12,7 @@ from app.model.enum_filed import (
     MaritalStatus,
     NotificationStatus,
     NotificationType,
+    PageTotalMode,
     TaskStatus,
     TaskStepType,
     TaskType,
@@ -35,6 +36,14 @@ class PageParm(BaseModel):
     include_deleted: bool = Field(False)
 
 
+class TotalPageParm(PageParm):
+    total_mode: PageTotalMode = Field(PageTotalMode.exact, description="总数计算方式，exact：精确总数，estimate：估计总数，none：不返回总数")
+
+
+class CursorPageParm(TotalPageParm):
+    cursor: str | None = Field(None, description="分页游标，非空时忽略offset，从上一页返回的next_cursor处继续")
+
+
 class ExperimentIdSearch(BaseModel):
     experiment_id: int | None = Field(None, ge=0)
 
@@ -80,7 +89,7 @@ class UserResponse(UserBase, UserSessionMixin, BaseModelInDB):
         orm_mode = True
 
 
-class UserSearch(PageParm):
+class UserSearch(TotalPageParm):
     username: LongVarchar | None = None
     staff_id: LongVarchar | None = None
     access_level: int | None = Field(None, ge=0)
@@ -106,7 +115,7 @@ class NotificationResponse(NotificationInDB):
     creator_name: str
 
 
-class NotificationSearch(PageParm):
+class NotificationSearch(CursorPageParm):
     notification_type: NotificationType | None = None
     status: NotificationStatus | None = None
     create_time_start: datetime | None = None
@@ -199,7 +208,7 @@ class FileCreate(FileBase):
     pass
 
 
-class FileSearch(PageParm, ExperimentIdSearch):
+class FileSearch(CursorPageParm, ExperimentIdSearch):
     name: str = Field("", max_length=255)
     file_type: str = Field("", max_length=255)
 
@@ -261,7 +270,7 @@ class DeviceInfoWithIndex(DeviceInfo):
     index: int | None = Field(ge=1)
 
 
-class DeviceSearch(PageParm, ExperimentIdSearch):
+class DeviceSearch(TotalPageParm, ExperimentIdSearch):
     brand: str | None
     name: str | None
 
@@ -302,11 +311,11 @@ class HumanSubjectResponse(HumanSubjectUpdate, UserNameStaffId):
     pass
 
 
-class HumanSubjectSearch(PageParm, HumanSubjectSearchable, ExperimentIdSearch):
+class HumanSubjectSearch(CursorPageParm, HumanSubjectSearchable, ExperimentIdSearch):
     pass
 
 
-class TaskSourceFileSearch(PageParm):
+class TaskSourceFileSearch(TotalPageParm):
     name: str | None = Field(None, max_length=255)
     file_type: str | None = Field(None, max_length=50)
     experiment_name: str | None = Field(None, max_length=255)
@@ -358,7 +367,7 @@ class TaskInfo(TaskBaseInfo):
     steps: list[TaskStepInfo]
 
 
-class TaskSearch(PageParm):
+class TaskSearch(CursorPageParm):
     name: LongVarchar | None
     type: TaskType | None
     source_file: int | None
@@ -382,7 +391,7 @@ class AtlasUpdate(AtlasCreate, ModelId):
     pass
 
 
-class AtlasSearch(PageParm):
+class AtlasSearch(CursorPageParm):
     name: LongVarchar | None
 
 
@@ -543,7 +552,7 @@ class DatasetInfo(CreateDatasetRequest, BaseModelInDB):
         orm_mode = True
 
 
-class DatasetSearch(PageParm, DatasetBase):
+class DatasetSearch(CursorPageParm, DatasetBase):
     user_id: ID | None
     data_update_year: int | None
     species: str | None
@@ -576,7 +585,7 @@ class UpdateEEGDataRequest(CreateEEGDataRequest, ModelId):
     pass
 
 
-class EEGDataSearch(PageParm):
+class EEGDataSearch(CursorPageParm):
     user_id: ID | None
     data_update_year: int | None
     gender: Gender | None
@@ -596,3 +605,44 @@ class SpeciesInfo(CreateSpeciesRequest, BaseModelInDB):
 
 class UpdateSpeciesRequest(CreateSpeciesRequest, ModelId):
     pass
+
+
+class DatabasePoolStats(BaseModel):
+    name: str = Field(title="数据库引擎名称")
+    size: int = Field(title="连接池大小")
+    checked_in: int = Field(title="空闲连接数")
+    checked_out: int = Field(title="已借出连接数")
+    overflow: int = Field(title="溢出连接数", description="超出连接池大小的连接数，为负数表示连接池未满")
+    waiting: int = Field(title="正在等待连接的数量")
+    oldest_wait_ms: float = Field(title="等待最久的请求已等待的时间")
+    checkouts: int = Field(title="累计借出次数")
+    checkins: int = Field(title="累计归还次数")
+    timeouts: int = Field(title="累计等待超时次数")
+    avg_wait_ms: float = Field(title="平均等待时间")
+    max_wait_ms: float = Field(title="最长等待时间")
+
+
+class ScheduledJobStats(BaseModel):
+    name: str = Field(title="任务名称")
+    interval_in_seconds: float = Field(title="执行间隔")
+    leader_only: bool = Field(title="是否只在leader上执行")
+    runs: int = Field(title="累计执行次数")
+    failures: int = Field(title="累计失败次数")
+    skips: int = Field(title="累计跳过次数", description="不是leader或本次间隔已在其他worker上执行")
+    running: bool = Field(title="是否正在执行")
+    last_duration_ms: float | None = Field(title="上次执行耗时")
+    last_success_at: datetime | None = Field(title="上次成功时间")
+    last_error: str | None = Field(title="上次失败原因")
+
+    class Config:
+        orm_mode = True
+
+
+class RemoteServiceStats(BaseModel):
+    api: str = Field(title="算法服务接口")
+    calls: int = Field(title="累计调用次数")
+    failures: int = Field(title="累计失败次数")
+    retries: int = Field(title="累计重试次数")
+    avg_ms: float = Field(title="平均耗时")
+    max_ms: float = Field(title="最长耗时")
+    last_request_id: str | None = Field(title="最近一次调用的请求ID")
@@ -0,0 +1,80 @@
+"""对比同步Session（线程池）与AsyncSession在并发读请求下的吞吐量和延迟
+$ PYTHONPATH=. python scripts/benchmark_async_db.py --concurrency 200 --requests 5000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable
+
+from anyio import CapacityLimiter, to_thread
+
+from app.db import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.db.crud.notification import get_notification_unread_count
+
+
+def sync_unread_count(user_id: int) -> int:
+    with SessionLocal() as db:
+        return get_notification_unread_count(db, user_id)
+
+
+async def async_unread_count(user_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(get_notification_unread_count, user_id)
+
+
+async def run_benchmark(
+    name: str, request: Callable[[], Awaitable[int]], concurrency: int, total_requests: int
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def timed_request() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed_request() for _ in range(total_requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:>6}: {total_requests / elapsed:8.1f} req/s, p50={p50:.1f}ms, p99={p99:.1f}ms")
+
+
+async def main(args: argparse.Namespace) -> None:
+    # 与Starlette线程池默认的40个线程保持一致
+    limiter = CapacityLimiter(args.threads)
+
+    async def sync_request() -> int:
+        return await to_thread.run_sync(sync_unread_count, args.user_id, limiter=limiter)
+
+    async def async_request() -> int:
+        return await async_unread_count(args.user_id)
+
+    # 预热连接池
+    await sync_request()
+    await async_request()
+
+    await run_benchmark("sync", sync_request, args.concurrency, args.requests)
+    await run_benchmark("async", async_request, args.concurrency, args.requests)
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=100, help="concurrent requests")
+    parser.add_argument("--requests", type=int, default=2000, help="total requests of each path")
+    parser.add_argument("--threads", type=int, default=40, help="thread pool size of sync path")
+    parser.add_argument("--user-id", type=int, default=1, help="user id to query unread notifications")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
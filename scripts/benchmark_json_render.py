@@ -0,0 +1,109 @@
+"""对比标准库json与orjson渲染大响应的耗时
+$ PYTHONPATH=. python scripts/benchmark_json_render.py --files 10000 --channels 64 --points 5000
+"""
+
+import argparse
+import json
+import time
+from datetime import date, datetime
+from json import JSONEncoder
+from typing import Any, Callable
+
+from app.api import ApiJsonResponse
+from app.common.util import now
+from app.external.model import DisplayDataResponse
+from app.model.response import Page, Response
+from app.model.schema import FileResponse
+
+
+class StdlibApiJsonEncoder(JSONEncoder):
+    # 改造前ApiJsonResponse使用的编码器
+    def default(self, o: Any) -> Any:
+        match o:
+            case datetime():
+                return o.strftime("%Y-%m-%d %H:%M:%S")
+            case date():
+                return o.strftime("%Y-%m-%d")
+            case _:
+                return super().default(o)
+
+
+def render_before(data: Any) -> bytes:
+    content = Response(data=data, message="success").dict()
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), cls=StdlibApiJsonEncoder
+    ).encode("UTF-8")
+
+
+def render_after(data: Any) -> bytes:
+    return ApiJsonResponse(Response(data=data, message="success")).body
+
+
+def build_file_page(file_count: int) -> Page[FileResponse]:
+    current_time = now()
+    items = [
+        FileResponse(
+            id=i,
+            gmt_create=current_time,
+            gmt_modified=current_time,
+            is_deleted=False,
+            experiment_id=1,
+            paradigm_id=None,
+            name=f"file_{i}.edf",
+            file_type="edf",
+            size=1.5,
+            is_original=True,
+            url=None,
+        )
+        for i in range(file_count)
+    ]
+    return Page(total=file_count, items=items, next_cursor=None)
+
+
+def build_display_data(channel_count: int, point_count: int) -> DisplayDataResponse:
+    x_data = [i / 1000 for i in range(point_count)]
+    datasets = [
+        DisplayDataResponse.Dataset(
+            name=f"channel_{channel}",
+            data=[(channel * i % 997) / 7 for i in range(point_count)],
+            unit="uV",
+            value_decimals=3,
+        )
+        for channel in range(channel_count)
+    ]
+    return DisplayDataResponse(x_data=x_data, stimulation=[], datasets=datasets)
+
+
+def run_benchmark(name: str, render: Callable[[Any], bytes], data: Any, repeat: int) -> float:
+    render(data)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = render(data)
+    elapsed_ms = (time.perf_counter() - start) / repeat * 1000
+    print(f"{name:>24}: {elapsed_ms:8.2f}ms, {len(body) / 1024 / 1024:.2f}MB")
+    return elapsed_ms
+
+
+def main(args: argparse.Namespace) -> None:
+    payloads = {
+        "Page[FileResponse]": build_file_page(args.files),
+        "DisplayDataResponse": build_display_data(args.channels, args.points),
+    }
+    for payload_name, data in payloads.items():
+        assert json.loads(render_before(data)) == json.loads(render_after(data))
+        before_ms = run_benchmark(f"{payload_name} before", render_before, data, args.repeat)
+        after_ms = run_benchmark(f"{payload_name} after", render_after, data, args.repeat)
+        print(f"{payload_name} speedup: {before_ms / after_ms:.1f}x")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=10000, help="items of file page")
+    parser.add_argument("--channels", type=int, default=64, help="channels of display data")
+    parser.add_argument("--points", type=int, default=5000, help="points of each channel")
+    parser.add_argument("--repeat", type=int, default=10, help="render times of each payload")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,57 @@
+"""对比每次请求新建Redis客户端与共享连接池在鉴权路径（读取用户权限缓存）上的吞吐量和延迟
+$ PYTHONPATH=. python scripts/benchmark_redis_auth.py --threads 40 --requests 20000
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from redis import Redis
+
+from app.common.config import config
+from app.db.cache import USER_ACCESS_LEVEL_FORMAT, get_redis, get_redis_pool
+
+
+def new_client_per_request() -> Redis:
+    # 改造前Context.__init__中的写法，每个请求新建客户端和连接池
+    return Redis(host=config.CACHE_HOST, port=config.CACHE_PORT, decode_responses=True)
+
+
+def run_benchmark(name: str, get_client: Callable[[], Redis], user_id: int, threads: int, total_requests: int) -> None:
+    key = USER_ACCESS_LEVEL_FORMAT.format(user_id)
+
+    def timed_request(_index: int) -> float:
+        start = time.perf_counter()
+        get_client().get(key)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = sorted(executor.map(timed_request, range(total_requests)))
+    elapsed = time.perf_counter() - start
+
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:>6}: {total_requests / elapsed:8.1f} req/s, p50={p50:.2f}ms, p99={p99:.2f}ms")
+
+
+def main(args: argparse.Namespace) -> None:
+    # 鉴权路径每个请求读取一次用户权限缓存，是否命中不影响Redis往返次数
+    run_benchmark("before", new_client_per_request, args.user_id, args.threads, args.requests)
+    run_benchmark("after", get_redis, args.user_id, args.threads, args.requests)
+
+    get_redis_pool().disconnect()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=40, help="concurrent threads, same as starlette thread pool")
+    parser.add_argument("--requests", type=int, default=10000, help="total requests of each path")
+    parser.add_argument("--user-id", type=int, default=1, help="user id of cached access level")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -1,4 +1,5 @@
-from typing import Any, Literal, TypeVar
+from contextlib import contextmanager
+from typing import Any, Iterator, Literal, TypeVar
 
 import httpx
 from httpx._client import USE_CLIENT_DEFAULT, TimeoutTypes, UseClientDefault
@@ -6,6 +7,7 @@ from httpx._types import AuthTypes, CookieTypes, HeaderTypes, QueryParamTypes, U
 from pydantic import Json
 from starlette.testclient import TestClient
 
+from app.db.query_stats import QueryStats, collect_query_stats
 from app.main import app
 from app.model.response import LoginResponse, Response
 
@@ -69,3 +71,12 @@ def login(username: str, password: str) -> dict[str, str]:
     token = ro.access_token
     assert token
     return {"Authorization": f"Bearer {token}"}
+
+
+@contextmanager
+def assert_query_budget(max_count: int) -> Iterator[QueryStats]:
+    with collect_query_stats() as stats:
+        yield stats
+    assert (
+        stats.count <= max_count
+    ), f"executed {stats.count} statements > {max_count}, {stats.shape_counts.most_common(3)}"
@@ -1,20 +1,33 @@
-import asyncio
-from test import login
+from test import client, login
+from typing import Iterable
 
+import anyio.from_thread
 import pytest
+from sqlalchemy import Engine, create_engine
 
 import alembic.command
 import alembic.config
 from app.api import encrypt_password
 from app.api.user import ROOT_PASSWORD, ROOT_USERNAME
+from app.db import RoutingSession
+from app.db.orm import Species, User
 from app.main import app
 
 
+@pytest.fixture(scope="session", autouse=True)
+def shared_event_loop() -> None:
+    # 所有请求在同一个事件循环中处理，与生产环境一致，异步数据库连接池中的连接才能跨请求复用
+    with anyio.from_thread.start_blocking_portal(**client.async_backend) as portal:
+        client.portal = portal
+        yield
+        client.portal = None
+
+
 @pytest.fixture(scope="session")
-def run_app_startup_shutdown() -> None:
-    asyncio.run(app.router.startup())
+def run_app_startup_shutdown(shared_event_loop) -> None:
+    client.portal.call(app.router.startup)
     yield
-    asyncio.run(app.router.shutdown())
+    client.portal.call(app.router.shutdown)
 
 
 @pytest.fixture(scope="session")
@@ -26,3 +39,22 @@ def run_alembic_upgrade_head() -> None:
 @pytest.fixture(scope="session")
 def logon_root_headers(run_alembic_upgrade_head, run_app_startup_shutdown) -> dict[str, str]:
     return login(ROOT_USERNAME, encrypt_password(ROOT_PASSWORD))
+
+
+@pytest.fixture(scope="function")
+def sqlite_engine() -> Iterable[Engine]:
+    """内存中的SQLite数据库，只创建不依赖MySQL特性的表，用于不需要启动服务的测试"""
+    engine = create_engine("sqlite://")
+    for table in (Species, User):
+        table.__table__.create(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def sqlite_routing_session(sqlite_engine: Engine) -> type[RoutingSession]:
+    class TestRoutingSession(RoutingSession):
+        primary_engine = sqlite_engine
+        replica_engines = []
+
+    return TestRoutingSession
@@ -1,9 +1,12 @@
-from test import client
+from test import assert_query_budget, client
 from typing import Iterable
 
 import pytest
+from redis import Redis
 
-from app.model.schema import AtlasInfo
+from app.db.cache import ATLAS_VERSION_FORMAT, bump_atlas_version, get_atlas_tree, get_redis, set_atlas_tree
+from app.model.response import Page
+from app.model.schema import AtlasInfo, AtlasRegionTreeInfo
 
 test_atlas = {"name": "test atlas", "url": "https://example.com", "title": "测试脑图谱", "whole_segment_id": 114514}
 
@@ -18,9 +21,10 @@ def created_atlas_id(logon_root_headers: dict[str, str]) -> Iterable[int]:
 
 
 def test_get_atlas_info(created_atlas_id: int, logon_root_headers: dict[str, str]):
-    atlas_info = client.request_with_test(
-        "GET", "/api/getAtlasInfo", AtlasInfo, params={"atlas_id": created_atlas_id}, headers=logon_root_headers
-    )
+    with assert_query_budget(3):
+        atlas_info = client.request_with_test(
+            "GET", "/api/getAtlasInfo", AtlasInfo, params={"atlas_id": created_atlas_id}, headers=logon_root_headers
+        )
     assert atlas_info.id > 0 and not atlas_info.is_deleted
     assert atlas_info.dict(include=set(test_atlas.keys())) == test_atlas
 
@@ -40,3 +44,116 @@ def test_update_atlas(created_atlas_id: int, logon_root_headers: dict[str, str])
     )
     assert atlas_info.id > 0 and not atlas_info.is_deleted
     assert atlas_info.dict(include=set(update_atlas.keys())) == update_atlas
+
+
+def test_get_atlases_by_cursor(logon_root_headers: dict[str, str]):
+    atlas_ids = [
+        client.request_with_test("POST", "/api/createAtlas", int, json=test_atlas, headers=logon_root_headers)
+        for _ in range(3)
+    ]
+    try:
+        params = {"name": test_atlas["name"], "limit": 1}
+        paged_ids = []
+        while True:
+            page = client.request_with_test(
+                "GET", "/api/getAtlasesByPage", Page[AtlasInfo], params=params, headers=logon_root_headers
+            )
+            assert len(page.items) <= 1
+            paged_ids.extend(atlas.id for atlas in page.items)
+            if page.next_cursor is None:
+                break
+            params["cursor"] = page.next_cursor
+        assert paged_ids == sorted(paged_ids)
+        assert set(atlas_ids) <= set(paged_ids)
+    finally:
+        for atlas_id in atlas_ids:
+            client.request_with_test(
+                "DELETE", "/api/deleteAtlas", type(None), headers=logon_root_headers, json={"id": atlas_id}
+            )
+
+
+def test_get_atlas_info_not_modified(created_atlas_id: int, logon_root_headers: dict[str, str]):
+    params = {"atlas_id": created_atlas_id}
+    response = client.get("/api/getAtlasInfo", params=params, headers=logon_root_headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    not_modified_response = client.get(
+        "/api/getAtlasInfo", params=params, headers=logon_root_headers | {"If-None-Match": etag}
+    )
+    assert not_modified_response.status_code == 304
+    assert not_modified_response.headers["ETag"] == etag
+
+    client.request_with_test(
+        "POST",
+        "/api/updateAtlas",
+        type(None),
+        json=test_atlas | {"id": created_atlas_id, "name": "updated atlas"},
+        headers=logon_root_headers,
+    )
+    modified_response = client.get(
+        "/api/getAtlasInfo", params=params, headers=logon_root_headers | {"If-None-Match": etag}
+    )
+    assert modified_response.status_code == 200
+    assert modified_response.headers["ETag"] != etag
+
+
+def test_get_atlas_region_trees_after_update(created_atlas_id: int, logon_root_headers: dict[str, str]):
+    def get_region_trees() -> list[AtlasRegionTreeInfo]:
+        return client.request_with_test(
+            "GET",
+            "/api/getAtlasRegionTrees",
+            list[AtlasRegionTreeInfo],
+            params={"atlas_id": created_atlas_id},
+            headers=logon_root_headers,
+        )
+
+    region = {
+        "atlas_id": created_atlas_id,
+        "region_id": 1,
+        "parent_id": None,
+        "description": "root",
+        "acronym": "R",
+        "label": "root",
+    }
+    root_id = client.request_with_test("POST", "/api/createAtlasRegion", int, json=region, headers=logon_root_headers)
+    assert [tree.region_id for tree in get_region_trees()] == [1]
+    # 第二次读取缓存
+    assert [tree.region_id for tree in get_region_trees()] == [1]
+
+    # 修改后缓存失效
+    child_region = region | {
+        "region_id": 2,
+        "parent_id": root_id,
+        "description": "child",
+        "acronym": "C",
+        "label": "child",
+    }
+    client.request_with_test("POST", "/api/createAtlasRegion", int, json=child_region, headers=logon_root_headers)
+    region_trees = get_region_trees()
+    assert [child.region_id for child in region_trees[0].children] == [2]
+
+
+@pytest.mark.parametrize(
+    "url", ["/api/getAtlasRegionTrees", "/api/getAtlasBehavioralDomainTrees", "/api/getParadigmClassTrees"]
+)
+def test_get_atlas_trees_not_modified_after_cache_flush(url: str, created_atlas_id: int, logon_root_headers):
+    params = {"atlas_id": created_atlas_id}
+    etag = client.get(url, params=params, headers=logon_root_headers).headers["ETag"]
+    not_modified_response = client.get(url, params=params, headers=logon_root_headers | {"If-None-Match": etag})
+    assert not_modified_response.status_code == 304
+
+    # 版本键被清空或淘汰后生成新的版本，之前的ETag不再匹配
+    get_redis().delete(ATLAS_VERSION_FORMAT.format(created_atlas_id))
+    response = client.get(url, params=params, headers=logon_root_headers | {"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_atlas_tree_cache_without_redis():
+    # 连接不上的Redis，读取时回退到数据库构建，修改后更换版本失败也不抛出异常
+    unavailable_cache = Redis(port=1, socket_connect_timeout=0.1)
+    assert get_atlas_tree(unavailable_cache, "region", 1) == (None, None)
+    set_atlas_tree(unavailable_cache, "region", 1, None, "[]")
+    set_atlas_tree(unavailable_cache, "region", 1, "version", "[]")
+    bump_atlas_version(unavailable_cache, 1)
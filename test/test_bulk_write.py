@@ -0,0 +1,21 @@
+from sqlalchemy import Engine, func, select
+from sqlalchemy.orm import Session
+
+from app.db import common_crud
+from app.db.orm import Species
+
+
+def test_bulk_insert_rows_by_chunk(sqlite_engine: Engine):
+    rows = ({"chinese_name": f"物种{i}", "english_name": f"species {i}", "latin_name": f"species_{i}"} for i in range(25))
+    chunk_results = []
+    with Session(sqlite_engine) as db:
+        assert common_crud.bulk_insert_rows(
+            db, Species, rows, commit=True, chunk_size=10, on_chunk=chunk_results.append
+        )
+        assert [chunk_result.row_count for chunk_result in chunk_results] == [10, 10, 5]
+        assert db.execute(select(func.count()).select_from(Species)).scalar() == 25
+
+        # 任一批次失败时整体回滚
+        duplicate_rows = [{"chinese_name": "新物种", "english_name": "new species", "latin_name": "new_species"}] * 2
+        assert not common_crud.bulk_insert_rows(db, Species, duplicate_rows, commit=True, chunk_size=1)
+        assert db.execute(select(func.count()).select_from(Species)).scalar() == 25
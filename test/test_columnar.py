@@ -0,0 +1,41 @@
+import json
+import struct
+from array import array
+
+from app.external.model import DisplayDataResponse
+from app.model.columnar import ALIGNMENT, accepts_columnar, encode_display_data
+
+
+def decode_array(body: bytes, info: dict) -> list[float]:
+    typecode = {"float32": "f", "int16": "h", "int32": "i"}[info["dtype"]]
+    values = array(typecode)
+    values.frombytes(body[info["offset"] : info["offset"] + info["length"] * values.itemsize])
+    return [value * info.get("scale", 1) for value in values]
+
+
+def test_encode_display_data():
+    display_data = DisplayDataResponse(
+        x_data=[0.0, 0.5, 1.0],
+        stimulation=[1],
+        datasets=[
+            DisplayDataResponse.Dataset(name="small", data=[1.25, -2.5, 3.0], unit="uV", value_decimals=2),
+            DisplayDataResponse.Dataset(name="large", data=[1000.5, -0.5, 2.0], unit="uV", value_decimals=3),
+            DisplayDataResponse.Dataset(name="nan", data=[float("nan"), 1.5, 2.0], unit="uV", value_decimals=1),
+        ],
+    )
+    content = encode_display_data(display_data, {"code": 0, "message": "success", "request_id": ""})
+
+    (header_length,) = struct.unpack_from("<I", content)
+    header = json.loads(content[4 : 4 + header_length])
+    body = content[(4 + header_length + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT :]
+    assert header["code"] == 0 and header["stimulation"] == [1]
+    assert decode_array(body, header["x_data"]) == [0.0, 0.5, 1.0]
+    assert [dataset["dtype"] for dataset in header["datasets"]] == ["int16", "int32", "float32"]
+    assert decode_array(body, header["datasets"][0]) == [1.25, -2.5, 3.0]
+    assert decode_array(body, header["datasets"][1]) == [1000.5, -0.5, 2.0]
+    assert decode_array(body, header["datasets"][2])[1:] == [1.5, 2.0]
+    assert all(info["offset"] % ALIGNMENT == 0 for info in [header["x_data"], *header["datasets"]])
+
+    assert accepts_columnar("application/x-zjbs-columnar, application/json")
+    assert not accepts_columnar("application/json")
+    assert not accepts_columnar(None)
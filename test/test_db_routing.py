@@ -0,0 +1,45 @@
+from pathlib import Path
+from typing import Iterable
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from app.db import RoutingSession, common_crud
+from app.db.orm import Species
+
+mouse = {"id": 1, "chinese_name": "小鼠", "english_name": "mouse", "latin_name": "Mus musculus"}
+rat = {"id": 2, "chinese_name": "大鼠", "english_name": "rat", "latin_name": "Rattus norvegicus"}
+
+
+@pytest.fixture(scope="function")
+def routing_session_class(tmp_path: Path) -> Iterable[type[RoutingSession]]:
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine in (primary, replica):
+        Species.__table__.create(engine)
+    # 只有从库中有数据，用于区分查询发往了哪个库
+    with replica.begin() as connection:
+        connection.execute(insert(Species).values(mouse))
+
+    class TestRoutingSession(RoutingSession):
+        primary_engine = primary
+        replica_engines = [replica]
+
+    yield TestRoutingSession
+    primary.dispose()
+    replica.dispose()
+
+
+def test_read_from_replica(routing_session_class: type[RoutingSession]):
+    with routing_session_class() as db:
+        assert common_crud.exists_row(db, Species, id_=mouse["id"])
+        assert common_crud.get_row_by_id(db, Species, mouse["id"]).latin_name == mouse["latin_name"]
+        # 未声明为只读的查询发往主库
+        assert db.execute(select(Species.id)).first() is None
+
+
+def test_read_after_write_from_primary(routing_session_class: type[RoutingSession]):
+    with routing_session_class() as db:
+        common_crud.insert_row(db, Species, rat, commit=True)
+        assert common_crud.exists_row(db, Species, id_=rat["id"])
+        assert not common_crud.exists_row(db, Species, id_=mouse["id"])
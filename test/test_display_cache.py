@@ -0,0 +1,71 @@
+import logging
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.common.exception import ServiceError
+from app.external.display_cache import DisplayDataCache, estimate_display_data_bytes
+from app.external.model import DisplayDataResponse, DisplayEEGRequest, FileInfo, FileType
+from app.external.rpc import construct_display_data
+
+
+def test_display_data_cache_prefetch_and_evict(tmp_path: Path):
+    path = tmp_path / "test.edf"
+    path.write_bytes(b"")
+    loaded_pages = []
+    lock = threading.Lock()
+
+    def display_eeg(request: DisplayEEGRequest) -> DisplayDataResponse:
+        with lock:
+            loaded_pages.append(request.page_index)
+        return DisplayDataResponse(x_data=[float(request.page_index)] * 10, stimulation=[], datasets=[])
+
+    page_bytes = estimate_display_data_bytes(display_eeg(DisplayEEGRequest.construct(page_index=0)))
+    loaded_pages.clear()
+    cache = DisplayDataCache(page_bytes * 3, prefetch_workers=2, max_pending_prefetches=4)
+    file_info = FileInfo(id=1, path=str(path), type=FileType.EDF)
+    request = DisplayEEGRequest(file_info=file_info, window=10, page_index=0, channels=["C3"])
+
+    assert cache.load_page(display_eeg, request).x_data[0] == 0
+    cache.executor.shutdown(wait=True)
+    # 第0页之后预取了第1页，再次查看时从缓存返回
+    assert sorted(loaded_pages) == [0, 1]
+    assert cache.load_page(display_eeg, request.copy(update={"page_index": 1})).x_data[0] == 1
+    assert sorted(loaded_pages) == [0, 1]
+
+    # 超出内存预算时淘汰最久未使用的页
+    for page_index in (2, 3, 4):
+        cache.load_page(display_eeg, request.copy(update={"page_index": page_index}))
+    assert cache.total_bytes <= page_bytes * 3
+    cache.load_page(display_eeg, request)
+    assert loaded_pages.count(0) == 2
+
+
+def test_display_data_cache_log_prefetch_error(tmp_path: Path, caplog: pytest.LogCaptureFixture):
+    path = tmp_path / "test.edf"
+    path.write_bytes(b"")
+
+    def display_eeg(request: DisplayEEGRequest) -> DisplayDataResponse:
+        if request.page_index > 0:
+            raise RuntimeError("broken page")
+        return DisplayDataResponse(x_data=[0.0], stimulation=[], datasets=[])
+
+    cache = DisplayDataCache(1024 * 1024, prefetch_workers=1, max_pending_prefetches=1)
+    file_info = FileInfo(id=1, path=str(path), type=FileType.EDF)
+    request = DisplayEEGRequest(file_info=file_info, window=10, page_index=0, channels=["C3"])
+    with caplog.at_level(logging.ERROR):
+        cache.load_page(display_eeg, request)
+        cache.executor.shutdown(wait=True)
+    # 没有请求等待预取的页，异常也要记录
+    assert "broken page" in caplog.text
+
+
+def test_construct_display_data_invalid_response():
+    dataset = {"name": "ch1", "data": [0.0], "unit": "uV", "value_decimals": 2}
+    display_data = construct_display_data({"x_data": [0.0], "stimulation": [], "datasets": [dataset]})
+    assert display_data.datasets[0].name == "ch1"
+
+    for data in (None, {"x_data": [0.0], "stimulation": []}, {"x_data": [], "stimulation": [], "datasets": [{}]}):
+        with pytest.raises(ServiceError):
+            construct_display_data(data)
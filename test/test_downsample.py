@@ -0,0 +1,24 @@
+from app.external.downsample import downsample_display_data
+from app.external.model import DisplayDataResponse
+
+
+def test_downsample_display_data():
+    data = [float(i % 5) for i in range(100)]
+    data[42] = 100.0
+    display_data = DisplayDataResponse(
+        x_data=[i / 10 for i in range(100)],
+        stimulation=[0, 3, 42, 99],
+        datasets=[DisplayDataResponse.Dataset(name="C3", data=data, unit="uV", value_decimals=1)],
+    )
+
+    assert downsample_display_data(display_data, None) is display_data
+    assert downsample_display_data(display_data, 100) is display_data
+
+    downsampled = downsample_display_data(display_data, 20)
+    assert len(downsampled.x_data) == len(downsampled.datasets[0].data) == 20
+    assert downsampled.x_data[:4] == [0.0, 0.9, 1.0, 1.9]
+    assert downsampled.datasets[0].data[:4] == [0.0, 4.0, 0.0, 4.0]
+    # 尖峰保留在所在的桶中
+    assert max(downsampled.datasets[0].data) == 100.0
+    assert downsampled.datasets[0].data.index(100.0) // 2 == 42 // 10
+    assert downsampled.stimulation == [0, 8, 18]
@@ -0,0 +1,81 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+from app.common.exception import ServiceError
+from app.external.edf_reader import read_eeg_channels, read_eeg_display_data
+from app.external.model import DisplayEEGRequest, FileInfo, FileType
+
+
+def field(value, size: int) -> bytes:
+    return str(value).ljust(size).encode("ascii")
+
+
+def write_edf(path: Path, file_type: FileType, signals: list[dict], record_count: int) -> None:
+    """生成合成EDF/BDF文件，每个信号的数字值为采样点序号"""
+    is_bdf = file_type is FileType.BDF
+    header = (b"\xffBIOSEMI" if is_bdf else field(0, 8)) + field("test", 80) + field("test", 80)
+    header += field("01.01.23", 8) + field("00.00.00", 8) + field(256 * (len(signals) + 1), 8)
+    header += field("24BIT" if is_bdf else "EDF+C", 44) + field(record_count, 8) + field(1, 8)
+    header += field(len(signals), 4)
+    for name, size in [
+        ("label", 16),
+        ("transducer", 80),
+        ("unit", 8),
+        ("physical_min", 8),
+        ("physical_max", 8),
+        ("digital_min", 8),
+        ("digital_max", 8),
+        ("prefiltering", 80),
+        ("samples_per_record", 8),
+        ("reserved", 32),
+    ]:
+        header += b"".join(field(signal.get(name, ""), size) for signal in signals)
+
+    records = bytearray()
+    for record in range(record_count):
+        for signal in signals:
+            samples_per_record = signal["samples_per_record"]
+            for i in range(record * samples_per_record, (record + 1) * samples_per_record):
+                records += struct.pack("<i", i)[:3] if is_bdf else struct.pack("<h", i)
+    path.write_bytes(header + records)
+
+
+def make_signal(label: str, samples_per_record: int) -> dict:
+    return {
+        "label": label,
+        "unit": "uV",
+        "physical_min": -3276.8,
+        "physical_max": 3276.7,
+        "digital_min": -32768,
+        "digital_max": 32767,
+        "samples_per_record": samples_per_record,
+    }
+
+
+@pytest.mark.parametrize("file_type", [FileType.EDF, FileType.BDF])
+def test_read_eeg_display_data(tmp_path: Path, file_type: FileType):
+    path = tmp_path / f"test.{file_type}"
+    annotations = {"label": "EDF Annotations", "digital_min": -32768, "digital_max": 32767, "samples_per_record": 6}
+    write_edf(path, file_type, [make_signal("C3", 4), annotations, make_signal("C4", 2)], record_count=5)
+    file_info = FileInfo(id=1, path=str(path), type=file_type)
+
+    assert read_eeg_channels(file_info) == ["C3", "C4"]
+
+    request = DisplayEEGRequest(file_info=file_info, window=2, page_index=1, channels=["C4", "C3"])
+    display_data = read_eeg_display_data(request)
+    assert display_data.x_data == [2.0, 2.5, 3.0, 3.5]
+    assert [dataset.name for dataset in display_data.datasets] == ["C4", "C3"]
+    assert display_data.datasets[0].data == pytest.approx([0.4, 0.5, 0.6, 0.7])
+    assert display_data.datasets[1].data == pytest.approx([i / 10 for i in range(8, 16)])
+    assert display_data.datasets[1].unit == "uV" and display_data.datasets[1].value_decimals == 1
+
+    # 最后一页不满一个窗口
+    last_page = read_eeg_display_data(request.copy(update={"page_index": 2}))
+    assert last_page.datasets[1].data == pytest.approx([1.6, 1.7, 1.8, 1.9])
+
+    with pytest.raises(ServiceError):
+        read_eeg_display_data(request.copy(update={"page_index": 3}))
+    with pytest.raises(ServiceError):
+        read_eeg_display_data(request.copy(update={"channels": ["Fz"]}))
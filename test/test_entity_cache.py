@@ -0,0 +1,47 @@
+import json
+
+from sqlalchemy import Engine, select
+from sqlalchemy.orm import Session
+
+from app.db import RoutingSession, common_crud, entity_cache
+from app.db.orm import Species
+
+mouse = {"id": 1, "chinese_name": "小鼠", "english_name": "mouse", "latin_name": "Mus musculus"}
+
+
+def test_entity_cache_row_round_trip(sqlite_engine: Engine):
+    with Session(sqlite_engine) as db:
+        common_crud.insert_row(db, Species, mouse, commit=True)
+        row = db.execute(select(Species)).scalar()
+        row_json = json.dumps({attr: entity_cache.dump_value(getattr(row, attr)) for attr in mouse | {"gmt_create": 0}})
+
+    # 从缓存值恢复的对象合并到新的会话中，不发出查询
+    with Session(sqlite_engine) as db:
+        values = entity_cache.load_values(Species, json.loads(row_json))
+        cached_row = entity_cache.attach_row(db, Species, values)
+        assert cached_row.latin_name == mouse["latin_name"]
+        assert cached_row.gmt_create == row.gmt_create
+        assert cached_row in db and not db.dirty
+
+    assert entity_cache.extract_ids(Species, [Species.id == 1]) == [1]
+    assert entity_cache.extract_ids(Species, [Species.is_deleted == False, Species.id.in_([1, 2])]) == [1, 2]
+    assert entity_cache.extract_ids(Species, [Species.latin_name == mouse["latin_name"]]) is None
+
+
+def test_entity_cache_keeps_session_state(sqlite_engine: Engine, sqlite_routing_session: type[RoutingSession]):
+    with sqlite_routing_session() as db:
+        assert not entity_cache.has_writes(db)
+        common_crud.insert_row(db, Species, mouse, commit=True)
+        # 写过的会话读到的行不写入缓存
+        assert entity_cache.has_writes(db)
+
+    with Session(sqlite_engine) as db:
+        row = db.execute(select(Species)).scalar()
+        row.english_name = "house mouse"
+        assert entity_cache.has_writes(db)
+        # 缓存中的旧值不覆盖会话中尚未flush的修改
+        values = {attr.key: getattr(row, attr.key) for attr in Species.__mapper__.column_attrs} | {
+            "english_name": "mouse"
+        }
+        assert entity_cache.attach_row(db, Species, values) is row
+        assert row.english_name == "house mouse"
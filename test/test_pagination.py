@@ -0,0 +1,56 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db import RoutingSession, common_crud
+from app.db.crud import PageTotalCache, query_cursor_pages, query_pages
+from app.db.orm import Species
+
+
+def test_page_total_cache_key_by_statement_and_params():
+    cache = PageTotalCache(max_size=10, expire_seconds=60)
+    base_stmt = select(func.count()).select_from(Species)
+    cache.put(base_stmt.where(Species.chinese_name == "物种1"), 1)
+    assert cache.get(base_stmt.where(Species.chinese_name == "物种1")) == 1
+    assert cache.get(base_stmt.where(Species.chinese_name == "物种2")) is None
+
+    cache.invalidate_table(Species.__tablename__)
+    assert cache.get(base_stmt.where(Species.chinese_name == "物种1")) is None
+
+    disabled_cache = PageTotalCache(max_size=0, expire_seconds=60)
+    disabled_cache.put(base_stmt, 1)
+    assert disabled_cache.get(base_stmt) is None
+
+
+def insert_species(db: Session, count: int) -> None:
+    rows = [
+        {"chinese_name": f"物种{i}", "english_name": f"species {i}", "latin_name": f"species_{i}"} for i in range(count)
+    ]
+    common_crud.bulk_insert_rows(db, Species, rows, commit=True)
+
+
+def test_query_cursor_pages_limit(sqlite_routing_session: type[RoutingSession]):
+    with sqlite_routing_session() as db:
+        insert_species(db, 5)
+        base_stmt = select(Species)
+
+        total, items, next_cursor = query_cursor_pages(db, base_stmt, Species.id, Species.id, 0, 2, None)
+        assert total == 5 and [item.id for item in items] == [1, 2] and next_cursor is not None
+        total, items, next_cursor = query_cursor_pages(db, base_stmt, Species.id, Species.id, 0, 2, next_cursor)
+        assert [item.id for item in items] == [3, 4] and next_cursor is not None
+        total, items, next_cursor = query_cursor_pages(db, base_stmt, Species.id, Species.id, 0, 2, next_cursor)
+        assert [item.id for item in items] == [5] and next_cursor is None
+
+        # limit为0时只返回总数
+        assert query_cursor_pages(db, base_stmt, Species.id, Species.id, 0, 0, None) == (5, [], None)
+
+
+def test_query_pages_limit_zero(sqlite_routing_session: type[RoutingSession]):
+    with sqlite_routing_session() as db:
+        insert_species(db, 5)
+        base_stmt = select(Species)
+
+        # limit为0时没有行带回总数，需要单独查询总数
+        assert query_pages(db, base_stmt, 0, 0) == (5, [])
+        total, items = query_pages(db, base_stmt, 0, 2)
+        assert total == 5 and [item.id for item in items] == [1, 2]
+        assert query_pages(db, base_stmt, 10, 2) == (5, [])
@@ -0,0 +1,565 @@
+import importlib
+import inspect
+import pkgutil
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Callable
+
+import pytest
+from sqlalchemy import delete, event, insert, text
+from sqlalchemy.orm import Session
+
+import app.db.crud as crud
+import app.db.crud.atlas as crud_atlas
+import app.db.crud.dataset as crud_dataset
+import app.db.crud.device as crud_device
+import app.db.crud.eegdata as crud_eegdata
+import app.db.crud.experiment as crud_experiment
+import app.db.crud.file as crud_file
+import app.db.crud.human_subject as crud_human_subject
+import app.db.crud.notification as crud_notification
+import app.db.crud.paradigm as crud_paradigm
+import app.db.crud.task as crud_task
+import app.db.crud.user as crud_user
+from app.common.exception import ServiceError
+from app.db import Base, engine, new_db_session
+from app.db.orm import (
+    Atlas,
+    AtlasBehavioralDomain,
+    AtlasParadigmClass,
+    AtlasRegion,
+    AtlasRegionBehavioralDomain,
+    AtlasRegionLink,
+    AtlasRegionParadigmClass,
+    Dataset,
+    Device,
+    EEGData,
+    Experiment,
+    ExperimentAssistant,
+    ExperimentDevice,
+    ExperimentHumanSubject,
+    ExperimentTag,
+    HumanSubject,
+    Notification,
+    Paradigm,
+    StorageFile,
+    Task,
+    TaskStep,
+    User,
+    VirtualFile,
+)
+from app.model.enum_filed import (
+    ExperimentType,
+    Gender,
+    NotificationStatus,
+    NotificationType,
+    TaskStatus,
+    TaskStepType,
+    TaskType,
+)
+from app.model.schema import (
+    AtlasSearch,
+    DatasetSearch,
+    DeviceSearch,
+    EEGDataSearch,
+    ExperimentSearch,
+    FileSearch,
+    HumanSubjectSearch,
+    NotificationSearch,
+    PageParm,
+    TaskSearch,
+    TaskSourceFileSearch,
+    UserSearch,
+)
+
+# 测试数据的ID从此开始，避免与其他测试创建的数据冲突
+SEED_ID = 1_000_000
+USER_COUNT = 2000
+EXPERIMENT_COUNT = 1000
+ATLAS_COUNT = 20
+ATLAS_REGION_COUNT = 250
+# 数据按以下数量的用户分布，每个用户的数据约占1%
+OWNER_COUNT = 100
+
+USER_ID = SEED_ID
+EXPERIMENT_ID = SEED_ID
+PARADIGM_ID = SEED_ID + 1
+VIRTUAL_FILE_ID = SEED_ID
+TASK_ID = SEED_ID
+ATLAS_ID = SEED_ID
+REGION_ID = 1
+
+IX_NOTIFICATION = "ix_notification_receiver_status_is_deleted_gmt_create"
+IX_VIRTUAL_FILE = "ix_virtual_file_experiment_id_paradigm_id_is_deleted_file_type"
+IX_ATLAS_REGION = "ix_atlas_region_atlas_id_is_deleted"
+IX_STORAGE_FILE = "ix_storage_file_virtual_file_id"
+IX_FILE_PARADIGM = "ix_virtual_file_paradigm_id"
+
+# 检查查询计划的函数名前缀
+CHECKED_FUNCTION_PREFIXES = ("search_", "list_")
+
+
+@dataclass
+class QueryPlanCase:
+    function: Callable[..., Any]
+    args: tuple[Any, ...]
+    # EXPLAIN中的表名或别名到期望使用的索引，多个可接受的索引用集合表示，None表示接受全表扫描
+    keys: dict[str, str | set[str] | None]
+    # 允许filesort的表
+    allow_filesort: set[str] = field(default_factory=set)
+    variant: str = ""
+
+    @property
+    def name(self) -> str:
+        return f"{self.function.__name__}[{self.variant}]" if self.variant else self.function.__name__
+
+
+def case(function: Callable[..., Any], *args: Any, keys: dict, allow_filesort=(), variant: str = "") -> QueryPlanCase:
+    return QueryPlanCase(function, args, keys, set(allow_filesort), variant)
+
+
+QUERY_PLAN_CASES = [
+    case(crud_notification.get_notification_unread_count, USER_ID, keys={"notification": IX_NOTIFICATION}),
+    case(
+        crud_notification.search_notifications,
+        NotificationSearch(status=NotificationStatus.unread),
+        USER_ID,
+        keys={"notification": IX_NOTIFICATION},
+        variant="unread",
+    ),
+    # 不指定状态时无法利用索引中的gmt_create排序
+    case(
+        crud_notification.search_notifications,
+        NotificationSearch(),
+        USER_ID,
+        keys={"notification": IX_NOTIFICATION},
+        allow_filesort={"notification"},
+    ),
+    case(crud_notification.list_recent_unread_notifications, USER_ID, 10, keys={"notification": IX_NOTIFICATION}),
+    case(crud_notification.list_unread_notification_ids, USER_ID, True, [], keys={"notification": IX_NOTIFICATION}),
+    case(crud_file.get_file_extensions, EXPERIMENT_ID, keys={"virtual_file": IX_VIRTUAL_FILE}),
+    # 不指定文件类型时索引中的id无序
+    case(
+        crud_file.search_files,
+        FileSearch(experiment_id=EXPERIMENT_ID),
+        keys={"virtual_file": IX_VIRTUAL_FILE, "storage_file": IX_STORAGE_FILE},
+        allow_filesort={"virtual_file"},
+    ),
+    case(
+        crud_file.get_file_download_info,
+        VIRTUAL_FILE_ID,
+        keys={"virtual_file": "PRIMARY", "storage_file": IX_STORAGE_FILE},
+    ),
+    case(
+        crud_file.get_db_storage_paths,
+        VIRTUAL_FILE_ID,
+        keys={"virtual_file": "PRIMARY", "storage_file": IX_STORAGE_FILE},
+    ),
+    case(
+        crud_file.bulk_get_db_storage_paths,
+        [VIRTUAL_FILE_ID, VIRTUAL_FILE_ID + 1],
+        keys={"virtual_file": "PRIMARY", "storage_file": IX_STORAGE_FILE},
+    ),
+    case(
+        crud_file.get_virtual_file_for_file_info,
+        VIRTUAL_FILE_ID,
+        keys={"virtual_file": "PRIMARY", "storage_file": IX_STORAGE_FILE},
+    ),
+    case(crud_paradigm.get_paradigm_by_id, PARADIGM_ID, keys={"paradigm": "PRIMARY", "virtual_file": IX_FILE_PARADIGM}),
+    case(
+        crud_paradigm.list_paradigm_files, PARADIGM_ID, keys={"paradigm": "PRIMARY", "virtual_file": IX_FILE_PARADIGM}
+    ),
+    case(
+        crud_paradigm.search_paradigms,
+        EXPERIMENT_ID,
+        PageParm(),
+        keys={"paradigm": "experiment_id", "experiment": "PRIMARY", "virtual_file": IX_FILE_PARADIGM},
+    ),
+    case(
+        crud_paradigm.get_paradigm_file_infos,
+        PARADIGM_ID,
+        keys={
+            "experiment": "PRIMARY",
+            "paradigm": "PRIMARY",
+            "virtual_file": IX_FILE_PARADIGM,
+            "storage_file": IX_STORAGE_FILE,
+        },
+    ),
+    case(
+        crud_task.get_steps_by_task_id,
+        TASK_ID,
+        keys={"task": "PRIMARY", "task_step": "ix_task_step_task_id_is_deleted_index"},
+    ),
+    case(crud_task.search_task, TaskSearch(creator=USER_ID), keys={"task": "creator"}),
+    case(
+        crud_task.search_source_files,
+        TaskSourceFileSearch(name="seed"),
+        keys={"virtual_file": "ft_virtual_file_name", "experiment": "PRIMARY"},
+    ),
+    # 全文索引按相关度返回，按id分页需要filesort
+    case(
+        crud_atlas.search_atlases, AtlasSearch(name="seed"), keys={"atlas": "ft_atlas_name"}, allow_filesort={"atlas"}
+    ),
+    case(
+        crud_atlas.get_atlas_region,
+        None,
+        REGION_ID,
+        ATLAS_ID,
+        keys={"atlas_region": IX_ATLAS_REGION, "atlas": "PRIMARY"},
+    ),
+    case(
+        crud_atlas.list_atlas_regions_by_atlas_id, ATLAS_ID, keys={"atlas_region": IX_ATLAS_REGION, "atlas": "PRIMARY"}
+    ),
+    # 连接信息通过脑区缩写关联脑区，缩写上没有索引
+    case(
+        crud_atlas.get_atlas_region_link,
+        None,
+        REGION_ID,
+        ATLAS_ID,
+        keys={
+            "atlas_region_link": "ix_atlas_region_link_atlas_id_link_id",
+            "atlas_region_1": None,
+            "atlas_region_2": None,
+        },
+    ),
+    case(
+        crud_atlas.list_atlas_behavioral_domains_by_atlas_id,
+        ATLAS_ID,
+        keys={"atlas_behavioral_domain": "ix_atlas_behavioral_domain_atlas_id_is_deleted", "atlas": "PRIMARY"},
+    ),
+    case(
+        crud_atlas.list_atlas_region_behavioral_domains,
+        ATLAS_ID,
+        REGION_ID,
+        keys={
+            "atlas_region_behavioral_domain": "ix_atlas_region_behavioral_domain_atlas_id_region_id",
+            "atlas_region": IX_ATLAS_REGION,
+            "atlas": "PRIMARY",
+        },
+    ),
+    case(
+        crud_atlas.list_atlas_paradigm_class_by_atlas_id,
+        ATLAS_ID,
+        keys={"atlas_paradigm_class": "ix_atlas_paradigm_class_atlas_id_is_deleted", "atlas": "PRIMARY"},
+    ),
+    case(
+        crud_atlas.list_atlas_region_paradigm_classes,
+        ATLAS_ID,
+        REGION_ID,
+        keys={
+            "atlas_region_paradigm_class": "ix_atlas_region_paradigm_class_atlas_id_region_id",
+            "atlas_region": IX_ATLAS_REGION,
+            "atlas": "PRIMARY",
+        },
+    ),
+    case(crud_user.get_user_auth_by_staff_id, "seed_staff_1", keys={"user": "ix_user_staff_id"}),
+    case(crud_user.search_users, UserSearch(staff_id="seed_staff_1"), keys={"user": "ft_user_staff_id"}),
+    case(crud_user.list_user_infos, [USER_ID, USER_ID + 1], keys={"user": "PRIMARY"}),
+    case(
+        crud_experiment.get_experiment_by_id, EXPERIMENT_ID, keys={"experiment": "PRIMARY", "experiment_tag": "PRIMARY"}
+    ),
+    case(
+        crud_experiment.search_experiments,
+        ExperimentSearch(),
+        keys={"experiment": "ix_experiment_start_at", "experiment_tag": "PRIMARY"},
+    ),
+    case(
+        crud_experiment.list_experiment_assistants,
+        EXPERIMENT_ID,
+        keys={"experiment": "PRIMARY", "experiment_assistant": "experiment_id", "user": "PRIMARY"},
+    ),
+    case(crud_experiment.list_experiment_assistant_ids, EXPERIMENT_ID, keys={"experiment_assistant": "experiment_id"}),
+    case(
+        crud_experiment.search_experiment_assistants,
+        EXPERIMENT_ID,
+        [USER_ID, USER_ID + 1],
+        keys={"experiment_assistant": {"PRIMARY", "experiment_id"}},
+    ),
+    case(
+        crud_device.search_devices,
+        DeviceSearch(experiment_id=EXPERIMENT_ID),
+        keys={"experiment": "PRIMARY", "experiment_device": "PRIMARY", "device": "PRIMARY"},
+    ),
+    case(crud_dataset.search_datasets, DatasetSearch(user_id=USER_ID), keys={"dataset": "ix_dataset_user_id"}),
+    case(crud_eegdata.search_eegdata, EEGDataSearch(user_id=USER_ID), keys={"eeg_data": "ix_eeg_data_user_id"}),
+    # 从实验的被试关系表开始连接时，按被试ID分页需要filesort
+    case(
+        crud_human_subject.search_human_subjects,
+        HumanSubjectSearch(experiment_id=EXPERIMENT_ID),
+        keys={
+            "experiment": "PRIMARY",
+            "experiment_human_subject": "PRIMARY",
+            "human_subject": {"ix_human_subject_user_id", "PRIMARY"},
+            "user_1": "PRIMARY",
+        },
+        allow_filesort={"experiment_human_subject", "human_subject"},
+    ),
+    case(
+        crud_human_subject.list_experiment_human_subjects,
+        EXPERIMENT_ID,
+        keys={
+            "experiment_human_subject": "PRIMARY",
+            "human_subject": "ix_human_subject_user_id",
+            "experiment": "PRIMARY",
+            "user": "PRIMARY",
+        },
+    ),
+]
+
+
+def seed_rows() -> list[tuple[type[Base], list[dict[str, Any]]]]:
+    """按外键依赖顺序生成测试数据，数据量足够让优化器根据索引选择性选择执行计划"""
+    start_time = datetime(2023, 1, 1)
+    users = [
+        {
+            "id": SEED_ID + i,
+            "username": f"seed_user_{i}",
+            "hashed_password": "-",
+            "staff_id": f"seed_staff_{i}",
+            "access_level": i % 10 * 10,
+        }
+        for i in range(USER_COUNT)
+    ]
+    experiments = [
+        {
+            "id": SEED_ID + i,
+            "name": f"seed_experiment_{i}",
+            "type": ExperimentType.other,
+            "description": "",
+            "location": "",
+            "start_at": start_time + timedelta(hours=i),
+            "end_at": start_time + timedelta(hours=i + 1),
+            "main_operator": SEED_ID + i % OWNER_COUNT,
+        }
+        for i in range(EXPERIMENT_COUNT)
+    ]
+    experiment_tags = [
+        {"experiment_id": SEED_ID + i, "tag": f"tag{j}"} for i in range(EXPERIMENT_COUNT) for j in range(2)
+    ]
+    experiment_assistants = [
+        {"experiment_id": SEED_ID + i, "user_id": SEED_ID + (i * 3 + j) % USER_COUNT}
+        for i in range(EXPERIMENT_COUNT)
+        for j in range(3)
+    ]
+    devices = [{"id": SEED_ID + i, "brand": f"brand_{i}", "name": f"device_{i}", "purpose": ""} for i in range(1000)]
+    experiment_devices = [
+        {"experiment_id": SEED_ID + i, "device_id": SEED_ID + (i * 5 + j) % 1000, "index": j}
+        for i in range(200)
+        for j in range(5)
+    ]
+    # 后一半用户作为被试
+    human_subjects = [
+        {"id": SEED_ID + i, "user_id": SEED_ID + USER_COUNT // 2 + i, "gender": Gender.male}
+        for i in range(USER_COUNT // 2)
+    ]
+    experiment_human_subjects = [
+        {"experiment_id": SEED_ID + i, "user_id": SEED_ID + USER_COUNT // 2 + (i * 5 + j) % (USER_COUNT // 2)}
+        for i in range(200)
+        for j in range(5)
+    ]
+    paradigms = [
+        {
+            "id": SEED_ID + i,
+            "experiment_id": SEED_ID + i % EXPERIMENT_COUNT,
+            "creator": SEED_ID + i % OWNER_COUNT,
+            "description": "",
+        }
+        for i in range(2000)
+    ]
+    virtual_files = [
+        {
+            "id": SEED_ID + i,
+            "experiment_id": SEED_ID + i % EXPERIMENT_COUNT,
+            "paradigm_id": None if i % 2 == 0 else SEED_ID + i // 2 % 2000,
+            "name": f"seed_file_{i}",
+            "file_type": ["edf", "bdf", "fif", "nev"][i % 4],
+            "is_original": True,
+            "size": 1.0,
+        }
+        for i in range(5000)
+    ]
+    storage_files = [
+        {"id": SEED_ID + i, "virtual_file_id": SEED_ID + i, "name": f"seed_file_{i}", "size": 1.0, "storage_path": "-"}
+        for i in range(5000)
+    ]
+    tasks = [
+        {
+            "id": SEED_ID + i,
+            "name": f"seed_task_{i}",
+            "description": "",
+            "source_file": SEED_ID + i % 5000,
+            "type": TaskType.analysis,
+            "status": TaskStatus.done,
+            "creator": SEED_ID + i % OWNER_COUNT,
+        }
+        for i in range(2000)
+    ]
+    task_steps = [
+        {
+            "id": SEED_ID + i * 3 + j,
+            "task_id": SEED_ID + i,
+            "name": "",
+            "type": TaskStepType.analysis,
+            "parameter": "{}",
+            "index": j,
+            "status": TaskStatus.done,
+        }
+        for i in range(2000)
+        for j in range(3)
+    ]
+    notifications = [
+        {
+            "id": SEED_ID + i,
+            "gmt_create": start_time + timedelta(minutes=i),
+            "type": NotificationType.task_step_status,
+            "creator": SEED_ID,
+            "receiver": SEED_ID + i % OWNER_COUNT,
+            "status": NotificationStatus.unread if i % 2 else NotificationStatus.read,
+            "content": "",
+        }
+        for i in range(5000)
+    ]
+    datasets = [{"id": SEED_ID + i, "user_id": SEED_ID + i % OWNER_COUNT, "description": ""} for i in range(2000)]
+    eeg_data = [
+        {
+            "id": SEED_ID + i,
+            "user_id": SEED_ID + i % OWNER_COUNT,
+            "gender": Gender.male,
+            "age": 20 + i % 50,
+            "data_update_year": date(2023, 1, 1),
+        }
+        for i in range(2000)
+    ]
+    atlases = [{"id": SEED_ID + i, "name": f"seed_atlas_{i}", "url": "", "title": ""} for i in range(ATLAS_COUNT)]
+    atlas_component_count = ATLAS_COUNT * ATLAS_REGION_COUNT
+
+    def atlas_component(i: int) -> dict[str, Any]:
+        return {"id": SEED_ID + i, "atlas_id": SEED_ID + i % ATLAS_COUNT}
+
+    atlas_regions = [
+        atlas_component(i)
+        | {"region_id": i // ATLAS_COUNT, "description": "", "acronym": f"R{i}", "label": f"region_{i}"}
+        for i in range(atlas_component_count)
+    ]
+    atlas_region_links = [
+        atlas_component(i) | {"link_id": i // ATLAS_COUNT, "region1": f"R{i}", "region2": f"R{i + 1}"}
+        for i in range(2000)
+    ]
+    tree_nodes = [
+        atlas_component(i) | {"name": f"node_{i}", "value": 0.0, "label": f"node_{i}", "description": ""}
+        for i in range(2000)
+    ]
+    region_values = [
+        atlas_component(i) | {"key": f"key_{i}", "value": 0.0, "region_id": i // ATLAS_COUNT}
+        for i in range(atlas_component_count)
+    ]
+    return [
+        (User, users),
+        (Experiment, experiments),
+        (ExperimentTag, experiment_tags),
+        (ExperimentAssistant, experiment_assistants),
+        (Device, devices),
+        (ExperimentDevice, experiment_devices),
+        (HumanSubject, human_subjects),
+        (ExperimentHumanSubject, experiment_human_subjects),
+        (Paradigm, paradigms),
+        (VirtualFile, virtual_files),
+        (StorageFile, storage_files),
+        (Task, tasks),
+        (TaskStep, task_steps),
+        (Notification, notifications),
+        (Dataset, datasets),
+        (EEGData, eeg_data),
+        (Atlas, atlases),
+        (AtlasRegion, atlas_regions),
+        (AtlasRegionLink, atlas_region_links),
+        (AtlasBehavioralDomain, tree_nodes),
+        (AtlasRegionBehavioralDomain, region_values),
+        (AtlasParadigmClass, tree_nodes),
+        (AtlasRegionParadigmClass, region_values),
+    ]
+
+
+def delete_seed_rows(db: Session, table: type[Base], rows: list[dict[str, Any]]) -> None:
+    if "id" in rows[0]:
+        db.execute(delete(table).where(table.id.in_([row["id"] for row in rows])))
+    else:
+        db.execute(delete(table).where(table.experiment_id.in_({row["experiment_id"] for row in rows})))
+
+
+@pytest.fixture(scope="module")
+def seeded_tables(logon_root_headers) -> None:
+    tables = seed_rows()
+    with new_db_session() as db:
+        for table, rows in reversed(tables):
+            delete_seed_rows(db, table, rows)
+        for table, rows in tables:
+            db.execute(insert(table), rows)
+        db.commit()
+        # 更新统计信息，优化器按真实的行数和索引基数估算
+        for table, _ in tables:
+            db.execute(text(f"ANALYZE TABLE `{table.__tablename__}`"))
+        db.commit()
+
+    yield
+
+    with new_db_session() as db:
+        for table, rows in reversed(tables):
+            delete_seed_rows(db, table, rows)
+        db.commit()
+
+
+def capture_select_statements(db: Session, run: Callable[[Session], Any]) -> list[tuple[str, Any]]:
+    statements = []
+
+    def before_cursor_execute(_conn, _cursor, statement, parameters, _context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run(db)
+    except ServiceError:
+        # 只关心执行过的语句，查询结果为空导致的业务异常可以忽略
+        pass
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def test_query_plan_cases_cover_crud():
+    # crud模块中新增的search_*和list_*函数需要添加到QUERY_PLAN_CASES
+    checked_functions = {case.function.__name__ for case in QUERY_PLAN_CASES}
+    missing_functions = []
+    for module_info in pkgutil.iter_modules(crud.__path__, f"{crud.__name__}."):
+        module = importlib.import_module(module_info.name)
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if inspect.unwrap(function).__module__ != module.__name__:
+                continue
+            if name.startswith(CHECKED_FUNCTION_PREFIXES) and name not in checked_functions:
+                missing_functions.append(f"{module.__name__}.{name}")
+    assert not missing_functions, f"query plan not checked: {missing_functions}"
+
+
+@pytest.mark.parametrize("case", QUERY_PLAN_CASES, ids=lambda case: case.name)
+def test_query_plan(case: QueryPlanCase, seeded_tables):
+    with new_db_session() as db:
+        statements = capture_select_statements(db, lambda session: case.function(session, *case.args))
+        assert statements, "no statement executed"
+        problems = []
+        for statement, parameters in statements:
+            plans = db.connection().exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+            for plan in plans:
+                table = plan["table"]
+                if table is None or table.startswith("<"):
+                    continue
+                if table not in case.keys:
+                    problems.append(f"unexpected table {table} using {plan['key']}: {statement}")
+                    continue
+                expected_key = case.keys[table]
+                expected_keys = expected_key if isinstance(expected_key, set) else {expected_key}
+                if plan["key"] not in expected_keys:
+                    problems.append(f"{table} uses {plan['key']}, expected {expected_key}: {statement}")
+                if "Using filesort" in (plan["Extra"] or "") and table not in case.allow_filesort:
+                    problems.append(f"filesort on {table}: {statement}")
+        assert not problems, "\n".join(problems)
@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import DBAPIError
+
+from app.db.query_stats import collect_query_stats
+
+
+def test_collect_query_stats_after_failed_statement(sqlite_engine: Engine):
+    with collect_query_stats() as stats, sqlite_engine.connect() as connection:
+        with pytest.raises(DBAPIError):
+            connection.execute(text("select * from not_exists"))
+        # 失败的语句不计入统计，也不影响之后语句的耗时
+        connection.execute(text("select 1"))
+        assert stats.count == 1 and stats.total_ms < 1000
+
+
+def test_collect_query_stats_concurrently(sqlite_engine: Engine):
+    def run_queries() -> None:
+        for _ in range(20):
+            # 其他线程同时注册和移除收集器，不影响外层收集器的统计
+            with collect_query_stats(), sqlite_engine.connect() as connection:
+                connection.execute(text("select 1"))
+
+    with collect_query_stats() as stats:
+        threads = [threading.Thread(target=run_queries) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert stats.count == 80
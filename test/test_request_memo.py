@@ -0,0 +1,20 @@
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from app.db import common_crud
+from app.db.memo import get_request_memo
+from app.db.orm import User
+from app.model.schema import UserInfo
+
+
+def test_request_memo_load_users_once(sqlite_engine: Engine):
+    user = {"id": 1, "username": "memo", "staff_id": "memo", "hashed_password": "", "access_level": 0}
+    with Session(sqlite_engine) as db:
+        common_crud.insert_row(db, User, user, commit=True)
+        memo = get_request_memo(db)
+        assert memo.load_users(db, [1, 1, 2]) == {1: UserInfo(id=1, username="memo", staff_id="memo")}
+
+        # 已加载过的用户不再查询
+        User.__table__.drop(sqlite_engine)
+        assert memo.load_users(db, [1, 2]).keys() == {1}
+        assert get_request_memo(db) is memo
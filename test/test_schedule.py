@@ -0,0 +1,91 @@
+from app.common.schedule import ACQUIRE_LEASE_SCRIPT, LEADER_KEY, LeaderLease, try_claim_job_run
+
+LEASE_SECONDS = 30
+JOB_INTERVAL_SECONDS = 60
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeRedis:
+    """按模拟时钟过期的内存Redis，只实现调度用到的命令"""
+
+    def __init__(self, clock: Clock) -> None:
+        self.clock = clock
+        self.values: dict[str, tuple[str, float]] = {}
+
+    def get(self, key: str) -> str | None:
+        value = self.values.get(key)
+        if value is None or value[1] <= self.clock():
+            return None
+        return value[0]
+
+    def set(self, key: str, value: str, px: int, nx: bool = False) -> bool | None:
+        if nx and self.get(key) is not None:
+            return None
+        self.values[key] = (value, self.clock() + px / 1000)
+        return True
+
+    def eval(self, script: str, _numkeys: int, key: str, worker_id: str, lease_ms: int) -> int:
+        assert script == ACQUIRE_LEASE_SCRIPT
+        current = self.get(key)
+        if current is None or current == worker_id:
+            self.set(key, worker_id, px=lease_ms)
+            return 1
+        return 0
+
+
+def test_leader_lease_takeover():
+    clock = Clock()
+    cache = FakeRedis(clock)
+    lease_a = LeaderLease(LEADER_KEY, "a", LEASE_SECONDS, clock)
+    lease_b = LeaderLease(LEADER_KEY, "b", LEASE_SECONDS, clock)
+
+    assert lease_a.renew(cache) and lease_a.is_leader
+    assert not lease_b.renew(cache) and not lease_b.is_leader
+    for _ in range(6):
+        clock.now += LEASE_SECONDS / 3
+        assert lease_a.renew(cache)
+        assert not lease_b.renew(cache)
+
+    # a停止续约，租约过期前b不能接替，过期时a在本地同时放弃leader身份
+    clock.now += LEASE_SECONDS - 1
+    assert lease_a.is_leader and not lease_b.renew(cache)
+    clock.now += 1
+    assert not lease_a.is_leader
+    assert lease_b.renew(cache) and lease_b.is_leader
+    # a恢复后不能抢回租约
+    assert not lease_a.renew(cache) and not lease_a.is_leader
+
+
+def test_job_runs_once_per_interval_across_workers():
+    clock = Clock()
+    cache = FakeRedis(clock)
+    leases = {worker_id: LeaderLease(LEADER_KEY, worker_id, LEASE_SECONDS, clock) for worker_id in ("a", "b")}
+    crash_second = 200
+
+    runs = []
+    for second in range(10 * JOB_INTERVAL_SECONDS):
+        clock.now = second
+        for worker_id, lease in leases.items():
+            if worker_id == "a" and second >= crash_second:
+                continue
+            if second % (LEASE_SECONDS // 3) == 0:
+                lease.renew(cache)
+            # 每秒都尝试执行，只有认领到本次间隔的worker执行
+            if lease.is_leader and try_claim_job_run(cache, "job", JOB_INTERVAL_SECONDS, worker_id):
+                runs.append((second, worker_id))
+
+    assert [second for second, _ in runs] == list(range(0, 10 * JOB_INTERVAL_SECONDS, JOB_INTERVAL_SECONDS))
+    assert all(worker_id == ("a" if second < crash_second else "b") for second, worker_id in runs)
+
+    # 新旧leader同时认为自己是leader时，同一个间隔也只有一个能执行
+    assert try_claim_job_run(cache, "other", JOB_INTERVAL_SECONDS, "a")
+    assert not try_claim_job_run(cache, "other", JOB_INTERVAL_SECONDS, "b")
+    clock.now += JOB_INTERVAL_SECONDS
+    assert try_claim_job_run(cache, "other", JOB_INTERVAL_SECONDS, "b")
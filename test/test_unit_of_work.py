@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.common.exception import ServiceError
+from app.db import RoutingSession, common_crud, unit_of_work
+from app.db.orm import Species
+
+mouse = {"chinese_name": "小鼠", "english_name": "mouse", "latin_name": "Mus musculus"}
+rat = {"chinese_name": "大鼠", "english_name": "rat", "latin_name": "Rattus norvegicus"}
+
+
+def test_unit_of_work_rollback_deferred_commits(sqlite_routing_session: type[RoutingSession]):
+    with sqlite_routing_session() as db:
+        with pytest.raises(ServiceError):
+            with unit_of_work(db):
+                assert common_crud.insert_row(db, Species, mouse, commit=True) is not None
+                raise ServiceError.database_fail()
+        assert db.execute(select(func.count()).select_from(Species)).scalar() == 0
+
+        with unit_of_work(db):
+            common_crud.insert_row(db, Species, mouse, commit=True)
+            common_crud.insert_row(db, Species, rat, commit=True)
+        assert db.execute(select(func.count()).select_from(Species)).scalar() == 2
+
+
+def test_unit_of_work_refuses_commit_after_failed_write(sqlite_routing_session: type[RoutingSession]):
+    with sqlite_routing_session() as db:
+        # 调用方忽略写操作失败时，工作单元也不能提交失败之前的语句
+        with pytest.raises(ServiceError):
+            with unit_of_work(db):
+                mouse_id = common_crud.insert_row(db, Species, mouse, commit=True)
+                assert common_crud.insert_row(db, Species, rat | {"id": mouse_id}, commit=True) is None
+                assert not common_crud.bulk_insert_rows(db, Species, [rat | {"id": mouse_id}], commit=True)
+        assert db.execute(select(func.count()).select_from(Species)).scalar() == 0
+
+        with unit_of_work(db):
+            common_crud.insert_row(db, Species, mouse, commit=True)
+        assert db.execute(select(func.count()).select_from(Species)).scalar() == 1
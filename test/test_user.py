@@ -72,7 +72,20 @@ def test_get_users_by_page(params: dict[str, str], logon_root_headers: dict[str,
     assert "root" in [user.staff_id for user in ro.data.items]
 
 
+def test_search_users_by_term_with_stopword(created_user: dict[str, Any], logon_root_headers: dict[str, str]):
+    # "name"的ngram分词"na"、"am"包含停用词"a"，全文索引启用停用词时会漏掉这些分词
+    r = client.get("/api/getUsersByPage", headers=logon_root_headers, params={"username": "name"})
+    assert r.is_success
+    ro = Response[Page[UserResponse]](**r.json())
+    assert ro.code == 0
+    assert created_user["id"] in [user.id for user in ro.data.items]
+
+
 def test_update_access_level(created_user: dict[str, Any], logon_root_headers: dict[str, str]):
+    # 先访问一次，使用户权限进入进程内缓存
+    r = client.get("/api/getHumanSubjectsByPage", headers=created_user["headers"])
+    assert r.is_success
+
     new_access_level = 7
     body = {"id": created_user["id"], "access_level": new_access_level}
     r = client.post("/api/updateUserAccessLevel", headers=logon_root_headers, json=body)
@@ -86,6 +99,10 @@ def test_update_access_level(created_user: dict[str, Any], logon_root_headers: d
     assert ro.code == 0
     assert ro.data.access_level == new_access_level
 
+    # 权限修改后缓存失效，不再能访问需要被试者权限的接口
+    r = client.get("/api/getHumanSubjectsByPage", headers=created_user["headers"])
+    assert r.status_code == 401
+
 
 def test_update_password(created_user: dict[str, Any]):
     new_password = encrypt_password("new password")